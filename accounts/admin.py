@@ -1,6 +1,59 @@
+from django import http, shortcuts, urls
 from django.contrib import admin
+from django.core import exceptions
+from django.utils import html
 
 from . import models as acc_models
 
 
 admin.site.register(acc_models.UserProfile)
+admin.site.register(acc_models.OutboxEmail)
+
+
+@admin.register(acc_models.ProfiledRequest)
+class ProfiledRequestAdmin(admin.ModelAdmin):
+    """Shows the profiles captured by `accounts.profiling`, which cannot be
+    added or changed here."""
+    list_display = ['created_at', 'mode', 'method', 'path', 'view', 'status', 'duration_ms', 'user']
+    list_filter = ['mode', 'view']
+    fields = ['created_at', 'user', 'mode', 'method', 'path', 'view', 'status', 'duration_ms', 'formatted_report',
+              'download_link']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def formatted_report(self, obj):
+        return html.format_html('<pre>{}</pre>', obj.report)
+    formatted_report.short_description = 'report'
+
+    def download_link(self, obj):
+        if not obj.data:
+            return '-'
+        url = urls.reverse('admin:accounts_profiledrequest_download', args=[obj.pk])
+        return html.format_html('<a href="{}">request-{}.prof</a>', url, obj.pk)
+    download_link.short_description = 'statistics'
+
+    def get_urls(self):
+        return [
+            urls.path(
+                '<int:object_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='accounts_profiledrequest_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id):
+        """Returns the cProfile statistics of a profile as a file that
+        `pstats.Stats` loads."""
+        profiled_request = shortcuts.get_object_or_404(acc_models.ProfiledRequest, pk=object_id)
+        if not self.has_view_permission(request, profiled_request):
+            raise exceptions.PermissionDenied
+        if not profiled_request.data:
+            raise http.Http404
+        response = http.HttpResponse(bytes(profiled_request.data), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="request-{profiled_request.pk}.prof"'
+        return response
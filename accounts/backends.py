@@ -0,0 +1,28 @@
+from django.contrib.auth import backends as auth_backends, get_user_model
+from django.core import exceptions
+
+
+class ProfileModelBackend(auth_backends.ModelBackend):
+    """A `ModelBackend` that loads a user together with its profile.
+
+    The profile is needed on almost every request, e.g. by
+    `UserDayScheduleManager.current_schedule`, so it is fetched with the user
+    in a single query instead of in a separate query on first access. The
+    user is cached on the request by `AuthenticationMiddleware`, so the
+    profile is read once per request.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None:
+            # Stop `django.contrib.auth.authenticate` from trying the backends
+            # listed after this one, which would check the password again.
+            raise exceptions.PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
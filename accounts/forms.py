@@ -32,18 +32,19 @@ class UserCreationForm(dj_forms.ModelForm):
         self.fields['email'].widget.attrs['required'] = True
 
     def clean_email(self):
-        """Validates that the provided email is unique.
+        """Validates that an email is provided.
 
         Raises:
-             ValidationError: if there exist a user with the provided
-                email.
+             ValidationError: if an email is not provided.
+
+        Notes:
+            The uniqueness of the email is not validated here. It is enforced
+            by a unique index on the lowercased email instead, see
+            `add_unique_email_error`, which spares a query on every signup and
+            cannot be raced by a concurrent signup.
         """
         email = self.cleaned_data.get('email')
-        if email:
-            email_qs = auth_models.User.objects.filter(email=email)
-            if email_qs.exists():
-                raise exceptions.ValidationError(self.error_messages['email_unique'])
-        else:
+        if not email:
             raise exceptions.ValidationError(self.error_messages['required'])
         return email
 
@@ -70,6 +71,22 @@ class UserCreationForm(dj_forms.ModelForm):
             user.save()
         return user
 
+    def add_unique_email_error(self, error):
+        """Adds the `email_unique` error to this form if the given error was
+        raised by the unique email index.
+
+        Args:
+            error: An `IntegrityError` raised while saving the user.
+
+        Returns:
+            True if the error was raised by the unique email index and False
+            otherwise.
+        """
+        if acc_models.UNIQUE_EMAIL_INDEX not in str(error):
+            return False
+        self.add_error('email', exceptions.ValidationError(self.error_messages['email_unique']))
+        return True
+
 
 class UserProfileForm(dj_forms.ModelForm):
     """A form for creating a User profile that stores user's extra data."""
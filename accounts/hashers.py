@@ -0,0 +1,194 @@
+import atexit
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent import futures
+from concurrent.futures import process
+
+from django import conf
+from django.contrib.auth import hashers
+from django.test import signals as test_signals
+
+
+class HashingPool:
+    """A bounded process pool for computing password hashes.
+
+    Password hashing is deliberately slow and CPU bound. Computing hashes in
+    the request thread stalls the other threads of the worker, so hashes are
+    computed in a separate process instead.
+
+    The number of hashes that are submitted to the pool but not yet computed
+    is limited to `max_pending`. A caller that cannot get a slot within
+    `timeout` seconds computes the hash in its own thread so that a request is
+    never failed because the pool is busy.
+
+    Notes:
+        The executor is created lazily and recreated if the current process
+        id changes. That way, a pool is never shared between forked workers.
+        It is also recreated once broken by the death of one of its
+        processes, e.g. killed for lack of memory, and the hash that found it
+        broken is computed in the caller's thread.
+    """
+    def __init__(self, max_workers, max_pending, timeout):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'inline': 0,
+            'pending': 0,
+            'max_pending_seen': 0,
+        }
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # 'spawn' is used because forking a process that runs
+                # threads may leave locks held in the child.
+                self._executor = futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def pbkdf2(self, password, salt, iterations, digest_name):
+        """Returns the PBKDF2 hash of the given password as bytes.
+
+        Args:
+            password: A string representing the password to hash.
+            salt: A string representing the salt.
+            iterations: An integer representing the number of iterations.
+            digest_name: A string representing the name of a `hashlib` digest.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            self._increment('inline')
+            return _pbkdf2(password, salt, iterations, digest_name)
+        try:
+            self._increment('submitted')
+            self._increment('pending')
+            executor = self.executor
+            try:
+                hash = executor.submit(_pbkdf2, password, salt, iterations, digest_name).result()
+            except process.BrokenProcessPool:
+                self._increment('failed')
+                self._discard_executor(executor)
+            except BaseException:
+                self._increment('failed')
+                raise
+            else:
+                self._increment('completed')
+                return hash
+        finally:
+            self._increment('pending', -1)
+            self._slots.release()
+        self._increment('inline')
+        return _pbkdf2(password, salt, iterations, digest_name)
+
+    def metrics(self):
+        """Returns a copy of the metrics of this pool as a `dict`."""
+        with self._lock:
+            return dict(self._metrics)
+
+    def shutdown(self):
+        """Shuts down the executor if it has been created."""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+    def _discard_executor(self, executor):
+        """Shuts down the given broken executor so that the next hash
+        creates a new one, unless another thread has already replaced it."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _increment(self, name, value=1):
+        with self._lock:
+            self._metrics[name] += value
+            if self._metrics['pending'] > self._metrics['max_pending_seen']:
+                self._metrics['max_pending_seen'] = self._metrics['pending']
+
+
+def _pbkdf2(password, salt, iterations, digest_name):
+    """Computes a PBKDF2 hash.
+
+    This function runs in a pool process so it must be importable at the module
+    level and must not depend on Django being set up.
+    """
+    return hashlib.pbkdf2_hmac(
+        digest_name,
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        iterations,
+    )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Returns the process-wide `HashingPool`, or None if pooling is disabled
+    by setting `PASSWORD_HASHING_POOL_WORKERS` to 0."""
+    global _pool
+    settings = conf.settings
+    max_workers = getattr(settings, 'PASSWORD_HASHING_POOL_WORKERS', 0)
+    if not max_workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                max_workers=max_workers,
+                max_pending=getattr(settings, 'PASSWORD_HASHING_POOL_MAX_PENDING', max_workers * 4),
+                timeout=getattr(settings, 'PASSWORD_HASHING_POOL_TIMEOUT', 5),
+            )
+        return _pool
+
+
+def reset_pool(**kwargs):
+    """Shuts down the process-wide pool so that it is recreated from the
+    current settings on the next use."""
+    global _pool
+    setting = kwargs.get('setting')
+    if setting is not None and not setting.startswith('PASSWORD_HASHING_POOL'):
+        return
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+class PooledPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """A `PBKDF2PasswordHasher` that computes hashes in a `HashingPool`.
+
+    The algorithm name and the encoded format are the same as those of
+    `PBKDF2PasswordHasher`, so existing hashes remain valid and this hasher can
+    be added or removed from `PASSWORD_HASHERS` at any time. Both hashing and
+    verification go through `encode`.
+    """
+    def encode(self, password, salt, iterations=None):
+        pool = get_pool()
+        if pool is None:
+            return super().encode(password, salt, iterations)
+        assert password is not None
+        assert salt and '$' not in salt
+        iterations = iterations or self.iterations
+        hash = pool.pbkdf2(password, salt, iterations, self.digest().name)
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
+
+
+atexit.register(reset_pool)
+test_signals.setting_changed.connect(reset_pool)
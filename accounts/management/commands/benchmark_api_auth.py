@@ -0,0 +1,44 @@
+import datetime
+
+from django import shortcuts, test
+from django.contrib.auth import models as auth_models
+from django.core.management import base
+
+from accounts import models as acc_models, tokens
+from lifescheme import benchmarking
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Compares the queries per request and the latency of the tasks API '
+        'when authenticated with the session and with an API token. Runs '
+        'against a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with benchmarking.test_database():
+            self.run_benchmark(options['requests'])
+
+    def run_benchmark(self, count):
+        user = auth_models.User.objects.create(username='benchmark')
+        acc_models.UserProfile.objects.create(user=user, timezone='Africa/Nairobi')
+        schedule = user.dayschedules.current_schedule
+        for hour in range(8):
+            schedule.tasks.create(
+                start_time=datetime.time(hour),
+                end_time=datetime.time(hour, 30),
+                task_desc=f'Task {hour}',
+            )
+        path = shortcuts.reverse('scheduler:api-tasks')
+        session_client = test.Client()
+        session_client.force_login(user)
+        token, _ = tokens.issue(user)
+        token_client = test.Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        for label, client in (('session', session_client), ('token', token_client)):
+            queries = benchmarking.capture_queries(lambda: client.get(path))
+            latencies = benchmarking.time_calls(lambda: client.get(path), count)
+            self.stdout.write(f'{label:>7}: {len(queries)} queries, {benchmarking.summarize(latencies)}')
@@ -0,0 +1,57 @@
+import copy
+import importlib
+import tempfile
+
+from django import conf
+from django.core import cache as dj_cache
+from django.core.management import base
+from django.test import utils as test_utils
+
+from lifescheme import benchmarking
+
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+)
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Measures the cost of reading an authenticated session, as done once '
+        'per request, with each session engine. Runs against a throwaway test '
+        'database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reads', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        # The sessions cache is cleared between engines, so it must not be
+        # the one of a running server.
+        caches = copy.deepcopy(conf.settings.CACHES)
+        with tempfile.TemporaryDirectory() as cache_dir, benchmarking.test_database():
+            caches['sessions']['LOCATION'] = cache_dir
+            for engine in ENGINES:
+                with test_utils.override_settings(SESSION_ENGINE=engine, CACHES=caches):
+                    self.run_benchmark(engine, options['reads'])
+
+    def run_benchmark(self, engine, count):
+        dj_cache.caches['sessions'].clear()
+        session_store = importlib.import_module(engine).SessionStore
+        session = session_store()
+        session['_auth_user_id'] = '1'
+        session.save()
+        # A signed cookie session is stored in the key itself.
+        session_key = session.session_key
+
+        def read():
+            return session_store(session_key)['_auth_user_id']
+        read()
+        queries = benchmarking.capture_queries(read)
+        latencies = benchmarking.time_calls(read, count)
+        self.stdout.write(
+            f'{engine.rsplit(".", 1)[-1]:>14}: {len(queries)} queries,'
+            f' {benchmarking.summarize(latencies, unit="us")}'
+        )
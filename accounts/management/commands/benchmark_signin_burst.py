@@ -0,0 +1,70 @@
+import threading
+import time
+
+from django import conf, shortcuts, test
+from django.contrib import auth
+from django.contrib.auth import models as auth_models
+from django.core.management import base
+from django.test import utils as test_utils
+
+from accounts import models as acc_models
+from lifescheme import benchmarking
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Measures the latency of the tasks API while a burst of sign-ins is '
+        'being verified, with password hashing done inline and in the pool. '
+        'Runs against a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signin-threads', type=int, default=8)
+        parser.add_argument('--signins', type=int, default=4, help='Sign-ins per thread.')
+        parser.add_argument('--pool-workers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        with benchmarking.test_database():
+            self.run_benchmark(options)
+
+    def run_benchmark(self, options):
+        password = 'Str0ngPa55w0rd'
+        user = auth_models.User.objects.create_user(username='benchmark', password=password)
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        client = test.Client()
+        client.force_login(user)
+        path = shortcuts.reverse('scheduler:api-tasks')
+
+        for label, workers in (('inline', 0), ('pooled', options['pool_workers'])):
+            with test_utils.override_settings(PASSWORD_HASHING_POOL_WORKERS=workers):
+                # Warm up the pool so that its start-up is not measured.
+                auth.authenticate(username=user.username, password=password)
+                idle = self.measure(client, path, lambda: False)
+                threads = [
+                    threading.Thread(target=self.signin, args=(user.username, password, options['signins']))
+                    for _ in range(options['signin_threads'])
+                ]
+                for thread in threads:
+                    thread.start()
+                burst = self.measure(client, path, lambda: any(t.is_alive() for t in threads))
+                for thread in threads:
+                    thread.join()
+            self.stdout.write(
+                f'{label:>6}: idle {benchmarking.summarize(idle)} | burst {benchmarking.summarize(burst)}'
+            )
+
+    @staticmethod
+    def signin(username, password, count):
+        for _ in range(count):
+            auth.authenticate(username=username, password=password)
+
+    @staticmethod
+    def measure(client, path, is_busy, minimum=50):
+        """Times GET requests to `path` until `minimum` requests have been made
+        and `is_busy` returns False. Returns the latencies in milliseconds."""
+        latencies = []
+        while len(latencies) < minimum or is_busy():
+            start = time.perf_counter()
+            client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies
@@ -0,0 +1,31 @@
+import timeit
+
+import pytz
+from django import test
+from django.core.management import base
+from django.utils import timezone
+
+from accounts import models as acc_models
+
+
+class Command(base.BaseCommand):
+    help = "Compares the cost of computing a user's current date with each timezone backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000)
+        parser.add_argument('--timezone', default='Africa/Nairobi')
+
+    def handle(self, *args, **options):
+        number, name = options['number'], options['timezone']
+        profile = acc_models.UserProfile(timezone=name)
+        # Each case is a label and a function computing the current date.
+        cases = [
+            ('uncached pytz datetime', lambda: timezone.now().astimezone(pytz.timezone(name)).date()),
+            ('datetime', lambda: profile.datetime.date()),
+            ('local_date', profile.local_date),
+        ]
+        for backend in ('pytz', 'zoneinfo'):
+            with test.override_settings(TIMEZONE_BACKEND=backend):
+                for label, func in cases:
+                    seconds = min(timeit.repeat(func, number=number, repeat=3))
+                    self.stdout.write(f'{backend:>8} {label:>22}: {seconds * 1e6 / number:>6.2f} us/call')
@@ -0,0 +1,28 @@
+from django.contrib.auth import models as auth_models
+from django.core.management import base
+
+from accounts import models as acc_models, profiling
+
+
+class Command(base.BaseCommand):
+    help = (
+        "Prints a token that has the requests of the given staff user profiled "
+        "when sent in the 'X-Profile' header or the 'profile' query parameter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--mode',
+            choices=[mode for mode, _ in acc_models.ProfiledRequest.MODE_CHOICES],
+            default=acc_models.ProfiledRequest.CPROFILE,
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = auth_models.User.objects.get(username=options['username'])
+        except auth_models.User.DoesNotExist:
+            raise base.CommandError(f"There is no user '{options['username']}'.")
+        if not (user.is_active and user.is_staff):
+            raise base.CommandError(f"'{user.username}' is not an active staff user.")
+        self.stdout.write(profiling.issue_token(user, options['mode']))
@@ -0,0 +1,23 @@
+from django.core.management import base
+
+from accounts import sessions
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Deletes expired database sessions in small, rate-limited batches. '
+        'Meant to be run periodically, e.g. by a scheduler.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to wait between batches.')
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        deleted = sessions.purge_expired_sessions(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(f'Deleted {deleted} expired session(s).')
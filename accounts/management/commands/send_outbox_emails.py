@@ -0,0 +1,23 @@
+from django.core.management import base
+
+from accounts import outbox
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Sends emails that are still pending in the outbox. Emails that failed '
+        'to send are only retried by this command, so it must be run '
+        'periodically, e.g. every 10 minutes. See README.md.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=100,
+            help='The maximum number of emails to send.',
+        )
+
+    def handle(self, *args, **options):
+        sent, failed = outbox.dispatch_pending(limit=options['limit'])
+        self.stdout.write(f'Sent {sent} email(s), {failed} failed.')
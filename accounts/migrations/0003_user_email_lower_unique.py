@@ -0,0 +1,63 @@
+from django.db import migrations, models
+from django.db.models import functions
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """Stops the migration if users share an email in different cases, which
+    the unique index cannot be created over.
+
+    Each listed account but one has to be given another email, e.g. in the
+    admin, before the migration is run again.
+    """
+    User = apps.get_model('auth', 'User')
+    users = User.objects.using(schema_editor.connection.alias).exclude(email='')
+    duplicate_emails = (
+        users.values(lower_email=functions.Lower('email'))
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .values_list('lower_email', flat=True)
+    )
+    duplicates = list(
+        users.annotate(lower_email=functions.Lower('email'))
+        .filter(lower_email__in=list(duplicate_emails))
+        .order_by('lower_email', 'id')
+        .values_list('lower_email', 'id', 'username')
+    )
+    if duplicates:
+        accounts = '\n'.join(f'  {email}: {username} (id {user_id})' for email, user_id, username in duplicates)
+        raise RuntimeError(
+            'Some users share an email in different cases, so emails cannot be made unique. Give every '
+            f'account but one of each email another email and migrate again:\n{accounts}'
+        )
+
+
+class Migration(migrations.Migration):
+    """Adds a unique index on the lowercased email of users.
+
+    Django 3.1 cannot declare functional indexes on models, so the index is
+    created with SQL that both SQLite and PostgreSQL accept. Users without an
+    email are excluded since they all share the empty string.
+
+    SQLite rebuilds a table, dropping indexes it does not know about, whenever
+    a column is altered, so this migration depends on the latest migration
+    that alters `auth_user`.
+
+    Users that share an email in different cases would make the index fail,
+    so they are listed and the migration stops before the index is created.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('accounts', '0002_outboxemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql=(
+                "CREATE UNIQUE INDEX accounts_user_email_lower_uniq "
+                "ON auth_user (LOWER(email)) WHERE email <> ''"
+            ),
+            reverse_sql='DROP INDEX accounts_user_email_lower_uniq',
+        ),
+    ]
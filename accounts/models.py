@@ -1,13 +1,24 @@
-import pytz
 from django.db import models as db_models
 from django.contrib.auth import models as auth_models
-from django.utils import timezone
+from django.utils import functional, timezone
+
+from . import timezones
+
+
+# The name of the unique index on the lowercased email of `auth_user`. The
+# index is created by the 'accounts' migrations.
+UNIQUE_EMAIL_INDEX = 'accounts_user_email_lower_uniq'
 
 
 class UserProfile(db_models.Model):
     """This model stores extra data for a user"""
-    TIMEZONES = sorted(pytz.common_timezones_set)
-    TIMEZONE_CHOICES = zip(TIMEZONES, TIMEZONES)
+    # Both are lazy tuples which are computed on first use rather than when
+    # this module is imported, e.g. when the profile form is created.
+    TIMEZONES = functional.lazy(timezones.get_timezone_names, tuple)()
+    TIMEZONE_CHOICES = functional.lazy(timezones.get_timezone_choices, tuple)()
+    # The length of the longest timezone name. A system check fails if a
+    # choice is longer.
+    TIMEZONE_MAX_LENGTH = 30
 
     user = db_models.OneToOneField(
         auth_models.User,
@@ -16,18 +27,89 @@ class UserProfile(db_models.Model):
     )
     timezone = db_models.CharField(
         choices=TIMEZONE_CHOICES,
-        max_length=len(max(TIMEZONES, key=len)),
+        max_length=TIMEZONE_MAX_LENGTH,
     )
 
     def __str__(self):
         return f'{self.user.username} Profile'
 
     @property
-    def datetime(self):
-        """Return a datetime instance representing the datetime in accordance
-        with the timezone of the user associated with the current instance."""
+    def tzinfo(self):
+        """Return the tzinfo object of the timezone of the user associated
+        with the current instance."""
         # We assume that `self.timezone` is set to a valid timezone due to the
         # choices constraint on `timezone` field and the fact that the database
         # will not store a null as timezone's value.
-        user_timezone = pytz.timezone(self.timezone)
-        return timezone.now().astimezone(user_timezone)
+        return timezones.get_timezone(self.timezone)
+
+    @property
+    def datetime(self):
+        """Return a datetime instance representing the datetime in accordance
+        with the timezone of the user associated with the current instance."""
+        return timezone.now().astimezone(self.tzinfo)
+
+    def local_date(self):
+        """Return the current date in accordance with the timezone of the user
+        associated with the current instance.
+
+        Prefer this to `self.datetime.date()` when only the date is needed
+        since it is cheaper.
+        """
+        return timezones.local_date(self.timezone)
+
+
+class OutboxEmail(db_models.Model):
+    """Stores an email that is to be sent after the transaction that created
+    it has been committed.
+
+    Emails are written to this table in the same transaction as the data they
+    refer to so that an email is never sent for data that was rolled back and
+    data is never rolled back because an email could not be sent.
+    """
+    subject = db_models.CharField(max_length=255)
+    message = db_models.TextField()
+    recipient = db_models.EmailField()
+    created_at = db_models.DateTimeField(auto_now_add=True)
+    # Null until the email has been handed over to the email backend.
+    sent_at = db_models.DateTimeField(null=True, blank=True)
+    # The number of times sending this email has been attempted.
+    attempts = db_models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f'{self.recipient} - {self.subject}'
+
+
+class ProfiledRequest(db_models.Model):
+    """Stores the profile of a request captured for a staff user. See
+    `accounts.profiling`."""
+    CPROFILE = 'cprofile'
+    TRACEMALLOC = 'tracemalloc'
+    MODE_CHOICES = [
+        (CPROFILE, 'cProfile'),
+        (TRACEMALLOC, 'tracemalloc'),
+    ]
+
+    user = db_models.ForeignKey(auth_models.User, null=True, on_delete=db_models.SET_NULL, related_name='+')
+    mode = db_models.CharField(max_length=16, choices=MODE_CHOICES)
+    method = db_models.CharField(max_length=10)
+    path = db_models.CharField(max_length=2000)
+    view = db_models.CharField(max_length=255)
+    # Null if the view raised an exception.
+    status = db_models.PositiveSmallIntegerField(null=True)
+    duration_ms = db_models.FloatField()
+    # The functions with the most cumulative time for cProfile and the sites
+    # that allocated the most memory for tracemalloc.
+    report = db_models.TextField()
+    # The marshalled `pstats` statistics of cProfile, empty for tracemalloc.
+    # They can be loaded with `pstats.Stats` once downloaded from the admin.
+    data = db_models.BinaryField(blank=True)
+    created_at = db_models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.get_mode_display()})'
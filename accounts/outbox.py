@@ -0,0 +1,97 @@
+import logging
+
+from django import conf
+from django.core import mail
+from django.db import transaction
+from django.utils import timezone
+
+from . import models as acc_models
+
+
+logger = logging.getLogger(__name__)
+
+# The number of times sending an outbox email is attempted before it is left
+# alone for manual inspection.
+MAX_SEND_ATTEMPTS = 5
+
+
+def enqueue(subject, message, recipient):
+    """Writes an email to the outbox and schedules it to be sent once the
+    current transaction has been committed.
+
+    If the current transaction is rolled back, the email is discarded along
+    with it. If sending fails after the commit, the email stays in the outbox
+    and is retried by the `send_outbox_emails` management command.
+
+    Args:
+        subject: A string representing the subject of the email.
+        message: A string representing the body of the email.
+        recipient: A string representing the recipient's email address.
+
+    Returns:
+        The saved `OutboxEmail` instance.
+    """
+    outbox_email = acc_models.OutboxEmail.objects.create(
+        subject=subject,
+        message=message,
+        recipient=recipient,
+    )
+    transaction.on_commit(lambda: send(outbox_email))
+    return outbox_email
+
+
+def send(outbox_email):
+    """Sends the given outbox email and marks it as sent.
+
+    Args:
+        outbox_email: An `OutboxEmail` instance.
+
+    Returns:
+        True if the email was sent and False otherwise.
+    """
+    # This try/except ensures that a failure to send an email never reaches
+    # the caller. The failure is logged and the email is kept in the outbox
+    # and retried later.
+    try:
+        mail.send_mail(
+            subject=outbox_email.subject,
+            message=outbox_email.message,
+            from_email=conf.settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[outbox_email.recipient],
+            fail_silently=False,
+        )
+    except Exception:
+        logger.exception(
+            'Sending outbox email %s to %s failed (attempt %s of %s).',
+            outbox_email.id, outbox_email.recipient, outbox_email.attempts + 1, MAX_SEND_ATTEMPTS,
+        )
+        outbox_email.attempts += 1
+        outbox_email.save(update_fields=['attempts'])
+        return False
+    outbox_email.attempts += 1
+    outbox_email.sent_at = timezone.now()
+    outbox_email.save(update_fields=['attempts', 'sent_at'])
+    return True
+
+
+def dispatch_pending(limit=100):
+    """Sends emails that are still pending in the outbox.
+
+    Args:
+        limit: An integer representing the maximum number of emails to send.
+
+    Returns:
+        A tuple of the number of emails sent and the number of emails that
+        could not be sent.
+    """
+    pending_qs = acc_models.OutboxEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=MAX_SEND_ATTEMPTS,
+    )[:limit]
+    sent, failed = 0, 0
+    for outbox_email in pending_qs:
+        if send(outbox_email):
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
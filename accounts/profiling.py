@@ -0,0 +1,194 @@
+"""Profiling of individual requests for staff users.
+
+A staff user gets a profiling token, bound to the user and to a mode, from
+the 'profiling_token' command and sends it in the 'X-Profile' header or the
+'profile' query parameter. `ProfilingMiddleware` then runs the view under
+cProfile, for the functions the time is spent in, or tracemalloc, for the
+sites memory is allocated at, and stores the result as a
+`models.ProfiledRequest`, shown in the admin. The id of the stored profile is
+returned in the 'X-Profile-Id' header.
+
+Requests without a token are not affected. tracemalloc traces every thread,
+so allocations of requests served concurrently by other threads show up too,
+and the peak traced memory is reset whenever a capture begins.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+
+from django import conf
+from django.core import signing
+
+from lifescheme import metrics
+
+from . import models as acc_models, signer
+
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAMETER = 'profile'
+ID_HEADER = 'X-Profile-Id'
+# Keeps profiling tokens apart from the other values signed by `SIGNER`.
+TOKEN_PREFIX = 'profile'
+# The number of frames of the allocation sites kept by tracemalloc.
+TRACEMALLOC_FRAMES = 10
+
+# tracemalloc is global to the process. It is started by the first of the
+# captures running in the threads of the process, unless it already was, and
+# stopped once the last of them ends.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_capture_count = 0
+_tracemalloc_started = False
+
+
+def issue_token(user, mode):
+    """Returns a token that has the requests of the given user profiled in
+    the given mode, one of `ProfiledRequest.MODE_CHOICES`, for
+    `PROFILING_TOKEN_MAX_AGE` seconds."""
+    if mode not in dict(acc_models.ProfiledRequest.MODE_CHOICES):
+        raise ValueError(f"'{mode}' is not a profiling mode.")
+    return signer.SIGNER.sign(f'{TOKEN_PREFIX}:{user.id}:{mode}')
+
+
+def get_requested_mode(request):
+    """Returns the profiling mode of the token of the given request, or None
+    if the request has no valid token of its user or the user is not a staff
+    user."""
+    token = request.META.get(HEADER) or request.GET.get(QUERY_PARAMETER)
+    if not token:
+        return None
+    user = request.user
+    if not (user.is_active and user.is_staff):
+        return None
+    try:
+        value = signer.SIGNER.unsign(token, max_age=conf.settings.PROFILING_TOKEN_MAX_AGE)
+        prefix, user_id, mode = value.split(':')
+    except (TypeError, ValueError, signing.SignatureExpired, signer.SigningError):
+        return None
+    if prefix != TOKEN_PREFIX or user_id != str(user.id):
+        return None
+    return mode if mode in CAPTURES else None
+
+
+class CProfileCapture:
+    """Profiles the enclosed block with cProfile.
+
+    Once the block has been left, `report` lists the functions with the most
+    cumulative time and `data` holds the marshalled statistics, in the
+    format `pstats.Stats.dump_stats` writes.
+    """
+    report = ''
+    data = b''
+
+    def __enter__(self):
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(conf.settings.PROFILING_TOP_COUNT)
+        self.report = stream.getvalue()
+        self.data = marshal.dumps(stats.stats)
+
+
+def _start_tracemalloc():
+    global _tracemalloc_capture_count, _tracemalloc_started
+    with _tracemalloc_lock:
+        if _tracemalloc_capture_count == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracemalloc_started = True
+        _tracemalloc_capture_count += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_capture_count, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_capture_count -= 1
+        if _tracemalloc_capture_count == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+
+class TracemallocCapture:
+    """Traces the memory allocated in the enclosed block with tracemalloc.
+
+    Once the block has been left, `report` lists the peak traced memory and
+    the sites that allocated the most memory, and `data` is empty. Captures
+    may overlap in the threads of a process.
+    """
+    report = ''
+    data = b''
+
+    def __enter__(self):
+        _start_tracemalloc()
+        try:
+            tracemalloc.reset_peak()
+            self.before = tracemalloc.take_snapshot()
+        except BaseException:
+            _stop_tracemalloc()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            _stop_tracemalloc()
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        differences = after.filter_traces(ignored).compare_to(self.before.filter_traces(ignored), 'lineno')
+        lines = [f'Peak traced memory: {peak / 1024:.1f} KiB', '']
+        lines += [str(difference) for difference in differences[:conf.settings.PROFILING_TOP_COUNT]]
+        self.report = '\n'.join(lines) + '\n'
+
+
+CAPTURES = {
+    acc_models.ProfiledRequest.CPROFILE: CProfileCapture,
+    acc_models.ProfiledRequest.TRACEMALLOC: TracemallocCapture,
+}
+
+
+class ProfilingMiddleware:
+    """Runs the views of requests that carry a profiling token under the
+    profiler of the token and stores the profiles.
+
+    It should come last in the middleware since it calls the view itself,
+    which skips the `process_view` hooks of any middleware after it.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        mode = get_requested_mode(request)
+        if mode is None:
+            return None
+        capture = CAPTURES[mode]()
+        response = None
+        start = time.perf_counter()
+        # The profile is stored even if the view raises.
+        try:
+            with capture:
+                response = view_func(request, *view_args, **view_kwargs)
+        finally:
+            profiled_request = acc_models.ProfiledRequest.objects.create(
+                user_id=request.user.id,
+                mode=mode,
+                method=request.method,
+                path=request.get_full_path()[:2000],
+                view=metrics.get_view_name(view_func),
+                status=response.status_code if response is not None else None,
+                duration_ms=(time.perf_counter() - start) * 1000,
+                report=capture.report,
+                data=capture.data,
+            )
+        response[ID_HEADER] = str(profiled_request.id)
+        return response
@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.sessions import models as session_models
+from django.utils import timezone
+
+
+def purge_expired_sessions(batch_size=500, pause=0.1, max_batches=None):
+    """Deletes expired database sessions in small batches.
+
+    Unlike `clearsessions`, which deletes every expired session in a single
+    statement, each batch is deleted in its own short statement and the job
+    pauses between batches. That way, the sessions table is never locked for
+    long and requests reading sessions are not held up.
+
+    Args:
+        batch_size: An integer representing the number of sessions deleted per
+            batch.
+        pause: A float representing the time, in seconds, to wait between
+            batches.
+        max_batches: An optional integer representing the maximum number of
+            batches to delete. The default is None and it means that batches
+            are deleted until no expired session is left.
+
+    Returns:
+        An integer representing the number of deleted sessions.
+    """
+    now = timezone.now()
+    deleted, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        session_keys = list(
+            session_models.Session.objects
+            .filter(expire_date__lt=now)
+            .values_list('session_key', flat=True)[:batch_size]
+        )
+        if not session_keys:
+            break
+        count, _ = session_models.Session.objects.filter(session_key__in=session_keys).delete()
+        deleted += count
+        batches += 1
+        if len(session_keys) < batch_size:
+            break
+        time.sleep(pause)
+    return deleted
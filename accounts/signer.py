@@ -1,4 +1,12 @@
 import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import threading
+import time
+
+from django import conf
 from django.core import signing
 
 
@@ -10,7 +18,20 @@ class SigningError(Exception):
 class Signer:
     """A class for providing signing and unsigning services.
 
-    This class allows signing strings only.
+    This class allows signing strings only. A signed value is a compact
+    urlsafe token holding, in binary form, a version byte, the time of signing
+    in seconds, the value and a truncated HMAC-SHA256 of the former.
+
+    The HMAC keys are derived once per secret and reused. Values are signed
+    with the first secret in `SIGNER_SECRET_KEYS`, which defaults to
+    `[SECRET_KEY]`, and are unsigned with any of them. That way, a secret is
+    rotated by prepending a new secret to the list and removing the old one
+    once the tokens it signed are no longer needed.
+
+    Signers with different salts derive different keys, so a value signed by
+    one is not accepted by the other. Each kind of token whose values could
+    be mistaken for another's has a signer of its own.
+
     Notes:
         Methods of this class try to sign or unsign a given value and if an
         exception is raised, it is caught and `SigningError` is raised. This
@@ -18,7 +39,32 @@ class Signer:
         method. This is caused by the fact that signing implementation by
         Django does not provide guarantees on exceptions raised and thus
         relying on them is not a choice.
+
+        Tokens created before this format was introduced, a urlsafe base64
+        encoding of a `django.core.signing.TimestampSigner` signature, are
+        still accepted by `unsign` of a signer with the default salt.
     """
+    VERSION = b'\x01'
+    SALT = 'accounts.signer.Signer'
+    # The number of bytes of the HMAC that are kept in a token.
+    MAC_SIZE = 16
+    # The version byte and the timestamp.
+    HEADER = struct.Struct('>cI')
+
+    def __init__(self, secrets=None, salt=None):
+        self._secrets = secrets
+        self.salt = self.SALT if salt is None else salt
+        self._macs = None
+        self._lock = threading.Lock()
+
+    @property
+    def secrets(self):
+        """A tuple of the secrets used for signing and unsigning."""
+        if self._secrets is not None:
+            return tuple(self._secrets)
+        settings = conf.settings
+        return tuple(getattr(settings, 'SIGNER_SECRET_KEYS', None) or [settings.SECRET_KEY])
+
     def sign(self, value):
         """Creates a signed and timestamped urlsafe string from the given
          value.
@@ -33,11 +79,9 @@ class Signer:
         if not isinstance(value, str):
             raise TypeError(f"'signed_value' must be a string not {type(value)}")
         try:
-            signer = signing.TimestampSigner()
-            signed = signer.sign(value)
-            signed_bytes = bytes(signed, encoding='utf-8')
-            signed_urlsafe = base64.urlsafe_b64encode(signed_bytes).decode()
-            return signed_urlsafe
+            payload = self.HEADER.pack(self.VERSION, int(time.time())) + value.encode('utf-8')
+            token = payload + self._get_mac(self._get_macs()[0], payload)
+            return base64.urlsafe_b64encode(token).rstrip(b'=').decode('ascii')
         except Exception:
             raise SigningError(f"'{value}' could not be signed.")
 
@@ -70,15 +114,90 @@ class Signer:
             if max_age < 0:
                 raise ValueError(f"The given max_age, {max_age}, is a negative value")
         try:
-            signed_bytes = bytes(signed_value, encoding='utf-8')
-            signed = base64.urlsafe_b64decode(signed_bytes)
-            signed = signed.decode()
-            signer = signing.TimestampSigner()
-            return signer.unsign(signed, max_age)
+            return self._unsign(signed_value, max_age, self._get_macs())
         except signing.SignatureExpired:
             raise
         except Exception:
             raise SigningError(f"'{signed_value}' could not be signed.")
 
+    def verify_many(self, signed_values, max_age=None):
+        """Unsigns each of the given signed values.
+
+        This method is meant for validating tokens in bulk, e.g. in
+        maintenance jobs, where an invalid token should not stop the others
+        from being validated.
+
+        Args:
+            signed_values: an iterable of strings representing signed values.
+            max_age: See `unsign`.
+
+        Returns:
+            A list with, for each signed value, the original value or None if
+            it could not be unsigned or its signature is expired.
+        """
+        macs = self._get_macs()
+        values = []
+        for signed_value in signed_values:
+            try:
+                values.append(self._unsign(signed_value, max_age, macs))
+            except Exception:
+                values.append(None)
+        return values
+
+    def _unsign(self, signed_value, max_age, macs):
+        try:
+            token = base64.urlsafe_b64decode(signed_value + '=' * (-len(signed_value) % 4))
+        except (binascii.Error, ValueError):
+            token = b''
+        if len(token) < self.HEADER.size + self.MAC_SIZE or token[:1] != self.VERSION:
+            return self._unsign_legacy(signed_value, max_age)
+        payload, mac = token[:-self.MAC_SIZE], token[-self.MAC_SIZE:]
+        if not any(hmac.compare_digest(self._get_mac(key_mac, payload), mac) for key_mac in macs):
+            return self._unsign_legacy(signed_value, max_age)
+        _, timestamp = self.HEADER.unpack_from(payload)
+        if max_age is not None:
+            age = time.time() - timestamp
+            if age > max_age:
+                raise signing.SignatureExpired(f'Signature age {age} > {max_age} seconds')
+        return payload[self.HEADER.size:].decode('utf-8')
+
+    def _unsign_legacy(self, signed_value, max_age):
+        signed = base64.urlsafe_b64decode(bytes(signed_value, encoding='utf-8')).decode()
+        # Legacy tokens were all signed with the salt of `TimestampSigner`, so
+        # a signer with a salt of its own accepts none of them.
+        salt = None if self.salt == self.SALT else self.salt
+        for secret in self.secrets:
+            try:
+                return signing.TimestampSigner(key=secret, salt=salt).unsign(signed, max_age)
+            except signing.BadSignature as error:
+                if isinstance(error, signing.SignatureExpired):
+                    raise
+        raise SigningError(f"'{signed_value}' could not be signed.")
+
+    def _get_macs(self):
+        """Returns a list of keyed HMAC objects, one for each secret.
+
+        Deriving a key and keying a HMAC is done once per secret. The keyed
+        objects are copied, which is cheaper, whenever a HMAC is computed.
+        """
+        secrets = self.secrets
+        cached = self._macs
+        if cached is None or cached[0] != secrets:
+            with self._lock:
+                macs = [
+                    hmac.new(
+                        hashlib.sha256((self.salt + secret).encode('utf-8')).digest(),
+                        digestmod=hashlib.sha256,
+                    )
+                    for secret in secrets
+                ]
+                cached = self._macs = (secrets, macs)
+        return cached[1]
+
+    def _get_mac(self, key_mac, payload):
+        mac = key_mac.copy()
+        mac.update(payload)
+        return mac.digest()[:self.MAC_SIZE]
+
 
 SIGNER = Signer()
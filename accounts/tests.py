@@ -1,12 +1,25 @@
 import base64
+import copy
+import datetime
+import hashlib
+import importlib
+import io
+import marshal
+import multiprocessing
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
 import pytz
-from django import conf, http, test, shortcuts
-from django.contrib import messages
-from django.core import mail, signing
-from django.contrib.auth import models as auth_models
+from django import apps, conf, db, http, test, shortcuts
+from django.contrib import auth, messages
+from django.core import cache as dj_cache, exceptions, mail, management, signing
+from django.contrib.auth import hashers as auth_hashers, models as auth_models
+from django.contrib.sessions import models as session_models
+from django.contrib.sessions.backends import cached_db, db as db_sessions
 from django.utils import timezone
 
-from accounts import signer, forms as acc_forms, models as acc_models, views as acc_views
+from accounts import backends, hashers, outbox, profiling, sessions, signer, throttling, timezones, tokens, forms as acc_forms, models as acc_models, views as acc_views
 
 
 VALID_USERNAME, INVALID_USERNAME = 'Testuser', '{}'
@@ -34,17 +47,19 @@ class UserProfileModelTest(test.TestCase):
     Test cases:
       - `TIMEZONE_CHOICES` contains expected data.
       - `datetime` method returns expected data.
+      - `local_date` method returns the date in the user's timezone.
     """
     def test_timezone_choices(self):
-        # We cannot test `UserProfile.TIMEZONE_CHOICES` directly because it
-        # gets exhausted in the `timezone` field when models module is
-        # imported.
-        expected_choices = sorted(pytz.common_timezones_set)
-        # We convert to tuples since we cannot reliably compare pytz internal
-        # types.
-        expected_choices = tuple(expected_choices)
-        actual_choices = tuple(acc_models.UserProfile.TIMEZONES)
-        self.assertEqual(actual_choices, expected_choices)
+        expected_timezones = tuple(sorted(pytz.common_timezones_set))
+        self.assertEqual(tuple(acc_models.UserProfile.TIMEZONES), expected_timezones)
+        expected_choices = tuple(zip(expected_timezones, expected_timezones))
+        # The choices are a tuple, so they can be iterated more than once.
+        self.assertEqual(tuple(acc_models.UserProfile.TIMEZONE_CHOICES), expected_choices)
+        self.assertEqual(tuple(acc_models.UserProfile.TIMEZONE_CHOICES), expected_choices)
+        self.assertEqual(
+            acc_models.UserProfile._meta.get_field('timezone').max_length,
+            max(len(name) for name in expected_timezones),
+        )
 
     def test_datetime(self):
         tzname = 'Africa/Nairobi'
@@ -57,6 +72,51 @@ class UserProfileModelTest(test.TestCase):
         # different dates or time.
         self.assertEqual(actual_datetime.tzname(), expected_datetime.tzname())
 
+    def test_local_date(self):
+        # At 22:00 UTC it is already the next day in Nairobi (UTC+3) but not
+        # in New York.
+        now = datetime.datetime(2021, 1, 31, 22, tzinfo=pytz.utc).timestamp()
+        with mock.patch('time.time', return_value=now):
+            nairobi = acc_models.UserProfile(user=None, timezone='Africa/Nairobi')
+            new_york = acc_models.UserProfile(user=None, timezone='America/New_York')
+            self.assertEqual(nairobi.local_date(), datetime.date(2021, 2, 1))
+            self.assertEqual(new_york.local_date(), datetime.date(2021, 1, 31))
+
+
+class TimezonesTest(test.TestCase):
+    """Tests `timezones` module.
+
+    Test cases:
+      - Zones are created once per process and per backend.
+      - The 'zoneinfo' backend returns `zoneinfo.ZoneInfo` objects.
+      - An unknown backend raises `ImproperlyConfigured`.
+      - `local_date` follows daylight saving time transitions.
+    """
+    def test_zones_are_cached(self):
+        zone = timezones.get_timezone('Europe/Paris')
+        self.assertIs(timezones.get_timezone('Europe/Paris'), zone)
+        self.assertEqual(zone, pytz.timezone('Europe/Paris'))
+
+    @test.override_settings(TIMEZONE_BACKEND='zoneinfo')
+    def test_zoneinfo_backend(self):
+        zone = timezones.get_timezone('Europe/Paris')
+        self.assertEqual(type(zone).__name__, 'ZoneInfo')
+        self.assertEqual(str(zone), 'Europe/Paris')
+
+    @test.override_settings(TIMEZONE_BACKEND='invalid')
+    def test_unknown_backend(self):
+        with self.assertRaises(exceptions.ImproperlyConfigured):
+            timezones.get_timezone('Europe/Paris')
+
+    def test_local_date_across_dst_transition(self):
+        # New York switches from UTC-5 to UTC-4 at 07:00 UTC on 2021-03-14.
+        for backend in ('pytz', 'zoneinfo'):
+            with self.subTest(backend=backend), self.settings(TIMEZONE_BACKEND=backend):
+                before = datetime.datetime(2021, 3, 14, 4, 30, tzinfo=pytz.utc).timestamp()
+                after = datetime.datetime(2021, 3, 15, 4, 30, tzinfo=pytz.utc).timestamp()
+                self.assertEqual(timezones.local_date('America/New_York', before), datetime.date(2021, 3, 13))
+                self.assertEqual(timezones.local_date('America/New_York', after), datetime.date(2021, 3, 15))
+
 
 class UserCreationFormTest(test.TestCase):
     """Tests `forms.UserCreationForm`.
@@ -109,11 +169,58 @@ class UserCreationFormTest(test.TestCase):
 
     def test_existing_email(self):
         form_data = {'username': VALID_USERNAME, 'email': VALID_EMAIL, 'password': VALID_PASSWORD}
-        auth_models.User.objects.create(username='Testuser1', email=VALID_EMAIL)
+        auth_models.User.objects.create(username='Testuser1', email=VALID_EMAIL.upper())
         form = self.form_class(form_data)
-        self.assertFalse(form.is_valid())
-        form_errors = form.errors
-        self.assertEqual(form_errors['email'], [ERROR_MESSAGES['existing_email']])
+        # The uniqueness of the email is enforced by the database index.
+        self.assertTrue(form.is_valid())
+        with self.assertRaises(db.IntegrityError) as context, db.transaction.atomic():
+            form.save()
+        self.assertTrue(form.add_unique_email_error(context.exception))
+        self.assertEqual(form.errors['email'], [ERROR_MESSAGES['existing_email']])
+
+    def test_clean_email_does_not_query(self):
+        form_data = {'username': VALID_USERNAME, 'email': VALID_EMAIL, 'password': VALID_PASSWORD}
+        form = self.form_class(form_data)
+        form.cleaned_data = {'email': VALID_EMAIL}
+        with self.assertNumQueries(0):
+            self.assertEqual(form.clean_email(), VALID_EMAIL)
+
+
+class EmailIndexMigrationTest(test.TestCase):
+    """Tests the duplicate check of the migration adding the unique email
+    index.
+
+    Test cases:
+        - users sharing an email in different cases stop the migration.
+        - the migration goes on if emails are unique.
+    """
+    def setUp(self):
+        self.migration = importlib.import_module('accounts.migrations.0003_user_email_lower_unique')
+        self.schema_editor = mock.Mock(connection=db.connection)
+        # The duplicates could not be saved with the index, which is restored
+        # when the test transaction is rolled back.
+        with db.connection.cursor() as cursor:
+            cursor.execute('DROP INDEX accounts_user_email_lower_uniq')
+
+    def test_duplicate_emails(self):
+        user1 = auth_models.User.objects.create(username='Testuser1', email='test@example.com')
+        user2 = auth_models.User.objects.create(username='Testuser2', email='Test@Example.com')
+        auth_models.User.objects.create(username='Testuser3', email='other@example.com')
+        auth_models.User.objects.create(username='Testuser4')
+        auth_models.User.objects.create(username='Testuser5')
+        with self.assertRaises(RuntimeError) as context:
+            self.migration.check_duplicate_emails(apps.apps, self.schema_editor)
+        message = str(context.exception)
+        self.assertIn(f'test@example.com: Testuser1 (id {user1.id})', message)
+        self.assertIn(f'test@example.com: Testuser2 (id {user2.id})', message)
+        self.assertNotIn('Testuser3', message)
+        self.assertNotIn('Testuser4', message)
+
+    def test_unique_emails(self):
+        auth_models.User.objects.create(username='Testuser1', email='test@example.com')
+        auth_models.User.objects.create(username='Testuser2')
+        auth_models.User.objects.create(username='Testuser3')
+        self.migration.check_duplicate_emails(apps.apps, self.schema_editor)
 
 
 class UserProfileFormTest(test.TestCase):
@@ -189,6 +296,9 @@ class SignerTest(test.TestCase):
         - unsign method raises an exception when max_age is not an
           int or is a negative number.
         - unsign method unsigns a timestamped value.
+        - signed values are compact and cannot be tampered with.
+        - values signed with any of the secrets are unsigned.
+        - verify_many method unsigns values in bulk.
     """
 
     def test_sign_non_string(self):
@@ -249,6 +359,45 @@ class SignerTest(test.TestCase):
         self.assertEqual(actual, value)
 
 
+    def test_token_is_compact(self):
+        value = 'TestSigner'
+        legacy = base64.urlsafe_b64encode(bytes(signing.TimestampSigner().sign(value), encoding='utf')).decode()
+        actual = signer.SIGNER.sign(value)
+        self.assertLess(len(actual), len(legacy))
+        self.assertNotIn('=', actual)
+
+    def test_unsign_compact(self):
+        value = 'TestSigner'
+        self.assertEqual(signer.SIGNER.unsign(signer.SIGNER.sign(value), 5), value)
+
+    def test_unsign_compact_expired(self):
+        signed = signer.SIGNER.sign('TestSigner')
+        with mock.patch('time.time', return_value=time.time() + 10):
+            with self.assertRaises(signing.SignatureExpired):
+                signer.SIGNER.unsign(signed, 5)
+
+    def test_unsign_tampered(self):
+        signed = signer.SIGNER.sign('TestSigner')
+        tampered = signed[:-2] + ('AA' if signed[-2:] != 'AA' else 'BB')
+        with self.assertRaises(signer.SigningError):
+            signer.SIGNER.unsign(tampered)
+
+    def test_key_rotation(self):
+        old_signer = signer.Signer(secrets=['old-secret'])
+        rotated_signer = signer.Signer(secrets=['new-secret', 'old-secret'])
+        signed = old_signer.sign('TestSigner')
+        self.assertEqual(rotated_signer.unsign(signed), 'TestSigner')
+        # Values are signed with the first secret only.
+        with self.assertRaises(signer.SigningError):
+            old_signer.unsign(rotated_signer.sign('TestSigner'))
+
+    def test_verify_many(self):
+        values = ['Value1', 'Value2']
+        signed_values = [signer.SIGNER.sign(value) for value in values]
+        signed_values.append('invalid')
+        self.assertEqual(signer.SIGNER.verify_many(signed_values), ['Value1', 'Value2', None])
+
+
 class UserRegistrationViewTest(test.TestCase):
     """Tests `views.UserSignupView`.
 
@@ -292,21 +441,41 @@ class UserRegistrationViewTest(test.TestCase):
             'password': VALID_PASSWORD,
             'timezone': 'UTC',
         }
-        with self.settings(
-                EMAIL_BACKEND='django.core.mail.backends.console.EmailBackend',
-        ):
-            response = self.client.post(self.path_name, form_data)
+        response = self.client.post(self.path_name, form_data)
         self.assertEqual(response.status_code, 302)
         user = auth_models.User.objects.get(username=form_data['username'])
         self.assertEqual(user.email, form_data['email'])
         self.assertTrue(user.check_password(form_data['password']))
         self.assertEqual(user.profile.timezone, form_data['timezone'])
         self.assertFalse(user.is_active)
+        # The email is sent after the transaction is committed which does not
+        # happen inside a test case, so we dispatch it from the outbox.
+        outbox_email = acc_models.OutboxEmail.objects.get()
+        self.assertEqual(outbox_email.recipient, form_data['email'])
+        self.assertIsNone(outbox_email.sent_at)
+        self.assertEqual(outbox.dispatch_pending(), (1, 0))
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(mail.outbox[0].from_email, conf.settings.DEFAULT_FROM_EMAIL)
         self.assertEqual(mail.outbox[0].to, [form_data['email']])
         self.assertEqual(mail.outbox[0].subject, 'Lifescheme password confirmation')
 
+    def test_post_valid_data_writes(self):
+        form_data = {
+            'username': VALID_USERNAME,
+            'email': VALID_EMAIL,
+            'password': VALID_PASSWORD,
+            'timezone': 'UTC',
+        }
+        acc_forms.UserCreationForm(form_data).is_valid()
+        # Validation queries aside, the user, its profile and the outbox email
+        # are inserted once each and nothing is updated or deleted.
+        with test.utils.CaptureQueriesContext(db.connection) as queries:
+            self.client.post(self.path_name, form_data)
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('INSERT'), 3)
+        self.assertEqual(statements.count('UPDATE'), 0)
+        self.assertEqual(statements.count('DELETE'), 0)
+
     def test_post_empty_forms(self):
         form_data = {
             'username': '',
@@ -339,7 +508,7 @@ class UserRegistrationViewTest(test.TestCase):
         self.assertEqual(creation_form_errors['password'], [ERROR_MESSAGES['short_password']])
         self.assertEqual(profile_form_errors['timezone'], [ERROR_MESSAGES['invalid_timezone']])
 
-    def test_post_existing_email_and_username(self):
+    def test_post_existing_username(self):
         auth_models.User.objects.create(username=VALID_USERNAME, email=VALID_EMAIL)
         form_data = {
             'username': VALID_USERNAME,
@@ -349,7 +518,21 @@ class UserRegistrationViewTest(test.TestCase):
         self.assertEqual(response.status_code, 200)
         creation_form_errors = response.context['USER_CREATION_FORM'].errors
         self.assertEqual(creation_form_errors['username'], [ERROR_MESSAGES['existing_username']])
-        self.assertEqual(creation_form_errors['email'], [ERROR_MESSAGES['existing_email']])
+
+    def test_post_existing_email(self):
+        auth_models.User.objects.create(username='Testuser1', email=VALID_EMAIL)
+        form_data = {
+            'username': VALID_USERNAME,
+            'email': VALID_EMAIL.upper(),
+            'password': VALID_PASSWORD,
+            'timezone': 'UTC',
+        }
+        response = self.client.post(self.path_name, form_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['FORM_ERRORS']['email'], [ERROR_MESSAGES['existing_email']])
+        # Nothing written in the failed signup is kept.
+        self.assertFalse(auth_models.User.objects.filter(username=VALID_USERNAME).exists())
+        self.assertFalse(acc_models.OutboxEmail.objects.exists())
 
 
 class UserActivationViewTest(test.TestCase):
@@ -387,3 +570,449 @@ class UserActivationViewTest(test.TestCase):
     def test_invalid_token(self):
         response = self.client.get(self.path_name)
         self.assertEqual(response.status_code, 404)
+
+
+class OutboxTest(test.TestCase):
+    """Tests `outbox` module.
+
+    Test cases:
+        - pending emails are sent and marked as sent.
+        - emails that could not be sent are logged and kept for a retry.
+    """
+    def setUp(self):
+        super().setUp()
+        mail.outbox = []
+
+    def test_dispatch_pending(self):
+        outbox_email = outbox.enqueue('Subject', 'Message', VALID_EMAIL)
+        self.assertEqual(outbox.dispatch_pending(), (1, 0))
+        outbox_email.refresh_from_db()
+        self.assertIsNotNone(outbox_email.sent_at)
+        self.assertEqual(outbox_email.attempts, 1)
+        self.assertEqual(mail.outbox[0].to, [VALID_EMAIL])
+        # Sent emails are not sent again.
+        self.assertEqual(outbox.dispatch_pending(), (0, 0))
+
+    def test_dispatch_pending_failure(self):
+        outbox_email = outbox.enqueue('Subject', 'Message', VALID_EMAIL)
+        with self.settings(EMAIL_BACKEND='dummy.backend'), self.assertLogs('accounts.outbox', 'ERROR') as logs:
+            self.assertEqual(outbox.dispatch_pending(), (0, 1))
+        self.assertIn(f'Sending outbox email {outbox_email.id} to {VALID_EMAIL} failed', logs.output[0])
+        # The traceback of the failure is logged with it.
+        self.assertIsNotNone(logs.records[0].exc_info)
+        outbox_email.refresh_from_db()
+        self.assertIsNone(outbox_email.sent_at)
+        self.assertEqual(outbox_email.attempts, 1)
+
+
+class PooledPBKDF2PasswordHasherTest(test.TestCase):
+    """Tests `hashers.PooledPBKDF2PasswordHasher` and `hashers.HashingPool`.
+
+    Test cases:
+        - hashes computed in the pool equal hashes computed inline.
+        - hashes are computed inline when the pool is disabled.
+        - hashes are computed inline when the pool is full.
+        - hashes are computed inline and the pool is replaced when a process
+          of the pool dies.
+    """
+    def test_encode_and_verify(self):
+        hasher = hashers.PooledPBKDF2PasswordHasher()
+        with self.settings(PASSWORD_HASHING_POOL_WORKERS=1):
+            encoded = hasher.encode(VALID_PASSWORD, 'salt', 1000)
+            self.assertTrue(hasher.verify(VALID_PASSWORD, encoded))
+            self.assertFalse(hasher.verify(SHORT_PASSWORD, encoded))
+            metrics = hashers.get_pool().metrics()
+        expected = auth_hashers.PBKDF2PasswordHasher().encode(VALID_PASSWORD, 'salt', 1000)
+        self.assertEqual(encoded, expected)
+        self.assertEqual(metrics['submitted'], 3)
+        self.assertEqual(metrics['completed'], 3)
+        self.assertEqual(metrics['pending'], 0)
+
+    def test_pool_disabled(self):
+        with self.settings(PASSWORD_HASHING_POOL_WORKERS=0):
+            self.assertIsNone(hashers.get_pool())
+            encoded = hashers.PooledPBKDF2PasswordHasher().encode(VALID_PASSWORD, 'salt', 1000)
+        expected = auth_hashers.PBKDF2PasswordHasher().encode(VALID_PASSWORD, 'salt', 1000)
+        self.assertEqual(encoded, expected)
+
+    def test_pool_full(self):
+        pool = hashers.HashingPool(max_workers=1, max_pending=1, timeout=0)
+        # Take the only slot so that the next hash cannot be submitted.
+        pool._slots.acquire()
+        hash = pool.pbkdf2(VALID_PASSWORD, 'salt', 1000, 'sha256')
+        pool._slots.release()
+        pool.shutdown()
+        self.assertEqual(hash, hashlib.pbkdf2_hmac('sha256', VALID_PASSWORD.encode(), b'salt', 1000))
+        self.assertEqual(pool.metrics()['inline'], 1)
+        self.assertEqual(pool.metrics()['submitted'], 0)
+
+    def test_pool_broken(self):
+        pool = hashers.HashingPool(max_workers=1, max_pending=1, timeout=0)
+        self.addCleanup(pool.shutdown)
+        expected = hashlib.pbkdf2_hmac('sha256', VALID_PASSWORD.encode(), b'salt', 1000)
+        self.assertEqual(pool.pbkdf2(VALID_PASSWORD, 'salt', 1000, 'sha256'), expected)
+        executor = pool.executor
+        for pool_process in list(executor._processes.values()):
+            pool_process.kill()
+            pool_process.join()
+        self.assertEqual(pool.pbkdf2(VALID_PASSWORD, 'salt', 1000, 'sha256'), expected)
+        metrics = pool.metrics()
+        self.assertEqual((metrics['completed'], metrics['failed'], metrics['inline']), (1, 1, 1))
+        # The next hash is computed by a new pool.
+        self.assertEqual(pool.pbkdf2(VALID_PASSWORD, 'salt', 1000, 'sha256'), expected)
+        self.assertIsNot(pool.executor, executor)
+        self.assertEqual(pool.metrics()['completed'], 2)
+        self.assertEqual(pool.metrics()['pending'], 0)
+
+
+class TokenBucketTest(test.TestCase):
+    """Tests `throttling.TokenBucket`.
+
+    Test cases:
+        - tokens are consumed until the bucket is empty.
+        - an empty bucket is refilled over time.
+    """
+    def setUp(self):
+        super().setUp()
+        self.cache = dj_cache.caches['default']
+        self.cache.clear()
+
+    def test_consume(self):
+        bucket = throttling.TokenBucket(self.cache, 'bucket', capacity=2, period=10)
+        self.assertEqual(bucket.consume(now=100), 0)
+        self.assertEqual(bucket.consume(now=100), 0)
+        # The bucket is refilled at a rate of a token every 5 seconds.
+        self.assertEqual(bucket.consume(now=100), 5)
+        self.assertAlmostEqual(bucket.consume(now=104), 1)
+        self.assertEqual(bucket.consume(now=105), 0)
+
+
+class UserSigninViewTest(test.TestCase):
+    """Tests `views.UserSigninView`.
+
+    Test cases:
+        - sign-in attempts for a username are throttled.
+        - sign-in attempts for a username from other IP addresses are not
+          throttled.
+        - sign-in attempts from an IP address are throttled.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.path_name = shortcuts.reverse('accounts:user-signin')
+
+    def setUp(self):
+        super().setUp()
+        self.cache = dj_cache.caches[conf.settings.LOGIN_THROTTLE_CACHE]
+        self.cache.clear()
+
+    def tearDown(self):
+        self.cache.clear()
+        super().tearDown()
+
+    def test_username_throttled(self):
+        form_data = {'username': VALID_USERNAME, 'password': SHORT_PASSWORD}
+        with self.settings(LOGIN_THROTTLE_USERNAME_BUCKET=(2, 60)):
+            self.assertEqual(self.client.post(self.path_name, form_data).status_code, 200)
+            self.assertEqual(self.client.post(self.path_name, form_data).status_code, 200)
+            response = self.client.post(self.path_name, form_data)
+            # Other usernames are not affected.
+            other_response = self.client.post(self.path_name, {'username': 'Other', 'password': ''})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.context['THROTTLED'])
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(other_response.status_code, 200)
+
+    def test_username_other_ip(self):
+        form_data = {'username': VALID_USERNAME, 'password': SHORT_PASSWORD}
+        with self.settings(LOGIN_THROTTLE_USERNAME_BUCKET=(2, 60)):
+            for _ in range(3):
+                self.client.post(self.path_name, form_data, REMOTE_ADDR='203.0.113.1')
+            response = self.client.post(self.path_name, form_data, REMOTE_ADDR='203.0.113.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_ip_throttled(self):
+        with self.settings(LOGIN_THROTTLE_IP_BUCKET=(2, 60)):
+            for username in ('User1', 'User2'):
+                response = self.client.post(self.path_name, {'username': username, 'password': ''})
+                self.assertEqual(response.status_code, 200)
+            response = self.client.post(self.path_name, {'username': 'User3', 'password': ''})
+        self.assertEqual(response.status_code, 429)
+
+
+class APITokenTest(test.TestCase):
+    """Tests `tokens`, `middleware.APITokenAuthenticationMiddleware` and
+    `views.APITokenView`.
+
+    Test cases:
+        - a signed in user gets a token.
+        - a token cannot be used to get a token.
+        - API requests with a token do not read the session, user or profile.
+        - API requests with an invalid or expired token are rejected.
+        - tokens signed for other purposes are rejected.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.token_path = shortcuts.reverse('accounts:api-token')
+        cls.tasks_path = shortcuts.reverse('scheduler:api-tasks')
+
+    def setUp(self):
+        super().setUp()
+        self.user = auth_models.User.objects.create(username=VALID_USERNAME)
+        acc_models.UserProfile.objects.create(user=self.user, timezone='Africa/Nairobi')
+
+    def get_token(self):
+        self.client.force_login(self.user)
+        response = self.client.post(self.token_path)
+        self.client.logout()
+        return response.json()['TOKEN']
+
+    def test_issue(self):
+        self.client.force_login(self.user)
+        response = self.client.post(self.token_path)
+        self.assertEqual(response.status_code, 200)
+        user = tokens.authenticate(response.json()['TOKEN'])
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(user.profile.timezone, 'Africa/Nairobi')
+
+    def test_issue_anonymous_or_with_token(self):
+        self.assertEqual(self.client.post(self.token_path).status_code, 403)
+        token = self.get_token()
+        response = self.client.post(self.token_path, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 403)
+
+    def test_api_request_with_token(self):
+        token = self.get_token()
+        schedule = self.user.dayschedules.current_schedule
+        schedule.tasks.create(start_time=datetime.time(7), end_time=datetime.time(8), task_desc='Test task')
+        # The tasks, joined with their schedule, are the only query.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.tasks_path, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['TASKS'][0]['desc'], 'Test task')
+
+    def test_api_request_with_invalid_token(self):
+        response = self.client.get(self.tasks_path, HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(response.status_code, 401)
+        token = self.get_token()
+        with mock.patch('time.time', return_value=time.time() + conf.settings.API_TOKEN_MAX_AGE + 1):
+            response = self.client.get(self.tasks_path, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_api_request_with_other_token(self):
+        other_tokens = [
+            # An account activation token.
+            signer.SIGNER.sign(self.user.username),
+            profiling.issue_token(self.user, acc_models.ProfiledRequest.CPROFILE),
+            # A value of the format of an API token signed for another purpose.
+            signer.SIGNER.sign(f'{self.user.id}:{int(time.time()) + 60}:UTC'),
+        ]
+        for token in other_tokens:
+            with self.assertRaises(tokens.APITokenError):
+                tokens.authenticate(token)
+            response = self.client.get(self.tasks_path, HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(response.status_code, 401)
+
+
+class PurgeExpiredSessionsTest(test.TestCase):
+    """Tests `sessions.purge_expired_sessions`.
+
+    Test cases:
+        - only expired sessions are deleted, in batches.
+        - the number of batches can be limited.
+    """
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for index in range(5):
+            session_models.Session.objects.create(
+                session_key=f'expired{index}',
+                session_data='',
+                expire_date=now - datetime.timedelta(days=1),
+            )
+        session_models.Session.objects.create(
+            session_key='active',
+            session_data='',
+            expire_date=now + datetime.timedelta(days=1),
+        )
+
+    def test_purge(self):
+        # A query to find a batch and a query to delete it, for 3 batches.
+        with self.assertNumQueries(6):
+            deleted = sessions.purge_expired_sessions(batch_size=2, pause=0)
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(session_models.Session.objects.values_list('session_key', flat=True)), ['active'])
+
+    def test_purge_max_batches(self):
+        deleted = sessions.purge_expired_sessions(batch_size=2, pause=0, max_batches=1)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(session_models.Session.objects.count(), 4)
+
+
+def delete_cached_session(cache_key):
+    """Deletes a session from the sessions cache in a forked process, as
+    signing out in another worker does."""
+    dj_cache.caches[conf.settings.SESSION_CACHE_ALIAS].delete(cache_key)
+
+
+class SessionCacheTest(test.TestCase):
+    """Tests the session engines.
+
+    Test cases:
+        - a signed out session is read from the database, not a cache, by
+          default.
+        - a `cached_db` session deleted in one process is no longer read
+          from the cache in another of the same host.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        caches = copy.deepcopy(conf.settings.CACHES)
+        caches[conf.settings.SESSION_CACHE_ALIAS]['LOCATION'] = directory.name
+        settings_override = test.override_settings(CACHES=caches)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_sign_out(self):
+        self.assertEqual(conf.settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db')
+        user = auth_models.User.objects.create(username=VALID_USERNAME)
+        self.client.force_login(user)
+        session_key = self.client.session.session_key
+        self.client.logout()
+        with self.assertNumQueries(1):
+            self.assertNotIn('_auth_user_id', db_sessions.SessionStore(session_key).load())
+
+    @test.override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_shared_between_processes(self):
+        user = auth_models.User.objects.create(username=VALID_USERNAME)
+        self.client.force_login(user)
+        cache = dj_cache.caches[conf.settings.SESSION_CACHE_ALIAS]
+        cache_key = cached_db.KEY_PREFIX + self.client.session.session_key
+        self.assertIsNotNone(cache.get(cache_key))
+        process = multiprocessing.get_context('fork').Process(target=delete_cached_session, args=(cache_key,))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertIsNone(cache.get(cache_key))
+
+
+class ProfileModelBackendTest(test.TestCase):
+    """Tests `backends.ProfileModelBackend`.
+
+    Test cases:
+        - a user is loaded with its profile in a single query.
+        - a failed authentication does not reach the other backends.
+    """
+    def setUp(self):
+        super().setUp()
+        self.user = auth_models.User.objects.create_user(username=VALID_USERNAME, password=VALID_PASSWORD)
+        acc_models.UserProfile.objects.create(user=self.user, timezone='UTC')
+
+    def test_get_user(self):
+        with self.assertNumQueries(1):
+            user = backends.ProfileModelBackend().get_user(self.user.id)
+            self.assertEqual(user.profile.timezone, 'UTC')
+
+    def test_failed_authentication(self):
+        with mock.patch('django.contrib.auth.backends.ModelBackend.authenticate', autospec=True) as authenticate:
+            authenticate.return_value = None
+            self.assertIsNone(auth.authenticate(username=VALID_USERNAME, password=SHORT_PASSWORD))
+        # The method is shared with `ProfileModelBackend` which calls it once.
+        self.assertEqual(authenticate.call_count, 1)
+
+
+class ProfilingTest(test.TestCase):
+    """Tests `profiling` module and the 'profiling_token' command.
+
+    Test cases:
+        - requests of staff users with their token are profiled with cProfile
+          or tracemalloc and the profile is stored.
+        - tracemalloc captures overlapping in several threads do not stop
+          tracing under each other.
+        - requests without a token, with the token of another user, with an
+          expired token or of a user who is not staff are not profiled.
+        - profiles are shown and downloaded in the admin.
+        - the command only issues tokens to staff users.
+    """
+    def setUp(self):
+        self.staff_user = auth_models.User.objects.create(username='Staffuser', is_staff=True, is_superuser=True)
+        acc_models.UserProfile.objects.create(user=self.staff_user, timezone=conf.settings.TIME_ZONE)
+        self.user = auth_models.User.objects.create(username=VALID_USERNAME)
+        acc_models.UserProfile.objects.create(user=self.user, timezone=conf.settings.TIME_ZONE)
+        self.tasks_path = shortcuts.reverse('scheduler:api-tasks')
+
+    def get(self, user, token, path=None, **extra):
+        self.client.force_login(user)
+        return self.client.get(path or self.tasks_path, secure=True, HTTP_X_PROFILE=token, **extra)
+
+    def test_cprofile(self):
+        token = profiling.issue_token(self.staff_user, acc_models.ProfiledRequest.CPROFILE)
+        response = self.get(self.staff_user, token, shortcuts.reverse('scheduler:homepage'))
+        self.assertEqual(response.status_code, 200)
+        profiled_request = acc_models.ProfiledRequest.objects.get(id=response[profiling.ID_HEADER])
+        self.assertEqual(
+            (profiled_request.user, profiled_request.method, profiled_request.path, profiled_request.view),
+            (self.staff_user, 'GET', '/', 'HomepageView'),
+        )
+        self.assertEqual(profiled_request.status, 200)
+        self.assertIn('cumulative', profiled_request.report)
+        self.assertIn('views.py', profiled_request.report)
+        stats = marshal.loads(bytes(profiled_request.data))
+        self.assertTrue(any(function[2] == 'serialize_tasks' for function in stats))
+
+    def test_tracemalloc(self):
+        self.client.force_login(self.staff_user)
+        token = profiling.issue_token(self.staff_user, acc_models.ProfiledRequest.TRACEMALLOC)
+        response = self.client.get(self.tasks_path, {'profile': token}, secure=True)
+        profiled_request = acc_models.ProfiledRequest.objects.get(id=response[profiling.ID_HEADER])
+        self.assertEqual(profiled_request.view, 'TasksView')
+        self.assertTrue(profiled_request.report.startswith('Peak traced memory: '))
+        self.assertEqual(bytes(profiled_request.data), b'')
+
+    def test_overlapping_tracemalloc_captures(self):
+        first, second = profiling.TracemallocCapture(), profiling.TracemallocCapture()
+        first.__enter__()
+        second.__enter__()
+        first.__exit__(None, None, None)
+        self.assertTrue(tracemalloc.is_tracing())
+        second.__exit__(None, None, None)
+        self.assertFalse(tracemalloc.is_tracing())
+        for capture in (first, second):
+            self.assertTrue(capture.report.startswith('Peak traced memory: '))
+
+    def test_not_profiled(self):
+        staff_token = profiling.issue_token(self.staff_user, acc_models.ProfiledRequest.CPROFILE)
+        user_token = profiling.issue_token(self.user, acc_models.ProfiledRequest.CPROFILE)
+        responses = [
+            self.get(self.staff_user, ''),
+            self.get(self.staff_user, user_token),
+            self.get(self.staff_user, signer.SIGNER.sign(self.staff_user.username)),
+            self.get(self.user, user_token),
+        ]
+        with mock.patch('time.time', return_value=time.time() + conf.settings.PROFILING_TOKEN_MAX_AGE + 1):
+            responses.append(self.get(self.staff_user, staff_token))
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(profiling.ID_HEADER, response)
+        self.assertFalse(acc_models.ProfiledRequest.objects.exists())
+
+    def test_admin(self):
+        token = profiling.issue_token(self.staff_user, acc_models.ProfiledRequest.CPROFILE)
+        profile_id = self.get(self.staff_user, token)[profiling.ID_HEADER]
+        response = self.client.get(shortcuts.reverse('admin:accounts_profiledrequest_change', args=[profile_id]))
+        self.assertContains(response, 'cumulative')
+        download_path = shortcuts.reverse('admin:accounts_profiledrequest_download', args=[profile_id])
+        self.assertContains(response, download_path)
+        response = self.client.get(download_path)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="request-{profile_id}.prof"')
+        self.assertEqual(marshal.loads(response.content), marshal.loads(bytes(
+            acc_models.ProfiledRequest.objects.get(id=profile_id).data
+        )))
+
+    def test_command(self):
+        output = io.StringIO()
+        management.call_command('profiling_token', 'Staffuser', mode='tracemalloc', stdout=output)
+        self.assertEqual(signer.SIGNER.unsign(output.getvalue().strip()), f'profile:{self.staff_user.id}:tracemalloc')
+        with self.assertRaisesMessage(management.CommandError, 'is not an active staff user'):
+            management.call_command('profiling_token', VALID_USERNAME)
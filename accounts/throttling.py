@@ -0,0 +1,124 @@
+import hashlib
+import time
+
+from django import conf
+from django.core import cache as dj_cache
+
+
+class TokenBucket:
+    """A token bucket whose state is kept in a Django cache.
+
+    A bucket holds at most `capacity` tokens and is refilled at a rate of
+    `capacity` tokens every `period` seconds. Each request consumes a token and
+    a request is allowed only if a token was available.
+
+    Notes:
+        The state is read and written with separate cache calls, so two
+        workers consuming from the same bucket at the same instant may both be
+        allowed. This slightly overruns the limit under races but never
+        blocks a request that should have been allowed, which is acceptable
+        for throttling.
+    """
+    def __init__(self, cache, key, capacity, period):
+        self.cache = cache
+        self.key = key
+        self.capacity = capacity
+        self.period = period
+
+    @property
+    def rate(self):
+        """The number of tokens added to the bucket per second."""
+        return self.capacity / self.period
+
+    def consume(self, now=None):
+        """Consumes a token from the bucket.
+
+        Args:
+            now: A float representing the current time in seconds. Defaults to
+                `time.time()`.
+
+        Returns:
+            A float representing the number of seconds until a token is
+            available. 0 means a token was consumed and the request is allowed.
+        """
+        now = time.time() if now is None else now
+        tokens, updated_at = self.cache.get(self.key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        if tokens < 1:
+            return (1 - tokens) / self.rate
+        # The entry expires once the bucket would have been refilled anyway.
+        self.cache.set(self.key, (tokens - 1, now), timeout=self.period)
+        return 0
+
+
+class LoginThrottle:
+    """Throttles sign-in attempts per client IP address and per username
+    and client IP address.
+
+    The username bucket is kept per client IP address so that a client cannot
+    lock the owner of a username out by failing to sign in with it.
+
+    Checking a password is deliberately expensive, so attempts are throttled
+    before authentication runs. The buckets are kept in the cache named by
+    `LOGIN_THROTTLE_CACHE` which must be shared by all workers, e.g. a
+    database or file based cache.
+    """
+    key_prefix = 'login-throttle'
+
+    def check(self, request, username):
+        """Consumes a token from the IP address and the username and IP
+        address buckets of the given sign-in attempt.
+
+        Args:
+            request: A `HttpRequest` object representing the sign-in attempt.
+            username: A string representing the submitted username.
+
+        Returns:
+            A float representing the number of seconds until the attempt
+            would be allowed. 0 means the attempt is allowed.
+        """
+        settings = conf.settings
+        if not getattr(settings, 'LOGIN_THROTTLE_ENABLED', True):
+            return 0
+        cache = dj_cache.caches[getattr(settings, 'LOGIN_THROTTLE_CACHE', 'default')]
+        ip = self.get_client_ip(request)
+        ip_bucket = TokenBucket(
+            cache,
+            self.make_key('ip', ip),
+            *settings.LOGIN_THROTTLE_IP_BUCKET,
+        )
+        username_bucket = TokenBucket(
+            cache,
+            self.make_key('username', f'{ip}:{username.lower()}'),
+            *settings.LOGIN_THROTTLE_USERNAME_BUCKET,
+        )
+        # Both buckets are always consumed from so that an attacker who is
+        # throttled by one of them keeps draining the other.
+        return max(ip_bucket.consume(), username_bucket.consume())
+
+    def make_key(self, kind, value):
+        """Returns a cache key for a bucket.
+
+        The value is hashed since usernames may contain characters that some
+        cache backends do not accept in keys.
+        """
+        digest = hashlib.sha256(value.encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:{kind}:{digest}'
+
+    @staticmethod
+    def get_client_ip(request):
+        """Returns the IP address of the client that made the request.
+
+        If `LOGIN_THROTTLE_TRUST_X_FORWARDED_FOR` is True, the last address in
+        the `X-Forwarded-For` header is used. This is the address that was
+        appended by the proxy in front of the application, e.g. the Heroku
+        router, and thus cannot be forged by the client.
+        """
+        if getattr(conf.settings, 'LOGIN_THROTTLE_TRUST_X_FORWARDED_FOR', False):
+            forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '')
+            if forwarded_for:
+                return forwarded_for.split(',')[-1].strip()
+        return request.META.get('REMOTE_ADDR', '')
+
+
+LOGIN_THROTTLE = LoginThrottle()
@@ -0,0 +1,83 @@
+import datetime
+import functools
+import time
+
+import pytz
+from django import conf
+from django.core import exceptions
+
+
+
+# UTC offsets only change at instants that are multiples of 15 minutes, so an
+# offset looked up for any instant applies to the whole 15 minutes around it.
+OFFSET_BUCKET_SECONDS = 15 * 60
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone_names():
+    """Returns a sorted tuple of the names of the timezones users can choose
+    from.
+
+    The names are computed once per process, on first use. This is slow since
+    `pytz` checks that the file of each timezone exists.
+    """
+    return tuple(sorted(pytz.common_timezones_set))
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone_choices():
+    """Returns the timezone choices of `UserProfile.timezone` as a tuple of
+    (name, name) pairs."""
+    return tuple((name, name) for name in get_timezone_names())
+
+
+def get_timezone(name):
+    """Returns the tzinfo object of the timezone with the given name.
+
+    The objects are created once per process and per backend. The backend is
+    selected by the `TIMEZONE_BACKEND` setting, either 'pytz' or 'zoneinfo'.
+
+    Raises:
+        ImproperlyConfigured: if 'zoneinfo' is selected but is not available.
+    """
+    return _get_timezone(getattr(conf.settings, 'TIMEZONE_BACKEND', 'pytz'), name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_timezone(backend, name):
+    if backend == 'pytz':
+        return pytz.timezone(name)
+    if backend == 'zoneinfo':
+        # Imported here since `zoneinfo` is optional and slow to import.
+        try:
+            import zoneinfo
+        except ImportError:  # Python < 3.9
+            raise exceptions.ImproperlyConfigured("The 'zoneinfo' timezone backend requires Python 3.9+.")
+        return zoneinfo.ZoneInfo(name)
+    raise exceptions.ImproperlyConfigured(f"Unknown timezone backend '{backend}'.")
+
+
+def local_date(name, now=None):
+    """Returns the current date in the timezone with the given name.
+
+    This is cheaper than converting the current time to an aware datetime in
+    the timezone since the UTC offset is looked up once per 15 minutes and
+    per timezone and the date is then computed from a UNIX timestamp.
+
+    Args:
+        name: A string representing a timezone name.
+        now: A float representing the current time as a UNIX timestamp.
+            Defaults to `time.time()`.
+    """
+    now = time.time() if now is None else now
+    bucket = int(now) // OFFSET_BUCKET_SECONDS
+    offset = _get_utc_offset(getattr(conf.settings, 'TIMEZONE_BACKEND', 'pytz'), name, bucket)
+    return datetime.date.fromordinal(EPOCH_ORDINAL + int(now + offset) // 86400)
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_utc_offset(backend, name, bucket):
+    """Returns the UTC offset, in seconds, of a timezone during a bucket."""
+    instant = datetime.datetime.fromtimestamp(bucket * OFFSET_BUCKET_SECONDS, tz=datetime.timezone.utc)
+    return instant.astimezone(_get_timezone(backend, name)).utcoffset().total_seconds()
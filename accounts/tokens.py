@@ -0,0 +1,63 @@
+import time
+
+from django import conf
+from django.contrib.auth import models as auth_models
+
+from . import models as acc_models, signer
+
+
+# API tokens are signed apart from the other tokens of the app, e.g. those of
+# account activation, so that none of those is accepted as an API token.
+SIGNER = signer.Signer(salt='accounts.tokens')
+
+
+class APITokenError(Exception):
+    """Raised when an API token is not valid."""
+    pass
+
+
+def issue(user):
+    """Creates a short-lived API token for the given user.
+
+    The token embeds the id of the user, the timezone of the user and the time
+    the token expires, so that a request carrying it is authenticated without
+    reading the session, the user or the profile from the database. Since a
+    token cannot be revoked, it should be short-lived. Its lifetime is set by
+    `API_TOKEN_MAX_AGE`.
+
+    Args:
+        user: A `User` instance with a profile.
+
+    Returns:
+        A tuple of the token as a string and the time the token expires as a
+        UNIX timestamp.
+    """
+    expires_at = int(time.time()) + conf.settings.API_TOKEN_MAX_AGE
+    # Timezone names do not contain ':' and it is the last field anyway.
+    value = f'{user.id}:{expires_at}:{user.profile.timezone}'
+    return SIGNER.sign(value), expires_at
+
+
+def authenticate(token):
+    """Returns the user the given API token was issued to.
+
+    The returned user is built from the token rather than read from the
+    database. It only has its id set and its profile only has its timezone
+    set, which is what the API views use.
+
+    Raises:
+        APITokenError: if the token is not valid or is expired.
+    """
+    try:
+        value = SIGNER.unsign(token)
+        user_id, expires_at, timezone = value.split(':', 2)
+        user_id, expires_at = int(user_id), int(expires_at)
+    except (TypeError, ValueError, signer.SigningError):
+        raise APITokenError('The token is not valid.')
+    if expires_at < time.time():
+        raise APITokenError('The token is expired.')
+    user = auth_models.User(id=user_id, is_active=True)
+    # Assigning the profile caches it on the user so that accessing it does
+    # not query the database.
+    user.profile = acc_models.UserProfile(user=user, timezone=timezone)
+    return user
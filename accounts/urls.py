@@ -19,5 +19,6 @@ urlpatterns = [
         acc_views.UserAccountActivationView.as_view(),
         name='user-account-activator',
     ),
+    urls.path('api/token', acc_views.APITokenView.as_view(), name='api-token'),
 ]
 
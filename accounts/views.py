@@ -1,14 +1,32 @@
-from django import conf, http, shortcuts, views as dj_views
+import math
+
+from django import db, http, shortcuts, views as dj_views
 from django.contrib import messages
 from django.contrib.auth import models as auth_models, views as auth_views
-from django.core import mail, signing
+from django.core import signing
+from django.db import transaction
+from django.utils import decorators
+
+from lifescheme import pagecache
 
-from . import forms as acc_forms, signer
+from . import forms as acc_forms, outbox, signer, throttling, tokens
 
 
+@decorators.method_decorator(pagecache.cache_anonymous_page, name='get')
 class UserSigninView(auth_views.LoginView):
     template_name = 'accounts/user_signin.html'
 
+    def post(self, request, *args, **kwargs):
+        # Sign-in attempts are throttled before the password is checked since
+        # checking it is what makes an attempt expensive.
+        retry_after = throttling.LOGIN_THROTTLE.check(request, request.POST.get('username', ''))
+        if retry_after:
+            context_data = self.get_context_data(THROTTLED=True)
+            response = self.render_to_response(context_data, status=429)
+            response['Retry-After'] = math.ceil(retry_after)
+            return response
+        return super().post(request, *args, **kwargs)
+
 
 class UserSignoutView(auth_views.LogoutView):
     pass
@@ -47,6 +65,7 @@ class BaseView(dj_views.View):
         raise http.Http404
 
 
+@decorators.method_decorator(pagecache.cache_anonymous_page, name='get')
 class UserSignupView(BaseView):
     """Saves and deactivates a user."""
     template_name = 'accounts/user_signup.html'
@@ -59,45 +78,42 @@ class UserSignupView(BaseView):
         filled_creation_form = acc_forms.UserCreationForm(request.POST)
         filled_profile_form = acc_forms.UserProfileForm(request.POST)
         if filled_creation_form.is_valid() and filled_profile_form.is_valid():
-            user = filled_creation_form.save()
-            if self.send_confirmation_email(user):
-                user.is_active = False
-                user.save(update_fields=['is_active'])
-                filled_profile_form.instance.user = user
-                filled_profile_form.save()
+            # The user, its profile and the confirmation email are written in
+            # one transaction. The user is created inactive so that it does
+            # not have to be updated once the email has been accepted and the
+            # email is only sent after the transaction has been committed.
+            try:
+                with transaction.atomic():
+                    user = filled_creation_form.save(commit=False)
+                    user.is_active = False
+                    user.save()
+                    filled_profile_form.instance.user = user
+                    filled_profile_form.save()
+                    self.enqueue_confirmation_email(user)
+            except db.IntegrityError as error:
+                if not filled_creation_form.add_unique_email_error(error):
+                    raise
+            else:
                 link = shortcuts.reverse('accounts:user-account-creation-success')
                 token = signer.SIGNER.sign(user.email)
                 redirect_link = f'{link}?t={token}'
                 return shortcuts.redirect(redirect_link)
-            else:
-                user.delete()
-                context_data = {
-                    'USER_CREATION_FORM': filled_creation_form,
-                    'USER_PROFILE_FORM': filled_profile_form,
-                    'ERROR': True,
-                }
-                return shortcuts.render(
-                    request,
-                    self.template_name,
-                    context_data,
-                )
-        else:
-            # Here, we extract error messages directly instead of using
-            # <form>.errors which returns error messages wrapped in html.
-            form_errors = {
-                **self.extract_form_errors(filled_creation_form),
-                **self.extract_form_errors(filled_profile_form),
-            }
-            context_data = {
-                'USER_CREATION_FORM': filled_creation_form,
-                'USER_PROFILE_FORM': filled_profile_form,
-                'FORM_ERRORS': form_errors,
-            }
-            return shortcuts.render(
-                request,
-                self.template_name,
-                context_data,
-            )
+        # Here, we extract error messages directly instead of using
+        # <form>.errors which returns error messages wrapped in html.
+        form_errors = {
+            **self.extract_form_errors(filled_creation_form),
+            **self.extract_form_errors(filled_profile_form),
+        }
+        context_data = {
+            'USER_CREATION_FORM': filled_creation_form,
+            'USER_PROFILE_FORM': filled_profile_form,
+            'FORM_ERRORS': form_errors,
+        }
+        return shortcuts.render(
+            request,
+            self.template_name,
+            context_data,
+        )
 
     def extract_form_errors(self, form):
         """Returns a `dict` where each key is a field name and its value is
@@ -126,28 +142,23 @@ class UserSignupView(BaseView):
         }
         return data
 
-    def send_confirmation_email(self, user):
-        # This try/except allows this view to return a response even if the
-        # email could not be sent. However, an exception will never occur
-        # unless a connection issue arises with sending the email.
-        try:
-            protocol = 'https' if self.request.is_secure() else 'http'
-            domain = self.request.get_host()
-            token = signer.SIGNER.sign(user.username)
-            path = shortcuts.reverse('accounts:user-account-activator')
-            link = f'{protocol}://{domain}{path}?t={token}'
-            mail_subject = 'Lifescheme password confirmation'
-            mail_message = f'Hello {user.username}, follow this link to confirm your email. {link}'
-            mail.send_mail(
-                subject=mail_subject,
-                message=mail_message,
-                from_email=conf.settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                fail_silently=False,
-            )
-            return True
-        except Exception:
-            return False
+    def enqueue_confirmation_email(self, user):
+        """Writes the account confirmation email for the given user to the
+        outbox.
+
+        The email is sent after the current transaction has been committed.
+        See `outbox.enqueue`.
+        """
+        protocol = 'https' if self.request.is_secure() else 'http'
+        domain = self.request.get_host()
+        token = signer.SIGNER.sign(user.username)
+        path = shortcuts.reverse('accounts:user-account-activator')
+        link = f'{protocol}://{domain}{path}?t={token}'
+        return outbox.enqueue(
+            subject='Lifescheme password confirmation',
+            message=f'Hello {user.username}, follow this link to confirm your email. {link}',
+            recipient=user.email,
+        )
 
 
 class UserAccountCreationSuccessView(BaseView):
@@ -187,3 +198,17 @@ class UserAccountActivationView(BaseView):
             return shortcuts.redirect(shortcuts.reverse('accounts:user-signin'))
         except (TypeError, ValueError, signing.SignatureExpired, signer.SigningError):
             raise http.Http404
+
+
+class APITokenView(BaseView):
+    """Issues a short-lived API token to the signed in user.
+
+    A token cannot be used to get another token so that a token cannot be
+    renewed indefinitely without signing in. This view only accepts POST
+    requests.
+    """
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_authenticated or getattr(request, 'api_token_authenticated', False):
+            return http.JsonResponse({'ERROR': 'Sign in to get a token.'}, status=403)
+        token, expires_at = tokens.issue(request.user)
+        return http.JsonResponse({'TOKEN': token, 'EXPIRES_AT': expires_at})
@@ -1,8 +1,38 @@
-import {render} from "@testing-library/react";
+import {render, screen} from "@testing-library/react";
 import React from "react";
 import TaskTable from "../../components/TaskTable";
+import post from "../../utils/network";
+import {INITIAL_TASKS_ELEMENT_ID} from "../../constants/constants";
+
+jest.mock("../../utils/network");
+
+
+afterEach(() => {
+    document.body.innerHTML = '';
+    post.mockClear();
+});
 
 
 test('renders without crashing.', () => {
     render(<TaskTable/>);
-});
\ No newline at end of file
+});
+
+
+test('fetches the tasks if none are embedded.', () => {
+    render(<TaskTable/>);
+    expect(post).toHaveBeenCalledTimes(1);
+});
+
+
+test('renders the embedded tasks without fetching them.', () => {
+    const script = document.createElement('script');
+    script.id = INITIAL_TASKS_ELEMENT_ID;
+    script.type = 'application/json';
+    script.textContent = JSON.stringify({
+        TASKS: [{id: 1, startTime: '07:00', endTime: '08:00', desc: 'Embedded task', completed: false}],
+    });
+    document.body.appendChild(script);
+    render(<TaskTable/>);
+    expect(post).not.toHaveBeenCalled();
+    expect(screen.getByText('Embedded task')).toBeInTheDocument();
+});
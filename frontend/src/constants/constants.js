@@ -7,4 +7,12 @@ export const ENDPOINTS = {
     'TASKS_LIST_ENDPOINT': '/api/tasks',
 };
 
+// The id of the script tag in which the homepage embeds the tasks of the
+// current schedule, in the format of the tasks list endpoint.
+export const INITIAL_TASKS_ELEMENT_ID = 'initial-tasks';
+
+// The name of the performance measure recording when the tasks were first
+// shown.
+export const TASKS_FIRST_RENDER_MEASURE = 'tasks-first-render';
+
 export const UNEXPECTED_ERROR_MESSAGE = 'An unexpected error occurred. Please try again.';
@@ -0,0 +1,23 @@
+/**
+ * Retrieves the data the server embedded in the page in a JSON script tag,
+ * i.e. using the `json_script` template filter, with the given id.
+ *
+ * @param id string the id of the script tag.
+ *
+ * @return the parsed data or `null` if there is no such tag or its content is
+ * not valid JSON.
+ * */
+const readInitialData = (id) => {
+    const element = document.getElementById(id);
+    if (!element)
+        return null;
+    try {
+        return JSON.parse(element.textContent);
+    } catch (error) {
+        console.log(`Error: ${error}`);
+        return null;
+    }
+};
+
+
+export default readInitialData;
@@ -0,0 +1,21 @@
+"""Gunicorn configuration for lifescheme.
+
+The application is loaded and warmed up in the master process before the
+workers are forked, so that the workers share the imported modules and the
+compiled templates instead of each building its own copy. See
+`lifescheme.warmup`.
+
+The request metrics of a previous run are dropped when the server starts. The
+workers then share them through `METRICS_DIR`, see `lifescheme.metrics`.
+"""
+import os
+
+preload_app = True
+# Heroku sets `WEB_CONCURRENCY` from the size of the dyno.
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+
+def on_starting(server):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lifescheme.settings')
+    from lifescheme import metrics
+    metrics.clear_directory()
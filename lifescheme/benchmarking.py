@@ -0,0 +1,57 @@
+"""Helpers shared by the benchmark management commands."""
+import contextlib
+import statistics
+import time
+
+from django import db
+from django.test import utils as test_utils
+
+
+@contextlib.contextmanager
+def test_database():
+    """Runs the enclosed block against throwaway test databases so that a
+    benchmark never touches real data."""
+    test_utils.setup_test_environment()
+    old_config = test_utils.setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        test_utils.teardown_databases(old_config, verbosity=0)
+        test_utils.teardown_test_environment()
+
+
+def capture_queries(func):
+    """Calls `func` and returns the list of queries it made."""
+    # The query log is bounded, so it is emptied first for it to be able to
+    # grow. Otherwise, after the many queries of setting up the database,
+    # nothing would appear to be captured.
+    db.reset_queries()
+    with test_utils.CaptureQueriesContext(db.connection) as queries:
+        func()
+    return queries.captured_queries
+
+
+def time_calls(func, count):
+    """Calls `func` `count` times and returns the latency of each call in
+    milliseconds."""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(values, percent):
+    """Returns the given percentile, from 1 to 99, of the given values."""
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def summarize(latencies, unit='ms'):
+    """Returns a one-line summary of the given latencies in milliseconds,
+    shown in `unit`, either 'ms' or 'us'."""
+    scale = {'ms': 1, 'us': 1000}[unit]
+    return (
+        f'p50={percentile(latencies, 50) * scale:.2f}{unit}'
+        f' p99={percentile(latencies, 99) * scale:.2f}{unit} ({len(latencies)} calls)'
+    )
@@ -0,0 +1,131 @@
+"""WSGI handlers that serve parts of the site through their own middleware
+stacks.
+
+Every request normally goes through all of `settings.MIDDLEWARE` even if,
+like the JSON API, it has no use for some of them. `PathDispatcher` sends
+requests under a path prefix to a `MiddlewareStackHandler` that runs only the
+middleware the prefix needs.
+"""
+import threading
+import time
+
+from django.core import exceptions
+from django.core.handlers import exception, wsgi
+from django.utils import module_loading
+
+
+class MiddlewareTimings:
+    """Accumulates the time spent in each layer of a middleware stack.
+
+    Each layer is timed inclusively, i.e. with the layers it wraps, and the
+    time spent in a middleware alone is the difference between its layer and
+    the next one. The innermost layer, 'view', includes the `process_view`
+    hooks and the view.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Layer names from the outermost to the innermost.
+        self.layers = []
+        self._totals = {}
+
+    def wrap(self, name, handler):
+        """Returns `handler` wrapped so that the time spent in it is recorded
+        under `name`. Layers must be wrapped from the innermost outwards."""
+        self.layers.insert(0, name)
+        self._totals[name] = [0, 0.0]
+
+        def timed_handler(request):
+            start = time.perf_counter()
+            try:
+                return handler(request)
+            finally:
+                self.add(name, time.perf_counter() - start)
+        return timed_handler
+
+    def add(self, name, seconds):
+        with self._lock:
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def report(self):
+        """Returns a list of (layer name, calls, mean milliseconds spent in the
+        layer alone) from the outermost layer to the innermost."""
+        with self._lock:
+            totals = {name: tuple(values) for name, values in self._totals.items()}
+        report = []
+        for index, name in enumerate(self.layers):
+            calls, seconds = totals[name]
+            if index + 1 < len(self.layers):
+                seconds -= totals[self.layers[index + 1]][1]
+            report.append((name, calls, seconds * 1000 / calls if calls else 0.0))
+        return report
+
+
+class MiddlewareStackHandler(wsgi.WSGIHandler):
+    """A WSGI handler that runs the given middleware instead of
+    `settings.MIDDLEWARE`.
+
+    Only synchronous middleware is supported since the handler serves WSGI.
+
+    Args:
+        middleware: A list of dotted paths to middleware, in the same order
+            as in `settings.MIDDLEWARE`.
+        timings: An optional `MiddlewareTimings` instance in which the time
+            spent in each middleware is recorded.
+    """
+    def __init__(self, middleware, timings=None, *args, **kwargs):
+        self.middleware = list(middleware)
+        self.timings = timings
+        super().__init__(*args, **kwargs)
+
+    def load_middleware(self, is_async=False):
+        if is_async:
+            raise exceptions.ImproperlyConfigured(f'{type(self).__name__} only serves WSGI.')
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = exception.convert_exception_to_response(self._get_response)
+        if self.timings is not None:
+            handler = self.timings.wrap('view', handler)
+        for middleware_path in reversed(self.middleware):
+            middleware = module_loading.import_string(middleware_path)
+            if not getattr(middleware, 'sync_capable', True):
+                raise exceptions.ImproperlyConfigured(
+                    f'Middleware {middleware_path} is not sync capable.'
+                )
+            try:
+                mw_instance = middleware(handler)
+            except exceptions.MiddlewareNotUsed:
+                continue
+            if hasattr(mw_instance, 'process_view'):
+                self._view_middleware.insert(0, mw_instance.process_view)
+            if hasattr(mw_instance, 'process_template_response'):
+                self._template_response_middleware.append(mw_instance.process_template_response)
+            if hasattr(mw_instance, 'process_exception'):
+                self._exception_middleware.append(mw_instance.process_exception)
+            handler = exception.convert_exception_to_response(mw_instance)
+            if self.timings is not None:
+                handler = self.timings.wrap(middleware_path, handler)
+        self._middleware_chain = handler
+
+
+class PathDispatcher:
+    """A WSGI application that sends each request to the application of the
+    first path prefix the request path starts with, or to `default`.
+
+    Args:
+        default: The WSGI application of requests that match no prefix.
+        routes: A list of (path prefix, WSGI application) tuples.
+    """
+    def __init__(self, default, routes):
+        self.default = default
+        self.routes = list(routes)
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix, application in self.routes:
+            if path.startswith(prefix):
+                return application(environ, start_response)
+        return self.default(environ, start_response)
@@ -0,0 +1,93 @@
+"""Measures the time spent importing each module while the site starts.
+
+`python -X importtime` does not see modules imported with
+`importlib.import_module`, which is how Django imports apps, models and
+URLconfs. `TimingFinder` times the execution of every module instead,
+whichever way it is imported.
+
+The timings only make sense in a fresh interpreter, so `main` is meant to be
+run in a subprocess, e.g. by the `profile_imports` management command. This
+module must not import Django at the module level.
+"""
+import importlib.abc
+import json
+import sys
+import time
+
+
+class _TimingLoader:
+    """Wraps a loader to record how long executing a module takes."""
+    def __init__(self, loader, finder):
+        self._loader = loader
+        self._finder = finder
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._finder.start()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._finder.stop(module.__name__)
+
+
+class TimingFinder(importlib.abc.MetaPathFinder):
+    """A meta path finder recording the self and cumulative time, in seconds,
+    spent executing each module imported while it is installed.
+
+    The self time of a module excludes the modules it imports.
+    """
+    def __init__(self):
+        self.timings = {}
+        # One [start time, time spent in nested imports] per module being
+        # executed, from the outermost to the innermost.
+        self._stack = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path[sys.meta_path.index(self) + 1:]:
+            find_spec = getattr(finder, 'find_spec', None)
+            spec = find_spec(fullname, path, target) if find_spec else None
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimingLoader(spec.loader, self)
+                return spec
+        return None
+
+    def start(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def stop(self, name):
+        start, nested = self._stack.pop()
+        cumulative = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += cumulative
+        self.timings[name] = (cumulative - nested, cumulative)
+
+
+def main():
+    """Starts the site the way a WSGI worker does and writes the timings of
+    the imported modules and the total startup time to stdout as JSON."""
+    finder = TimingFinder()
+    finder.install()
+    start = time.perf_counter()
+    import lifescheme.wsgi  # noqa: F401
+    from django import urls
+    # URLconfs and views are imported on the first request otherwise.
+    urls.get_resolver().url_patterns
+    total = time.perf_counter() - start
+    finder.uninstall()
+    json.dump({'total': total, 'modules': finder.timings}, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
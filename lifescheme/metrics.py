@@ -0,0 +1,323 @@
+"""Request metrics shared by the worker processes, in the Prometheus text
+format.
+
+Each process adds to its own file of `METRICS_DIR`, a memory-mapped table of
+sample names and values, so that incrementing a counter is a write to memory
+that needs no lock across processes and no external service. `collect` sums
+the files of all processes, including those of workers that have exited so
+that counters never go back. The directory is emptied when the server starts,
+see `gunicorn.conf.py`.
+
+`MetricsMiddleware` counts requests and server errors and records latency
+histograms per view class and `metrics_view` serves them to Prometheus.
+"""
+import glob
+import hmac
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+
+from django import conf, http
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Other methods are recorded as 'other' so that clients cannot add samples.
+METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+# The histogram buckets of latencies, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A file starts with the number of bytes in use, followed by entries of a key
+# length, the key padded to 8 bytes and an 8-byte value. The number of bytes
+# in use is updated after an entry is complete so that readers only see
+# complete entries.
+_HEADER = struct.Struct('<Q')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_FILE_SIZE = 64 * 1024
+
+
+def _padded_key_size(key_length):
+    size = _KEY_LENGTH.size + key_length
+    return size + (-size % 8)
+
+
+class MmapValues:
+    """A mapping of keys to float values kept in a memory-mapped file.
+
+    Only one process may write a file but any process may read it with
+    `read_file`.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        # The position of the value of each key.
+        self._positions = {key: position for key, position, _ in _iter_entries(self._map, self._used)}
+
+    def increment(self, key, amount=1.0):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add_key(key)
+        value = _VALUE.unpack_from(self._map, position)[0]
+        _VALUE.pack_into(self._map, position, value + amount)
+
+    def _add_key(self, key):
+        encoded_key = key.encode('utf-8')
+        entry_size = _padded_key_size(len(encoded_key)) + _VALUE.size
+        if self._used + entry_size > len(self._map):
+            self._grow(self._used + entry_size)
+        _KEY_LENGTH.pack_into(self._map, self._used, len(encoded_key))
+        self._map[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded_key)] = encoded_key
+        position = self._used + _padded_key_size(len(encoded_key))
+        _VALUE.pack_into(self._map, position, 0.0)
+        self._used += entry_size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def _grow(self, size):
+        new_size = len(self._map)
+        while new_size < size:
+            new_size *= 2
+        self._map.close()
+        self._file.truncate(new_size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _iter_entries(data, used):
+    """Yields (key, position of the value, value) of the entries of the
+    given file contents."""
+    position = _HEADER.size
+    while position < used:
+        key_length = _KEY_LENGTH.unpack_from(data, position)[0]
+        key_start = position + _KEY_LENGTH.size
+        key = bytes(data[key_start:key_start + key_length]).decode('utf-8')
+        value_position = position + _padded_key_size(key_length)
+        yield key, value_position, _VALUE.unpack_from(data, value_position)[0]
+        position = value_position + _VALUE.size
+
+
+def read_file(path):
+    """Returns a `dict` of the values of the given metrics file."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < _HEADER.size:
+        return {}
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    return {key: value for key, _, value in _iter_entries(data, used)}
+
+
+def get_directory():
+    return conf.settings.METRICS_DIR
+
+
+def clear_directory(directory=None):
+    """Deletes the metrics files of the given directory, `METRICS_DIR` by
+    default, and creates it if it does not exist."""
+    directory = directory or get_directory()
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+class Registry:
+    """Adds the values of the current process to its file of `METRICS_DIR`
+    and collects the values of all processes.
+
+    The file is opened on first use in each process, so a registry inherited
+    by a forked worker writes to a file of its own.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._owner = None
+
+    def increment(self, key, amount=1.0):
+        with self._lock:
+            self._get_values().increment(key, amount)
+
+    def increment_many(self, amounts):
+        """Increments the values of the keys of the given (key, amount)
+        pairs at once."""
+        with self._lock:
+            values = self._get_values()
+            for key, amount in amounts:
+                values.increment(key, amount)
+
+    def _get_values(self):
+        owner = (os.getpid(), get_directory())
+        if owner != self._owner:
+            # Closing the copy of the file of the parent process that a forked
+            # worker inherits leaves the parent's file open.
+            if self._values is not None:
+                self._values.close()
+            os.makedirs(owner[1], exist_ok=True)
+            self._values = MmapValues(os.path.join(owner[1], f'metrics_{owner[0]}.db'))
+            self._owner = owner
+        return self._values
+
+    def collect(self):
+        """Returns a `dict` of the values summed across the files of all
+        processes."""
+        totals = {}
+        for path in sorted(glob.glob(os.path.join(get_directory(), 'metrics_*.db'))):
+            for key, value in read_file(path).items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+REGISTRY = Registry()
+# The metrics in the order they are exposed.
+FAMILIES = []
+
+
+def format_labels(labels):
+    """Returns the given (name, value) label pairs in the Prometheus format."""
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric:
+    """A metric with the given label names, exposed by `generate_text`.
+
+    Values are recorded with every label of the metric as keyword arguments.
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # The names of the samples of the metric.
+        self.sample_names = (name,)
+        FAMILIES.append(self)
+
+    def _label_pairs(self, labels):
+        return [(name, labels[name]) for name in self.labelnames]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        REGISTRY.increment(self.name + format_labels(self._label_pairs(labels)), amount)
+
+
+class Histogram(Metric):
+    """A histogram of the given buckets, in ascending order."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.sample_names = (f'{name}_bucket', f'{name}_sum', f'{name}_count')
+
+    def observe(self, value, **labels):
+        label_pairs = self._label_pairs(labels)
+        # Buckets are cumulative, a value is counted in every bucket it fits.
+        # The buckets it does not fit get 0 so that every bucket is exposed
+        # from the first value on.
+        amounts = [
+            (
+                f'{self.name}_bucket' + format_labels(label_pairs + [('le', format_bound(bound))]),
+                1.0 if value <= bound else 0.0,
+            )
+            for bound in self.buckets
+        ]
+        amounts.append((f'{self.name}_sum' + format_labels(label_pairs), value))
+        amounts.append((f'{self.name}_count' + format_labels(label_pairs), 1.0))
+        REGISTRY.increment_many(amounts)
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+REQUESTS = Counter(
+    'lifescheme_requests_total', 'Requests served, by view class, method and status code.',
+    ['view', 'method', 'status'],
+)
+ERRORS = Counter(
+    'lifescheme_request_errors_total', 'Requests that failed with a server error, by view class.',
+    ['view'],
+)
+LATENCY = Histogram(
+    'lifescheme_request_duration_seconds', 'Time taken to serve requests, by view class.',
+    ['view'],
+)
+
+
+def generate_text():
+    """Returns the collected metrics in the Prometheus text format."""
+    values = REGISTRY.collect()
+    lines = []
+    for family in FAMILIES:
+        lines.append(f'# HELP {family.name} {family.documentation}')
+        lines.append(f'# TYPE {family.name} {family.type}')
+        for key, value in values.items():
+            if key.partition('{')[0] in family.sample_names:
+                lines.append(f'{key} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_view_name(view_func):
+    """Returns the name of the class of a class-based view, or of the view
+    function."""
+    view_class = getattr(view_func, 'view_class', None)
+    if view_class is not None:
+        return view_class.__name__
+    return getattr(view_func, '__name__', type(view_func).__name__)
+
+
+class MetricsMiddleware:
+    """Counts requests and server errors and records latencies per view class.
+
+    It should come first in the middleware, before
+    `servertiming.ServerTimingMiddleware`, so that the latencies include the
+    time spent in every other middleware. Requests that resolve to no view
+    are recorded under the view 'none'.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+        view = getattr(request, 'metrics_view', 'none')
+        method = request.method if request.method in METHODS else 'other'
+        REQUESTS.inc(view=view, method=method, status=response.status_code)
+        if response.status_code >= 500:
+            ERRORS.inc(view=view)
+        LATENCY.observe(duration, view=view)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = get_view_name(view_func)
+
+
+def metrics_view(request):
+    """Serves the metrics to staff users and to requests that have
+    `METRICS_TOKEN` as a bearer token."""
+    token = conf.settings.METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    authorized = request.user.is_active and request.user.is_staff
+    if token and authorization.startswith('Bearer '):
+        authorized = authorized or hmac.compare_digest(authorization[len('Bearer '):], token)
+    if not authorized:
+        return http.HttpResponseForbidden()
+    return http.HttpResponse(generate_text(), content_type=CONTENT_TYPE)
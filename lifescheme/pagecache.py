@@ -0,0 +1,113 @@
+"""A full-page cache for pages that are the same for every anonymous visitor.
+
+A page is cached per path, including the query string, and is only served
+from the cache to visitors without a session or pending messages, i.e. to
+visitors for whom the page cannot differ. The CSRF token is the only part of
+such a page that differs between visitors. It is replaced by a placeholder in
+the cached page and a token of the current visitor is filled in whenever the
+page is served.
+
+The hits, misses and bypasses of each page are counted in the shared metrics
+of `lifescheme.metrics`, so they are summed across the worker processes and
+served by the metrics endpoint.
+"""
+import functools
+import hashlib
+import re
+
+from django import conf, http
+from django.contrib.messages.storage import cookie as messages_cookie
+from django.core import cache as dj_cache
+from django.middleware import csrf
+
+from lifescheme import metrics
+
+
+CSRF_TOKEN_PLACEHOLDER = b'__PAGE_CACHE_CSRF_TOKEN__'
+CSRF_TOKEN_PATTERN = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+# The header telling whether a page was served from the cache.
+STATUS_HEADER = 'X-Page-Cache'
+
+# A hit is a page served from the cache, a miss is a page rendered and then
+# cached and a bypass is a request the cache cannot serve, e.g. one from a
+# signed-in user. The hit rate is hits / (hits + misses).
+REQUESTS = metrics.Counter(
+    'lifescheme_page_cache_requests_total',
+    'Requests to pages of the page cache, by URL name and result: hit, miss or bypass.',
+    ['page', 'result'],
+)
+
+
+def count_request(request, result):
+    match = request.resolver_match
+    REQUESTS.inc(page=match.view_name if match is not None else 'none', result=result)
+
+
+def cache_anonymous_page(view):
+    """Decorates a view so that its GET responses to anonymous visitors are
+    served from the cache named by `PAGE_CACHE_ALIAS`.
+
+    Responses are cached for `PAGE_CACHE_TIMEOUT` seconds. Setting
+    `PAGE_CACHE_ENABLED` to False disables the cache.
+    """
+    @functools.wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        if not is_cacheable(request):
+            count_request(request, 'bypass')
+            return view(request, *args, **kwargs)
+        settings = conf.settings
+        cache = dj_cache.caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+        key = make_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            count_request(request, 'hit')
+            response = build_response(request, *cached)
+            response[STATUS_HEADER] = 'HIT'
+            return response
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if response.status_code != 200 or response.streaming or response.cookies:
+            count_request(request, 'bypass')
+            return response
+        count_request(request, 'miss')
+        content = CSRF_TOKEN_PATTERN.sub(rb'\1' + CSRF_TOKEN_PLACEHOLDER + rb'\2', response.content)
+        headers = [(name, value) for name, value in response.items() if name != STATUS_HEADER]
+        cache.set(key, (content, headers), getattr(settings, 'PAGE_CACHE_TIMEOUT', 300))
+        response[STATUS_HEADER] = 'MISS'
+        return response
+    return wrapped_view
+
+
+def is_cacheable(request):
+    """Returns True if the given request may be served from the cache.
+
+    A visitor with a session may be signed in and a visitor with messages
+    would see them on the page, so only visitors with neither are served.
+    """
+    if not getattr(conf.settings, 'PAGE_CACHE_ENABLED', True):
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    cookies = request.COOKIES
+    return (
+        conf.settings.SESSION_COOKIE_NAME not in cookies
+        and messages_cookie.CookieStorage.cookie_name not in cookies
+    )
+
+
+def make_key(request):
+    digest = hashlib.sha256(request.get_full_path().encode('utf-8')).hexdigest()
+    return f'page-cache:{digest}'
+
+
+def build_response(request, content, headers):
+    """Builds a response from a cached page, filling in a CSRF token of the
+    visitor."""
+    if CSRF_TOKEN_PLACEHOLDER in content:
+        # This also makes `CsrfViewMiddleware` set the CSRF cookie.
+        content = content.replace(CSRF_TOKEN_PLACEHOLDER, csrf.get_token(request).encode('ascii'))
+    response = http.HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    return response
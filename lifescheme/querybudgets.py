@@ -0,0 +1,75 @@
+"""Query budgets of views.
+
+A view declares, with the `budget` class decorator, the most SQL statements a
+request to it may execute and the most time, in milliseconds, they may take in
+total. `QueryBudgetTestMixin.assertWithinBudget` makes a request and fails
+with the offending statements if the view it resolves to overspends, so that
+an extra fetch added to a view does not go unnoticed.
+"""
+import collections
+
+from django import urls
+
+from lifescheme import queryplans
+
+
+Budget = collections.namedtuple('Budget', 'queries time')
+
+
+def budget(queries, time):
+    """A class decorator that declares the query budget of a view class.
+
+    Args:
+        queries: The most statements a request may execute.
+        time: The most milliseconds the statements may take in total.
+    """
+    def decorator(view_class):
+        view_class.query_budget = Budget(queries, time)
+        return view_class
+    return decorator
+
+
+def get_budget(view_func):
+    """Returns the `Budget` of the given view function, as returned by
+    `as_view`, or None if its class has no budget."""
+    view_class = getattr(view_func, 'view_class', None)
+    return getattr(view_class, 'query_budget', None)
+
+
+def get_overspending(view_budget, statements):
+    """Returns a list of messages describing how the given statements exceed
+    the given budget, empty if they do not."""
+    messages = []
+    if len(statements) > view_budget.queries:
+        messages.append(f'{len(statements)} queries, over the budget of {view_budget.queries}')
+    total_time = sum(statement.duration for statement in statements)
+    if total_time > view_budget.time:
+        messages.append(f'{total_time:.2f}ms of queries, over the budget of {view_budget.time}ms')
+    return messages
+
+
+def format_statements(statements):
+    return '\n'.join(
+        f'{number}. [{statement.alias}, {statement.duration:.2f}ms] {statement.sql}'
+        for number, statement in enumerate(statements, 1)
+    )
+
+
+class QueryBudgetTestMixin:
+    """A mixin of `django.test.TestCase` that checks requests against the
+    budgets of their views."""
+    def assertWithinBudget(self, method, path, data=None, **extra):
+        """Makes a request with the test client and fails if the statements
+        it executes exceed the budget of its view.
+
+        Returns:
+            The response.
+        """
+        view_budget = get_budget(urls.resolve(path).func)
+        self.assertIsNotNone(view_budget, f'The view of {path} has no query budget.')
+        with queryplans.capture_statements() as statements:
+            response = getattr(self.client, method)(path, data or {}, **extra)
+        overspending = get_overspending(view_budget, statements)
+        if overspending:
+            self.fail(f"{method.upper()} {path}: {', '.join(overspending)}:\n{format_statements(statements)}")
+        return response
@@ -0,0 +1,112 @@
+"""Capturing SQL statements and auditing their query plans.
+
+`capture_statements` records the statements a block of code executes, with
+their parameters, so that each can be explained afterwards by `explain`.
+`find_issues` flags the plans that do not scale with the size of the tables:
+full table scans, temporary B-trees built to sort or group rows and indexes
+the database has to build on the fly because none exists.
+
+SQLite and PostgreSQL are supported.
+"""
+import contextlib
+import re
+import time
+
+from django import db
+
+
+# Statements that have a query plan.
+EXPLAINED_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+FULL_SCAN = 'full table scan'
+TEMP_B_TREE = 'temporary B-tree'
+MISSING_INDEX = 'missing index'
+
+# SQLite scans every row of a table, or of one of its indexes, for 'SCAN' and
+# looks rows up for 'SEARCH'. SQLite 3.36 dropped 'TABLE' from
+# 'SCAN TABLE <table>'.
+SQLITE_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW\b|SUBQUERY\b)\w+')
+SQLITE_AUTOMATIC_INDEX_PATTERN = re.compile(r'\bAUTOMATIC (?:PARTIAL )?(?:COVERING )?INDEX\b')
+POSTGRESQL_SCAN_PATTERN = re.compile(r'\bSeq Scan on (\w+)')
+
+
+class Statement:
+    """A SQL statement executed on a database, with its parameters and the
+    time it took in milliseconds."""
+    def __init__(self, alias, sql, params, duration=None):
+        self.alias = alias
+        self.sql = sql
+        self.params = params
+        self.duration = duration
+
+    def __repr__(self):
+        return f'Statement({self.alias!r}, {self.sql!r})'
+
+
+@contextlib.contextmanager
+def capture_statements(aliases=None):
+    """Records the statements executed in the enclosed block on the given
+    databases, all of them by default.
+
+    Yields:
+        The list the `Statement`s are appended to.
+    """
+    statements = []
+
+    def make_wrapper(alias):
+        def record_statement(execute, sql, params, many, context):
+            if many:
+                return execute(sql, params, many, context)
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                statements.append(Statement(alias, sql, params, (time.perf_counter() - start) * 1000))
+        return record_statement
+
+    with contextlib.ExitStack() as stack:
+        for alias in aliases or db.connections:
+            stack.enter_context(db.connections[alias].execute_wrapper(make_wrapper(alias)))
+        yield statements
+
+
+def is_explainable(sql):
+    return sql.lstrip()[:6].upper().startswith(EXPLAINED_STATEMENTS)
+
+
+def explain(statement):
+    """Returns the query plan of the given statement as a list of lines.
+
+    Raises:
+        NotImplementedError: if the database is neither SQLite nor
+            PostgreSQL.
+    """
+    connection = db.connections[statement.alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {statement.sql}', statement.params)
+            # The rows are (id, parent id, unused, detail).
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {statement.sql}', statement.params)
+            return [row[0] for row in cursor.fetchall()]
+    raise NotImplementedError(f'Query plans of {connection.vendor} databases are not supported.')
+
+
+def find_issues(vendor, plan):
+    """Returns a list of (issue, plan line) of the lines of the given query
+    plan that have an issue, one of `FULL_SCAN`, `TEMP_B_TREE` and
+    `MISSING_INDEX`."""
+    issues = []
+    for line in plan:
+        if vendor == 'sqlite':
+            detail = line.strip()
+            if SQLITE_SCAN_PATTERN.match(detail):
+                issues.append((FULL_SCAN, line))
+            elif 'USE TEMP B-TREE' in detail:
+                issues.append((TEMP_B_TREE, line))
+            elif SQLITE_AUTOMATIC_INDEX_PATTERN.search(detail):
+                issues.append((MISSING_INDEX, line))
+        elif vendor == 'postgresql' and POSTGRESQL_SCAN_PATTERN.search(line):
+            issues.append((FULL_SCAN, line))
+    return issues
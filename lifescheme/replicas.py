@@ -0,0 +1,126 @@
+"""Routing of read-only traffic to a read replica of the 'default' database.
+
+Only the reads of views decorated with `read_from_replica` go to the replica,
+and only if `REPLICA_DATABASE` is configured. All writes, including the
+reads of `get_or_create`, which Django makes on the database it writes to,
+go to 'default'.
+
+A replica lags behind the primary, so a user who has just written would not
+see the write if reading from it. `ReplicaMiddleware` therefore sets a cookie
+on responses to requests that wrote to the database, and requests carrying
+the cookie read from the primary until it expires after
+`REPLICA_STICKY_SECONDS`.
+"""
+import contextlib
+import contextvars
+import dataclasses
+import functools
+
+from django import conf, db
+
+
+# The cookie pinning the reads of a client to the primary.
+PIN_COOKIE_NAME = 'dbpin'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+@dataclasses.dataclass
+class RoutingState:
+    """The routing state of the request being handled."""
+    # Whether reads may go to the replica, i.e. the view is read-only.
+    read_from_replica: bool = False
+    # Whether the client wrote recently, in an earlier request or in this one.
+    pinned: bool = False
+
+
+_state = contextvars.ContextVar('replicas_state', default=None)
+
+
+class ReplicaRouter:
+    """A database router sending the reads of read-only views to the replica
+    named by `REPLICA_DATABASE`."""
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.read_from_replica or state.pinned:
+            return None
+        replica = get_replica()
+        if replica is None or model._meta.app_label not in conf.settings.REPLICA_APP_LABELS:
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        databases = {db.DEFAULT_DB_ALIAS, get_replica()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db_alias, app_label, model_name=None, **hints):
+        # The replica is migrated by replicating the primary.
+        if db_alias == get_replica():
+            return False
+        return None
+
+
+def get_replica():
+    """Returns the alias of the replica or None if there is none."""
+    replica = getattr(conf.settings, 'REPLICA_DATABASE', None)
+    return replica if replica in conf.settings.DATABASES else None
+
+
+class ReplicaMiddleware:
+    """Tracks the routing state of each request and pins the clients that
+    write to the primary for `REPLICA_STICKY_SECONDS`."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(pinned=PIN_COOKIE_NAME in request.COOKIES)
+        token = _state.set(state)
+        wrote = False
+
+        def detect_write(execute, sql, params, many, context):
+            nonlocal wrote
+            if sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+                wrote = state.pinned = True
+            return execute(sql, params, many, context)
+
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in db.connections.all():
+                    stack.enter_context(connection.execute_wrapper(detect_write))
+                response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                '1',
+                max_age=conf.settings.REPLICA_STICKY_SECONDS,
+                secure=conf.settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+def read_from_replica(view):
+    """Decorates a read-only view so that its reads go to the replica.
+
+    The reads still go to the primary if the client is pinned to it or if
+    `ReplicaMiddleware` is not installed.
+    """
+    @functools.wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        state = _state.get()
+        if state is None:
+            return view(request, *args, **kwargs)
+        state.read_from_replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.read_from_replica = False
+    return wrapped_view
@@ -0,0 +1,163 @@
+"""Per-request timing of SQL, caches and templates.
+
+`ServerTimingMiddleware` records, for each request, the wall time, the number
+of SQL statements and the time they took, the cache hits and misses and the
+time spent rendering templates. It reports them to the client in a
+`Server-Timing` header, which browsers show with the request in their
+developer tools, and logs them as a structured line when the request took
+longer than `SLOW_REQUEST_THRESHOLD` milliseconds.
+
+Caches and templates are only measured through the backends of this module,
+which `settings.CACHES` and `settings.TEMPLATES` use. Their bookkeeping is a
+context variable lookup and a few additions, cheap enough to be left on in
+production. See the 'benchmark_server_timing' command.
+"""
+import contextlib
+import contextvars
+import logging
+import time
+
+from django import conf, db
+from django.core.cache.backends import filebased, locmem
+from django.template.backends import django as django_backend
+
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Server-Timing'
+
+# The metrics of the request being served, None outside of requests.
+_metrics = contextvars.ContextVar('request_metrics', default=None)
+# Told apart from any cached value, including None.
+_MISSING = object()
+
+
+class RequestMetrics:
+    """The metrics of a request. Times are in milliseconds."""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+
+    def finish(self):
+        self.duration = (time.perf_counter() - self.start) * 1000
+
+    def record_statement(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += (time.perf_counter() - start) * 1000
+
+    def as_header(self):
+        return (
+            f'total;dur={self.duration:.1f}, '
+            f'sql;dur={self.sql_time:.1f};desc="{self.sql_count} queries", '
+            f'tpl;dur={self.template_time:.1f}, '
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"'
+        )
+
+    def as_dict(self):
+        return {
+            'duration_ms': round(self.duration, 1),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_ms': round(self.template_time, 1),
+        }
+
+
+def get_metrics():
+    """Returns the `RequestMetrics` of the request being served, or None."""
+    return _metrics.get()
+
+
+class ServerTimingMiddleware:
+    """Measures each request and adds its `Server-Timing` header.
+
+    It should come right after `metrics.MetricsMiddleware` and before every
+    other middleware, so that the 'total' it reports includes the time spent
+    in the middleware after it. The time spent in the metrics middleware is
+    not included.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _metrics.set(metrics)
+        try:
+            with contextlib.ExitStack() as stack:
+                for alias in db.connections:
+                    stack.enter_context(db.connections[alias].execute_wrapper(metrics.record_statement))
+                response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        metrics.finish()
+        settings = conf.settings
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            response[HEADER] = metrics.as_header()
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD', None)
+        if threshold is not None and metrics.duration > threshold:
+            fields = {'method': request.method, 'path': request.path, 'status': response.status_code}
+            fields.update(metrics.as_dict())
+            logger.warning(
+                'slow request %s',
+                ' '.join(f'{name}={value}' for name, value in fields.items()),
+                extra={'request_metrics': fields},
+            )
+        return response
+
+
+class CountingCacheMixin:
+    """Counts the hits and misses of `get` in the metrics of the request being
+    served. `get_many` and `get_or_set` go through `get`."""
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        metrics = _metrics.get()
+        if value is _MISSING:
+            if metrics is not None:
+                metrics.cache_misses += 1
+            return default
+        if metrics is not None:
+            metrics.cache_hits += 1
+        return value
+
+
+class LocMemCache(CountingCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(CountingCacheMixin, filebased.FileBasedCache):
+    pass
+
+
+class Template(django_backend.Template):
+    """A template of `DjangoTemplates` whose rendering is timed."""
+    def render(self, context=None, request=None):
+        metrics = _metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += (time.perf_counter() - start) * 1000
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The Django template backend, with the rendering of its templates timed.
+
+    Templates included by or extending a rendered template are timed with it.
+    """
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 import django_heroku
@@ -23,6 +24,12 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get('LIFESCHEME_SECRET_KEY')
+# Secrets for `accounts.signer.Signer`. Values are signed with the first
+# secret and unsigned with any of them, so a secret is rotated by prepending
+# a new one. It defaults to `[SECRET_KEY]` when empty.
+SIGNER_SECRET_KEYS = [
+    key for key in os.environ.get('LIFESCHEME_SIGNER_SECRET_KEYS', '').split(',') if key
+]
 
 # In a development environment, an environment variable with the name
 # 'LIFESCHEME_DEV_ENV' should be set to any value so that the boolean evaluates
@@ -47,25 +54,81 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lifescheme.metrics.MetricsMiddleware',
+    'lifescheme.servertiming.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.APITokenAuthenticationMiddleware',
+    'lifescheme.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.profiling.ProfilingMiddleware',
+]
+
+# Requests under `API_PATH_PREFIX` are served through `API_MIDDLEWARE` instead
+# of `MIDDLEWARE`, leaving out middleware that JSON responses have no use for.
+# See `lifescheme.handlers`. Setting it to None serves them through
+# `MIDDLEWARE`.
+API_PATH_PREFIX = '/api/'
+API_MIDDLEWARE = [
+    'lifescheme.metrics.MetricsMiddleware',
+    'lifescheme.servertiming.ServerTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.APITokenAuthenticationMiddleware',
+    'lifescheme.replicas.ReplicaMiddleware',
+    'accounts.profiling.ProfilingMiddleware',
 ]
 
+# Every response gets a Server-Timing header of its wall time, SQL, cache and
+# template metrics and requests slower than the threshold, in milliseconds,
+# are logged. See `lifescheme.servertiming`.
+SERVER_TIMING_HEADER = True
+SLOW_REQUEST_THRESHOLD = 500
+
+# Request metrics are kept in a directory shared by the worker processes and
+# served in the Prometheus format at /metrics to staff users and to requests
+# with `METRICS_TOKEN` as a bearer token. See `lifescheme.metrics`.
+METRICS_DIR = os.environ.get(
+    'LIFESCHEME_METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), 'lifescheme_metrics'),
+)
+METRICS_TOKEN = os.environ.get('LIFESCHEME_METRICS_TOKEN')
+
 ROOT_URLCONF = 'lifescheme.urls'
 
+# Runs the tests with the file-based caches and METRICS_DIR in a temporary
+# directory, in the database provided by Heroku CI if `CI` is set. See
+# `lifescheme.testrunner`. `django_heroku` is kept from replacing it below.
+if 'CI' in os.environ:
+    TEST_RUNNER = 'lifescheme.testrunner.HerokuDiscoverRunner'
+else:
+    TEST_RUNNER = 'lifescheme.testrunner.DiscoverRunner'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# The template and cache backends of `lifescheme.servertiming` are Django's,
+# with their rendering time and hits and misses recorded per request.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'lifescheme.servertiming.DjangoTemplates',
         'DIRS': [
             os.path.join(BASE_DIR, 'assets'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept per process in production. In
+            # development, templates are reloaded so that changes show up.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -77,18 +140,155 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'lifescheme.wsgi.application'
+# Whether `lifescheme.wsgi` warms up the process before serving requests. See
+# `lifescheme.warmup`.
+WSGI_WARM_UP = not DEBUG
 
 
 # Database
 # https://docs.djangoproject.com/en/3.1/ref/settings/#databases
 
+# SQLite connections are tuned for concurrent requests: readers and the writer
+# do not block each other, a writer waits for the lock rather than failing and
+# transactions take the write lock when they begin. Setting
+# `LIFESCHEME_SQLITE_TUNED` to '0' restores the SQLite defaults. See
+# `lifescheme.sqlite3`.
+SQLITE_TUNED = os.environ.get('LIFESCHEME_SQLITE_TUNED', '1') == '1'
+SQLITE_TUNED_OPTIONS = {
+    'pragmas': {
+        'journal_mode': 'WAL',
+        # Commits are durable once the WAL is checkpointed, which is safe
+        # from corruption in WAL mode.
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # time in millisecs
+        'mmap_size': 256 * 1024 * 1024,  # size in bytes
+        'cache_size': -32 * 1024,  # size in KiB
+    },
+    'transaction_mode': 'IMMEDIATE',
+}
+SQLITE_OPTIONS = SQLITE_TUNED_OPTIONS if SQLITE_TUNED else {}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'lifescheme.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+# The reads of read-only views, such as the task list, go to a replica of
+# 'default' if `LIFESCHEME_REPLICA_DB_NAME` names one. A client that writes
+# reads from 'default' for `REPLICA_STICKY_SECONDS` afterwards so that it sees
+# its writes despite the replication lag. See `lifescheme.replicas`.
+REPLICA_DATABASE = 'replica'
+REPLICA_APP_LABELS = ['scheduler']
+REPLICA_STICKY_SECONDS = 10  # time in secs
+if os.environ.get('LIFESCHEME_REPLICA_DB_NAME'):
+    DATABASES[REPLICA_DATABASE] = {
+        'ENGINE': 'lifescheme.sqlite3',
+        'NAME': os.environ['LIFESCHEME_REPLICA_DB_NAME'],
+        'OPTIONS': SQLITE_OPTIONS,
+        # Tests read the replica through a second connection to the test
+        # database, which only sees committed rows, i.e. those of
+        # `TransactionTestCase`s that list the replica in `databases`.
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# The schedules and tasks of users are spread by user id over the databases
+# in `SCHEDULER_SHARDS`, the first of which must be 'default'. Setting
+# `LIFESCHEME_SCHEDULER_SHARDS` to N > 1 adds N - 1 SQLite shards. Each shard
+# is migrated with `migrate --database <alias>` and the users whose shard
+# changed are moved with the 'rebalance_shards' command. The scheduler data is
+# not read from the replica while it is sharded. See `scheduler.sharding`.
+SCHEDULER_SHARDS = ['default']
+for index in range(1, int(os.environ.get('LIFESCHEME_SCHEDULER_SHARDS', 1))):
+    SCHEDULER_SHARDS.append(f'shard{index}')
+    DATABASES[f'shard{index}'] = {
+        'ENGINE': 'lifescheme.sqlite3',
+        'NAME': BASE_DIR / f'db.shard{index}.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+    }
+
+# Day-schedules older than this many days are compacted into the archive by
+# the 'archive_schedules' command. See `scheduler.archive`.
+SCHEDULE_ARCHIVE_AFTER_DAYS = 7
+
+DATABASE_ROUTERS = [
+    'scheduler.sharding.ShardRouter',
+    'lifescheme.replicas.ReplicaRouter',
+]
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'lifescheme.servertiming.LocMemCache',
+    },
+    # Sessions read in the 'cached_db' session mode. The cache is shared by
+    # the workers of a host only, see the sessions settings below.
+    'sessions': {
+        'BACKEND': 'lifescheme.servertiming.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'LIFESCHEME_SESSION_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'lifescheme_sessions'),
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Pages served to anonymous visitors. See `lifescheme.pagecache`.
+    'pages': {
+        'BACKEND': 'lifescheme.servertiming.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # This cache must be shared by all workers. See `accounts.throttling`.
+    'throttle': {
+        'BACKEND': 'lifescheme.servertiming.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'LIFESCHEME_THROTTLE_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'lifescheme_throttle'),
+        ),
+    },
+}
+
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 10 * 60  # time in secs
+
+# Sessions
+# https://docs.djangoproject.com/en/3.1/topics/http/sessions/
+
+# 'db', the default, reads the session from the database on each request and
+# a session deleted on sign out is gone for every worker of every host at
+# once. 'cached_db' reads sessions from the 'sessions' cache first, which
+# saves that query, but a session deleted on sign out is only removed from the
+# cache of the host that served the sign out. Other hosts, e.g. the other
+# dynos on Heroku, keep it valid until it expires from their cache, so it is
+# only safe when a single host serves the site. 'signed_cookies' keeps
+# sessions in signed cookies and never reads the database, but a signed out
+# session cookie stays valid until it expires if it was copied. Expired
+# database sessions are deleted by the `purge_sessions` management command.
+SESSION_MODE = os.environ.get('LIFESCHEME_SESSION_MODE', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+
+# Authentication
+# https://docs.djangoproject.com/en/3.1/topics/auth/customizing/
+
+# `ModelBackend` only loads the users of sessions created before
+# `ProfileModelBackend` was added since the latter stops authentication from
+# reaching it.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -108,6 +308,23 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hashes are computed in a bounded process pool so that hashing does not
+# stall the other threads of a worker. See `accounts.hashers`.
+# `PBKDF2PasswordHasher` is not listed since the pooled hasher handles the
+# same algorithm and Django picks the last hasher listed for an algorithm.
+PASSWORD_HASHERS = [
+    'accounts.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+# Setting the number of workers to 0 disables the pool.
+PASSWORD_HASHING_POOL_WORKERS = int(os.environ.get('LIFESCHEME_PASSWORD_HASHING_POOL_WORKERS', 2))
+# The maximum number of hashes waiting for a pool worker and the time, in
+# seconds, a request waits for a free slot before hashing inline.
+PASSWORD_HASHING_POOL_MAX_PENDING = 8
+PASSWORD_HASHING_POOL_TIMEOUT = 5
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.1/topics/i18n/
@@ -122,15 +339,53 @@ USE_L10N = False
 
 USE_TZ = True
 
+# The library providing the tzinfo objects of user timezones, either 'pytz' or
+# 'zoneinfo' (Python 3.9+). See `accounts.timezones`.
+TIMEZONE_BACKEND = os.environ.get('LIFESCHEME_TIMEZONE_BACKEND', 'pytz')
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
+# The output of `npm run build` in `frontend`. Its static files are collected
+# under 'scheduler/' and the homepage includes the entry points listed in its
+# asset manifest. See `scheduler.templatetags.frontend`.
+FRONTEND_BUILD_DIR = os.path.join(BASE_DIR, 'frontend', 'build')
+
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'assets'),
 ]
+if os.path.isdir(os.path.join(FRONTEND_BUILD_DIR, 'static')):
+    STATICFILES_DIRS.append(('scheduler', os.path.join(FRONTEND_BUILD_DIR, 'static')))
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATIC_URL = '/static/'
+# `collectstatic` adds a hash of their content to the names of the files and
+# writes gzip and brotli compressed copies next to them. WhiteNoise serves the
+# files with hashed names with far-future immutable cache headers. Templates
+# must reference static files with the `static` tag so that the hashed names
+# are used, which the 'scheduler' checks verify. `django_heroku` sets the
+# same storage.
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Sign-in attempts are throttled per client IP address and per username and
+# client IP address with token buckets of (capacity, seconds to refill the
+# capacity).
+LOGIN_THROTTLE_CACHE = 'throttle'
+LOGIN_THROTTLE_IP_BUCKET = (20, 60)
+LOGIN_THROTTLE_USERNAME_BUCKET = (5, 60)
+# The Heroku router appends the client IP address to 'X-Forwarded-For'.
+LOGIN_THROTTLE_TRUST_X_FORWARDED_FOR = not DEBUG
+
+# API requests under this prefix may be authenticated with a short-lived
+# token instead of the session. See `accounts.tokens`.
+API_TOKEN_PATH_PREFIX = API_PATH_PREFIX
+API_TOKEN_MAX_AGE = 15 * 60  # time in secs
+
+# Staff users may have their requests profiled with a token from the
+# 'profiling_token' command. See `accounts.profiling`.
+PROFILING_TOKEN_MAX_AGE = 60 * 60  # time in secs
+# The number of functions or allocation sites kept in a profile report.
+PROFILING_TOP_COUNT = 40
 
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -147,4 +402,4 @@ EMAIL_TIMEOUT = 60  # time in secs
 EMAIL_HOST_USER = DEFAULT_FROM_MAIL
 EMAIL_HOST_PASSWORD = os.environ.get('LIFESCHEME_EMAIL_HOST_PASSWORD')
 
-django_heroku.settings(locals())
+django_heroku.settings(locals(), test_runner=False)
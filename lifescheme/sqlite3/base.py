@@ -0,0 +1,44 @@
+"""A SQLite database backend tuned for concurrent requests.
+
+It accepts two options in addition to those of Django's SQLite backend:
+
+    - 'pragmas': a `dict` of the PRAGMA statements run on every new
+      connection, e.g. {'journal_mode': 'WAL', 'busy_timeout': 5000}.
+    - 'transaction_mode': 'DEFERRED', the default, 'IMMEDIATE' or
+      'EXCLUSIVE'. The mode in which transactions begin.
+
+Without them, it behaves as Django's SQLite backend.
+
+Notes:
+    In WAL mode readers do not block the writer and vice versa, but a
+    transaction that reads and then writes, e.g. `get_or_create`, fails at
+    once with "database is locked" if another connection wrote in between.
+    SQLite cannot wait for the lock in that case since the data the
+    transaction read is stale. Beginning transactions in 'IMMEDIATE' mode
+    takes the write lock up front, so such transactions wait for it for
+    up to 'busy_timeout' milliseconds instead.
+"""
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # These are not `sqlite3.connect` arguments.
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.transaction_mode = kwargs.pop('transaction_mode', 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(f"'transaction_mode' must be one of {TRANSACTION_MODES}.")
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
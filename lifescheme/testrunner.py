@@ -0,0 +1,56 @@
+"""The test runner of the project.
+
+The file-based caches and `METRICS_DIR` default to directories of the system
+temporary directory that a server running on the same host also uses. Tests
+run with them in a directory of their own, removed afterwards, so that
+clearing a cache or counting a request in a test does not touch the data of
+the server.
+
+On Heroku CI, where the `CI` environment variable is set, the runner of
+`django_heroku` is extended instead, which runs the tests in the database
+that Heroku CI provides.
+"""
+import copy
+import os
+import shutil
+import tempfile
+
+import django_heroku
+from django import conf, test
+from django.test import runner
+
+
+# The caches whose 'LOCATION' is a directory.
+FILE_BASED_CACHES = ('sessions', 'throttle')
+
+
+class TemporaryDirectoriesMixin:
+    """Runs the tests with the file-based caches and `METRICS_DIR` in a
+    temporary directory."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.directory = tempfile.mkdtemp(prefix='lifescheme_tests_')
+        caches = copy.deepcopy(conf.settings.CACHES)
+        for alias in FILE_BASED_CACHES:
+            caches[alias]['LOCATION'] = os.path.join(self.directory, alias)
+        self.settings_override = test.override_settings(
+            CACHES=caches,
+            METRICS_DIR=os.path.join(self.directory, 'metrics'),
+        )
+        self.settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings_override.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+
+class DiscoverRunner(TemporaryDirectoriesMixin, runner.DiscoverRunner):
+    pass
+
+
+class HerokuDiscoverRunner(
+    TemporaryDirectoriesMixin, django_heroku.HerokuDiscoverRunner,
+):
+    pass
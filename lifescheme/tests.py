@@ -0,0 +1,561 @@
+import datetime
+import io
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from unittest import mock
+
+from django import conf, db, http, test, urls
+from django.contrib.auth import models as auth_models
+from django.core import cache as dj_cache, handlers as dj_handlers, management
+
+from accounts import models as acc_models
+from lifescheme import (
+    handlers,
+    importtiming,
+    metrics,
+    pagecache,
+    querybudgets,
+    queryplans,
+    replicas,
+    servertiming,
+    testrunner,
+    warmup,
+)
+from lifescheme.sqlite3 import base as sqlite3_base
+from scheduler import models as scheduler_models
+
+
+def call_wsgi(application, request):
+    """Calls a WSGI application with the environ of the given request and
+    returns the status line, headers and body."""
+    result = {}
+
+    def start_response(status, headers, exc_info=None):
+        result['status'], result['headers'] = status, dict(headers)
+    body = b''.join(application(request.environ, start_response))
+    return result['status'], result['headers'], body
+
+
+class MiddlewareStackHandlerTest(test.TestCase):
+    """Tests `handlers.MiddlewareStackHandler` and `handlers.PathDispatcher`.
+
+    Test cases:
+        - API requests are served through the API middleware only.
+        - requests are dispatched by path prefix.
+        - the time spent in each middleware is recorded.
+    """
+    def setUp(self):
+        super().setUp()
+        user = auth_models.User.objects.create(username='Testuser')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        user.dayschedules.current_schedule.tasks.create(
+            start_time=datetime.time(7),
+            end_time=datetime.time(8),
+            task_desc='Test task',
+        )
+        self.client.force_login(user)
+        self.factory = test.RequestFactory()
+        self.factory.cookies = self.client.cookies
+
+    def test_api_middleware(self):
+        handler = handlers.MiddlewareStackHandler(conf.settings.API_MIDDLEWARE)
+        status, headers, body = call_wsgi(handler, self.factory.get('/api/tasks'))
+        self.assertEqual(status, '200 OK')
+        self.assertIn(b'Test task', body)
+        # `XFrameOptionsMiddleware` is not part of the API middleware.
+        self.assertNotIn('X-Frame-Options', headers)
+
+    def test_path_dispatcher(self):
+        api_handler = handlers.MiddlewareStackHandler(conf.settings.API_MIDDLEWARE)
+        dispatcher = handlers.PathDispatcher(dj_handlers.wsgi.WSGIHandler(), [('/api/', api_handler)])
+        _, api_headers, _ = call_wsgi(dispatcher, self.factory.get('/api/tasks'))
+        _, page_headers, _ = call_wsgi(dispatcher, self.factory.get('/'))
+        self.assertNotIn('X-Frame-Options', api_headers)
+        self.assertIn('X-Frame-Options', page_headers)
+
+    def test_timings(self):
+        timings = handlers.MiddlewareTimings()
+        handler = handlers.MiddlewareStackHandler(conf.settings.API_MIDDLEWARE, timings=timings)
+        call_wsgi(handler, self.factory.get('/api/tasks'))
+        report = timings.report()
+        self.assertEqual([name for name, _, _ in report], conf.settings.API_MIDDLEWARE + ['view'])
+        for _, calls, milliseconds in report:
+            self.assertEqual(calls, 1)
+            self.assertGreaterEqual(milliseconds, 0)
+
+
+class WarmUpTest(test.SimpleTestCase):
+    """Tests `warmup.warm_up`.
+
+    Test cases:
+        - every URLconf, template and password validator is loaded.
+    """
+    def test_warm_up(self):
+        with mock.patch('gc.freeze') as freeze:
+            summary = warmup.warm_up(freeze=False)
+        freeze.assert_not_called()
+        self.assertGreater(summary['urls'], 0)
+        self.assertEqual(summary['password_validators'], len(conf.settings.AUTH_PASSWORD_VALIDATORS))
+        templates = warmup.compile_templates()
+        self.assertEqual(summary['templates'], len(templates))
+        for name in ('scheduler/homepage.html', 'accounts/user_signup.html', 'lifescheme/html/base_template.html'):
+            self.assertIn(name, templates)
+
+
+class ImportTimingTest(test.SimpleTestCase):
+    """Tests `importtiming.TimingFinder` and the `profile_imports` command.
+
+    Test cases:
+        - the self and cumulative import time of each module is recorded.
+        - the command fails if the startup time exceeds the budget.
+    """
+    def test_timing_finder(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'timed_outer.py'), 'w') as file:
+                file.write('import time, timed_inner\ntime.sleep(0.01)\n')
+            with open(os.path.join(directory, 'timed_inner.py'), 'w') as file:
+                file.write('import time\ntime.sleep(0.02)\n')
+            sys.path.insert(0, directory)
+            finder = importtiming.TimingFinder()
+            finder.install()
+            try:
+                import timed_outer  # noqa: F401
+            finally:
+                finder.uninstall()
+                sys.path.remove(directory)
+                sys.modules.pop('timed_outer', None)
+                sys.modules.pop('timed_inner', None)
+        outer_self, outer_cumulative = finder.timings['timed_outer']
+        inner_self, inner_cumulative = finder.timings['timed_inner']
+        self.assertGreaterEqual(inner_self, 0.02)
+        self.assertGreaterEqual(outer_self, 0.01)
+        self.assertLess(outer_self, 0.02)
+        self.assertGreaterEqual(outer_cumulative, outer_self + inner_cumulative)
+
+    def test_profile_imports_budget(self):
+        stdout = io.StringIO()
+        with self.assertRaisesMessage(management.CommandError, 'exceeds the budget'):
+            management.call_command('profile_imports', budget=0, stdout=stdout)
+        self.assertIn('accounts.models', stdout.getvalue())
+
+
+class PageCacheTest(test.TestCase):
+    """Tests `pagecache.cache_anonymous_page`.
+
+    Test cases:
+        - anonymous GET requests are served from the cache.
+        - each visitor gets its own valid CSRF token from a cached page.
+        - visitors with a session bypass the cache.
+        - hits, misses and bypasses are counted in the metrics.
+    """
+    def setUp(self):
+        dj_cache.caches[conf.settings.PAGE_CACHE_ALIAS].clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = test.override_settings(METRICS_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_anonymous_get_is_cached(self):
+        first = self.client.get(urls.reverse('scheduler:homepage'))
+        second = self.client.get(urls.reverse('scheduler:homepage'))
+        self.assertEqual(first[pagecache.STATUS_HEADER], 'MISS')
+        self.assertEqual(second[pagecache.STATUS_HEADER], 'HIT')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['Content-Type'], second['Content-Type'])
+
+    def test_csrf_token_per_visitor(self):
+        url = urls.reverse('accounts:user-signup')
+        self.client.get(url)
+        for _ in range(2):
+            client = test.Client(enforce_csrf_checks=True)
+            response = client.get(url)
+            self.assertEqual(response[pagecache.STATUS_HEADER], 'HIT')
+            self.assertNotIn(pagecache.CSRF_TOKEN_PLACEHOLDER, response.content)
+            token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1)
+            self.assertIn(conf.settings.CSRF_COOKIE_NAME, response.cookies)
+            # A POST with the token passes the CSRF check and is handled by
+            # the view, which rejects the empty form.
+            response = client.post(url, {'csrfmiddlewaretoken': token.decode()})
+            self.assertEqual(response.status_code, 200)
+
+    def test_session_bypasses_cache(self):
+        self.client.get(urls.reverse('scheduler:homepage'))
+        user = auth_models.User.objects.create(username='user')
+        acc_models.UserProfile.objects.create(user=user, timezone='Africa/Nairobi')
+        self.client.force_login(user)
+        response = self.client.get(urls.reverse('scheduler:homepage'))
+        self.assertNotIn(pagecache.STATUS_HEADER, response)
+        self.assertTemplateUsed(response, 'scheduler/homepage.html')
+
+    def test_stats(self):
+        url = urls.reverse('accounts:user-signin')
+        for _ in range(4):
+            self.client.get(url)
+        self.client.post(url)
+        self.client.get(url, HTTP_COOKIE=f'{conf.settings.SESSION_COOKIE_NAME}=session')
+        values = metrics.REGISTRY.collect()
+        self.assertEqual(
+            [values.get(f'lifescheme_page_cache_requests_total{{page="accounts:user-signin",result="{result}"}}')
+             for result in ('hit', 'miss', 'bypass')],
+            [3, 1, 1],
+        )
+        self.assertIn(
+            'lifescheme_page_cache_requests_total{page="accounts:user-signin",result="hit"} 3.0',
+            metrics.generate_text(),
+        )
+
+
+class TestRunnerTest(test.SimpleTestCase):
+    """Tests `testrunner.DiscoverRunner`.
+
+    Test cases:
+        - the file-based caches and `METRICS_DIR` are in a temporary directory
+          of the tests.
+    """
+    def test_temporary_directories(self):
+        settings = conf.settings
+        directories = [settings.CACHES[alias]['LOCATION'] for alias in testrunner.FILE_BASED_CACHES]
+        directories.append(settings.METRICS_DIR)
+        for directory in directories:
+            self.assertTrue(os.path.basename(os.path.dirname(directory)).startswith('lifescheme_tests_'), directory)
+
+
+class SQLiteBackendTest(test.SimpleTestCase):
+    """Tests the `lifescheme.sqlite3` database backend.
+
+    Test cases:
+        - the pragmas are run on every new connection.
+        - transactions begin in the configured mode.
+        - an unknown transaction mode is rejected.
+    """
+    def make_connection(self, path, options):
+        settings_dict = dict(conf.settings.DATABASES['default'], NAME=path, OPTIONS=options)
+        return sqlite3_base.DatabaseWrapper(settings_dict, alias='sqlite-backend-test')
+
+    def test_tuned_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            connection = self.make_connection(path, conf.settings.SQLITE_TUNED_OPTIONS)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+                # The write lock is taken when the transaction begins, before
+                # anything is written.
+                connection.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+                other = sqlite3.connect(path, timeout=0)
+                with self.assertRaisesMessage(sqlite3.OperationalError, 'database is locked'):
+                    other.execute('BEGIN IMMEDIATE')
+                other.close()
+                connection.rollback()
+            finally:
+                connection.close()
+
+    def test_default_connection(self):
+        with tempfile.TemporaryDirectory() as directory:
+            connection = self.make_connection(os.path.join(directory, 'db.sqlite3'), {})
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'delete')
+            finally:
+                connection.close()
+
+    def test_unknown_transaction_mode(self):
+        connection = self.make_connection(':memory:', {'transaction_mode': 'invalid'})
+        with self.assertRaises(ValueError):
+            connection.get_connection_params()
+
+
+class ReplicaRoutingTest(test.TestCase):
+    """Tests `replicas.ReplicaRouter` and `replicas.ReplicaMiddleware`.
+
+    Test cases:
+        - reads of read-only views go to the replica, writes to the primary.
+        - reads of other views go to the primary.
+        - reads of clients pinned to the primary go to the primary.
+        - requests that write pin the client, requests that only read do not.
+    """
+    def setUp(self):
+        user = auth_models.User.objects.create(username='Testuser')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        # The schedule of the day is created here rather than by a request.
+        user.dayschedules.current_schedule
+        self.client.force_login(user)
+        self.factory = test.RequestFactory()
+
+    def route(self, request, read_only=True):
+        """Calls a view through the middleware and returns the databases a
+        read and a write of a task, and a read of a user, go to from it."""
+        routes = {}
+
+        def view(request):
+            routes['read'] = scheduler_models.Task.objects.all().db
+            routes['write'] = db.router.db_for_write(scheduler_models.Task)
+            routes['user'] = auth_models.User.objects.all().db
+            return http.HttpResponse()
+        if read_only:
+            view = replicas.read_from_replica(view)
+        with mock.patch.object(replicas, 'get_replica', return_value='replica'):
+            replicas.ReplicaMiddleware(view)(request)
+        return routes
+
+    def test_read_only_view(self):
+        routes = self.route(self.factory.get('/'))
+        self.assertEqual(routes, {'read': 'replica', 'write': 'default', 'user': 'default'})
+
+    def test_other_view(self):
+        routes = self.route(self.factory.get('/'), read_only=False)
+        self.assertEqual(routes['read'], 'default')
+
+    def test_pinned_client(self):
+        request = self.factory.get('/')
+        request.COOKIES[replicas.PIN_COOKIE_NAME] = '1'
+        self.assertEqual(self.route(request)['read'], 'default')
+
+    def test_write_pins_client(self):
+        response = self.client.get(urls.reverse('scheduler:api-tasks'), secure=True)
+        self.assertNotIn(replicas.PIN_COOKIE_NAME, response.cookies)
+        response = self.client.post(
+            urls.reverse('scheduler:api-task-create'),
+            {'start_time': '07:00', 'end_time': '08:00', 'task_desc': 'Test task'},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        cookie = response.cookies[replicas.PIN_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], conf.settings.REPLICA_STICKY_SECONDS)
+
+
+class QueryPlansTest(test.TestCase):
+    """Tests `queryplans` module.
+
+    Test cases:
+        - full scans, temporary B-trees and automatic indexes are flagged.
+        - index lookups and scans of constant rows are not flagged.
+        - statements are captured with their parameters and explained.
+    """
+    def test_sqlite_issues(self):
+        plan = [
+            'SCAN auth_user',
+            'SCAN TABLE scheduler_task',
+            'SEARCH scheduler_task USING INDEX scheduler_task_schedule_id (schedule_id=?)',
+            'USE TEMP B-TREE FOR ORDER BY',
+            'SEARCH t USING AUTOMATIC COVERING INDEX (a=?)',
+            'SCAN CONSTANT ROW',
+        ]
+        self.assertEqual(queryplans.find_issues('sqlite', plan), [
+            (queryplans.FULL_SCAN, 'SCAN auth_user'),
+            (queryplans.FULL_SCAN, 'SCAN TABLE scheduler_task'),
+            (queryplans.TEMP_B_TREE, 'USE TEMP B-TREE FOR ORDER BY'),
+            (queryplans.MISSING_INDEX, 'SEARCH t USING AUTOMATIC COVERING INDEX (a=?)'),
+        ])
+
+    def test_postgresql_issues(self):
+        plan = [
+            'Index Scan using auth_user_pkey on auth_user  (cost=0.29..8.30 rows=1 width=140)',
+            'Seq Scan on scheduler_task  (cost=0.00..35.50 rows=2550 width=4)',
+        ]
+        self.assertEqual(queryplans.find_issues('postgresql', plan), [(queryplans.FULL_SCAN, plan[1])])
+
+    def test_explain(self):
+        with queryplans.capture_statements() as statements:
+            auth_models.User.objects.filter(email='test@example.com').exists()
+            auth_models.User.objects.filter(pk=1).exists()
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(statements[0].params, ('test@example.com',))
+        self.assertTrue(queryplans.is_explainable(statements[0].sql))
+        self.assertFalse(queryplans.is_explainable('PRAGMA foreign_keys'))
+        issues = queryplans.find_issues('sqlite', queryplans.explain(statements[0]))
+        self.assertEqual([issue for issue, line in issues], [queryplans.FULL_SCAN])
+        self.assertEqual(queryplans.find_issues('sqlite', queryplans.explain(statements[1])), [])
+
+
+class QueryBudgetTest(querybudgets.QueryBudgetTestMixin, test.TestCase):
+    """Tests `querybudgets` module.
+
+    Test cases:
+        - requests within the budget of their view pass.
+        - requests over the query count or time budget fail with their SQL.
+        - views without a budget fail.
+    """
+    def setUp(self):
+        user = auth_models.User.objects.create(username='Testuser')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        self.client.force_login(user)
+        self.path = urls.reverse('scheduler:api-tasks')
+        self.view_class = urls.resolve(self.path).func.view_class
+
+    def test_within_budget(self):
+        response = self.assertWithinBudget('get', self.path, secure=True)
+        self.assertEqual(response.status_code, 200)
+
+    def test_over_budget(self):
+        with mock.patch.object(self.view_class, 'query_budget', querybudgets.Budget(queries=1, time=25)):
+            with self.assertRaisesRegex(AssertionError, r'3 queries, over the budget of 1:\n1\. \[default, '):
+                self.assertWithinBudget('get', self.path, secure=True)
+        with mock.patch.object(self.view_class, 'query_budget', querybudgets.Budget(queries=2, time=0)):
+            with self.assertRaisesRegex(AssertionError, r'(?s)ms of queries, over the budget of 0ms:\n.*"scheduler_task"'):
+                self.assertWithinBudget('get', self.path, secure=True)
+
+    def test_no_budget(self):
+        with self.assertRaisesRegex(AssertionError, 'has no query budget'):
+            self.assertWithinBudget('get', urls.reverse('accounts:user-signin'), secure=True)
+
+
+class ServerTimingTest(test.TestCase):
+    """Tests `servertiming` module.
+
+    Test cases:
+        - responses have a Server-Timing header of the request metrics.
+        - SQL, cache hits and misses and template rendering are measured.
+        - slow requests are logged with their metrics.
+        - the header can be turned off.
+    """
+    def setUp(self):
+        user = auth_models.User.objects.create(username='Testuser')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        self.client.force_login(user)
+
+    def test_header(self):
+        response = self.client.get(urls.reverse('scheduler:homepage'), secure=True)
+        header = response[servertiming.HEADER]
+        self.assertRegex(header, r'^total;dur=[\d.]+, sql;dur=[\d.]+;desc="3 queries", tpl;dur=[\d.]+, cache;desc="0 hits, 0 misses"$')
+        self.assertGreater(float(re.search(r'tpl;dur=([\d.]+)', header)[1]), 0)
+
+    def test_metrics(self):
+        cache = servertiming.LocMemCache('servertiming-test', {})
+        cache.set('cached', None)
+        served = []
+
+        def view(request):
+            served.append(servertiming.get_metrics())
+            self.assertEqual(cache.get('missing', 'default'), 'default')
+            self.assertIsNone(cache.get('cached', 'default'))
+            auth_models.User.objects.count()
+            return http.HttpResponse()
+        response = servertiming.ServerTimingMiddleware(view)(test.RequestFactory().get('/'))
+        metrics = served[0]
+        self.assertEqual((metrics.sql_count, metrics.cache_hits, metrics.cache_misses), (1, 1, 1))
+        self.assertEqual(response[servertiming.HEADER], metrics.as_header())
+        # Nothing is recorded outside of requests.
+        self.assertIsNone(servertiming.get_metrics())
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(metrics.cache_misses, 1)
+
+    @test.override_settings(SLOW_REQUEST_THRESHOLD=0)
+    def test_slow_request(self):
+        with self.assertLogs('lifescheme.servertiming', 'WARNING') as logs:
+            self.client.get(urls.reverse('scheduler:api-tasks'), secure=True)
+        self.assertRegex(logs.output[0], r'slow request method=GET path=/api/tasks status=200 duration_ms=[\d.]+ sql_count=3 ')
+        self.assertEqual(logs.records[0].request_metrics['sql_count'], 3)
+
+    @test.override_settings(SERVER_TIMING_HEADER=False)
+    def test_no_header(self):
+        response = self.client.get(urls.reverse('scheduler:api-tasks'), secure=True)
+        self.assertNotIn(servertiming.HEADER, response)
+
+
+def increment_request_count():
+    """Counts a request to `TasksView` in a forked process."""
+    metrics.REQUESTS.inc(view='TasksView', method='GET', status=200)
+
+
+class MetricsTest(test.TestCase):
+    """Tests `metrics` module.
+
+    Test cases:
+        - values are kept in a file that grows as keys are added.
+        - the values of several processes are summed.
+        - requests, server errors and latencies are recorded per view class.
+        - every bucket of a histogram is exposed from its first value on.
+        - the metrics are only served to staff users and with the token.
+    """
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = test.override_settings(METRICS_DIR=self.directory, METRICS_TOKEN='metrics-token')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_file(self):
+        path = os.path.join(self.directory, 'values.db')
+        values = metrics.MmapValues(path)
+        for index in range(5000):
+            values.increment(f'sample{{index="{index}"}}', index)
+        values.increment('sample{index="1"}', 0.5)
+        values.close()
+        read_values = metrics.read_file(path)
+        self.assertEqual(len(read_values), 5000)
+        self.assertEqual(read_values['sample{index="1"}'], 1.5)
+        self.assertEqual(read_values['sample{index="4999"}'], 4999)
+        self.assertEqual(metrics.MmapValues(path)._positions.keys(), read_values.keys())
+
+    def test_processes(self):
+        increment_request_count()
+        process = multiprocessing.get_context('fork').Process(target=increment_request_count)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        key = 'lifescheme_requests_total{view="TasksView",method="GET",status="200"}'
+        self.assertEqual(metrics.REGISTRY.collect()[key], 2)
+
+    def test_middleware(self):
+        user = auth_models.User.objects.create(username='Testuser')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        self.client.force_login(user)
+        self.client.get(urls.reverse('scheduler:api-tasks'), secure=True)
+        self.client.get(urls.reverse('accounts:user-signin'), secure=True)
+        middleware = metrics.MetricsMiddleware(lambda request: http.HttpResponseServerError())
+        request = test.RequestFactory().generic('PURGE', '/')
+        middleware.process_view(request, increment_request_count, (), {})
+        middleware(request)
+        values = metrics.REGISTRY.collect()
+        self.assertEqual(values['lifescheme_requests_total{view="TasksView",method="GET",status="200"}'], 1)
+        self.assertEqual(values['lifescheme_requests_total{view="UserSigninView",method="GET",status="200"}'], 1)
+        self.assertEqual(
+            values['lifescheme_requests_total{view="increment_request_count",method="other",status="500"}'], 1,
+        )
+        self.assertEqual(values['lifescheme_request_errors_total{view="increment_request_count"}'], 1)
+        self.assertNotIn('lifescheme_request_errors_total{view="TasksView"}', values)
+        self.assertEqual(values['lifescheme_request_duration_seconds_bucket{view="TasksView",le="+Inf"}'], 1)
+        self.assertEqual(values['lifescheme_request_duration_seconds_count{view="TasksView"}'], 1)
+        self.assertGreater(values['lifescheme_request_duration_seconds_sum{view="TasksView"}'], 0)
+
+    def test_histogram_buckets(self):
+        metrics.LATENCY.observe(20.0, view='TasksView')
+        lines = metrics.generate_text().splitlines()
+        buckets = [line for line in lines if line.startswith('lifescheme_request_duration_seconds_bucket')]
+        expected = [
+            f'lifescheme_request_duration_seconds_bucket{{view="TasksView",le="{metrics.format_bound(bound)}"}} 0.0'
+            for bound in metrics.LATENCY_BUCKETS
+        ]
+        expected.append('lifescheme_request_duration_seconds_bucket{view="TasksView",le="+Inf"} 1.0')
+        self.assertEqual(buckets, expected)
+
+    def test_endpoint(self):
+        increment_request_count()
+        path = urls.reverse('metrics')
+        self.assertEqual(self.client.get(path, secure=True).status_code, 403)
+        response = self.client.get(path, secure=True, HTTP_AUTHORIZATION='Bearer wrong-token')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(path, secure=True, HTTP_AUTHORIZATION='Bearer metrics-token')
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        lines = response.content.decode().splitlines()
+        self.assertEqual(lines[:3], [
+            '# HELP lifescheme_requests_total Requests served, by view class, method and status code.',
+            '# TYPE lifescheme_requests_total counter',
+            'lifescheme_requests_total{view="TasksView",method="GET",status="200"} 1.0',
+        ])
+        self.assertIn('# TYPE lifescheme_request_duration_seconds histogram', lines)
+        staff_user = auth_models.User.objects.create(username='Staffuser', is_staff=True)
+        self.client.force_login(staff_user)
+        self.assertEqual(self.client.get(path, secure=True).status_code, 200)
@@ -16,9 +16,12 @@ Including another URLconf
 from django.contrib import admin
 from django import urls
 
+from lifescheme import metrics
+
 
 urlpatterns = [
     urls.path('', urls.include('scheduler.urls')),
     urls.path('', urls.include('accounts.urls')),
     urls.path('admin/', admin.site.urls),
+    urls.path('metrics', metrics.metrics_view, name='metrics'),
 ]
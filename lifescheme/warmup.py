@@ -0,0 +1,112 @@
+"""Warms up a worker process before it serves its first request.
+
+Django imports views, compiles templates and loads password validators
+lazily, so the first requests a worker serves are slow and every worker
+builds its own copy of the same objects. When gunicorn preloads the
+application (see `gunicorn.conf.py`), `warm_up` runs once in the master
+process and the forked workers share the result copy-on-write.
+"""
+import gc
+import os
+
+from django import db, urls
+from django.contrib.auth import password_validation
+from django.template import engines
+from django.template.backends import django as django_backend
+
+
+# Only files with these extensions are compiled. Template directories may also
+# hold static files.
+TEMPLATE_EXTENSIONS = ('.html', '.txt')
+
+
+def warm_up(freeze=True):
+    """Warms up the current process.
+
+    Args:
+        freeze: A boolean telling whether to move all objects to the permanent
+            generation of the garbage collector once warmed up. The collector
+            then never touches them, so the memory pages holding them stay
+            shared with the forked workers.
+
+    Returns:
+        A `dict` with the number of URL patterns, templates and password
+        validators that were loaded.
+    """
+    summary = {
+        'urls': resolve_urlconfs(),
+        'templates': len(compile_templates()),
+        'password_validators': len(password_validation.get_default_password_validators()),
+    }
+    # Connections must not be shared between forked workers.
+    db.connections.close_all()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return summary
+
+
+def resolve_urlconfs():
+    """Imports the URLconfs and the views of the site.
+
+    Returns:
+        The number of URL patterns.
+    """
+    return _populate(urls.get_resolver())
+
+
+def _populate(resolver):
+    """Builds the reverse lookup tables of the given resolver and of those it
+    includes, and returns the number of URL patterns they hold."""
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, urls.URLResolver):
+            count += _populate(pattern)
+        else:
+            count += 1
+    return count
+
+
+def compile_templates():
+    """Compiles every template of the Django template engines.
+
+    The compiled templates are only kept if the engine uses the cached
+    template loader, which it does when `DEBUG` is False.
+
+    Returns:
+        A list of the names of the compiled templates.
+    """
+    names = []
+    for engine, name, _ in iter_templates():
+        engine.get_template(name)
+        names.append(name)
+    return names
+
+
+def iter_templates():
+    """Yields an (engine, template name, file path) tuple for every template
+    file the Django template engines can load."""
+    for engine in engines.all():
+        if not isinstance(engine, django_backend.DjangoTemplates):
+            continue
+        for template_dir in _iter_template_dirs(engine.engine.template_loaders):
+            for name in _iter_template_names(str(template_dir)):
+                yield engine, name, os.path.join(str(template_dir), name)
+
+
+def _iter_template_dirs(loaders):
+    for loader in loaders:
+        # The cached loader wraps the loaders that find the templates.
+        if hasattr(loader, 'loaders'):
+            yield from _iter_template_dirs(loader.loaders)
+        else:
+            yield from loader.get_dirs()
+
+
+def _iter_template_names(template_dir):
+    for dirpath, _, filenames in os.walk(template_dir):
+        for filename in filenames:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                path = os.path.relpath(os.path.join(dirpath, filename), template_dir)
+                yield path.replace(os.sep, '/')
@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/wsgi/
 
 import os
 
+from django import conf
 from django.core.wsgi import get_wsgi_application
 
+from lifescheme import handlers, warmup
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lifescheme.settings')
 
 application = get_wsgi_application()
+
+if conf.settings.API_MIDDLEWARE is not None:
+    application = handlers.PathDispatcher(application, [
+        (conf.settings.API_PATH_PREFIX, handlers.MiddlewareStackHandler(conf.settings.API_MIDDLEWARE)),
+    ])
+
+if conf.settings.WSGI_WARM_UP:
+    warmup.warm_up()
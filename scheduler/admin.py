@@ -1,7 +1,88 @@
+from django import forms
 from django.contrib import admin
+from django.core import exceptions
 
-from . import models as scheduler_models
+from . import models as scheduler_models, sharding
 
 
-admin.site.register(scheduler_models.UserDaySchedule)
-admin.site.register(scheduler_models.Task)
+class ShardListFilter(admin.SimpleListFilter):
+    """Lists the objects of one shard at a time, the first one by default."""
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in sharding.get_shards()]
+
+    def has_output(self):
+        return len(self.lookup_choices) > 1
+
+    def choices(self, changelist):
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': (self.value() or sharding.get_shards()[0]) == alias,
+                'query_string': changelist.get_query_string({self.parameter_name: alias}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        shard = self.value()
+        if shard not in sharding.get_shards():
+            shard = sharding.get_shards()[0]
+        return queryset.using(shard)
+
+
+class ShardedModelChoiceField(forms.ModelChoiceField):
+    """A `ModelChoiceField` of a sharded model that looks the chosen object
+    up on the shard its id belongs to."""
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            shard = sharding.shard_for_id(value)
+            if shard is None:
+                raise ValueError(f'{value} belongs to no shard.')
+            return self.queryset.using(shard).get(pk=value)
+        except (ValueError, TypeError, self.queryset.model.DoesNotExist):
+            raise exceptions.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """A `ModelAdmin` of a sharded model.
+
+    The change list shows one shard at a time and an object is looked up on
+    the shard its id belongs to.
+    """
+    list_filter = [ShardListFilter]
+
+    def get_object(self, request, object_id, from_field=None):
+        try:
+            shard = sharding.shard_for_id(object_id)
+        except ValueError:
+            return None
+        if shard is None:
+            return None
+        try:
+            return self.get_queryset(request).using(shard).get(pk=object_id)
+        except (self.model.DoesNotExist, exceptions.ValidationError, ValueError):
+            return None
+
+
+@admin.register(scheduler_models.UserDaySchedule)
+class UserDayScheduleAdmin(ShardedModelAdmin):
+    pass
+
+
+@admin.register(scheduler_models.ArchivedSchedule)
+class ArchivedScheduleAdmin(ShardedModelAdmin):
+    list_display = ['date', 'user']
+
+
+@admin.register(scheduler_models.Task)
+class TaskAdmin(ShardedModelAdmin):
+    # Schedules are chosen by id since they cannot be listed across shards.
+    raw_id_fields = ['schedule']
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'schedule':
+            kwargs['form_class'] = ShardedModelChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
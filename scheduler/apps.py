@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class SchedulerConfig(AppConfig):
     name = 'scheduler'
+
+    def ready(self):
+        # Registers the system checks.
+        from . import checks  # noqa: F401
+        from . import sharding
+        sharding.connect_signals(self)
@@ -0,0 +1,160 @@
+"""Cold storage of past day-schedules.
+
+The views only edit the current day-schedule, so the schedules of past days
+and their tasks never change. `archive_schedules` compacts each of them into a
+single `ArchivedSchedule` row of zlib-compressed JSON and deletes the original
+rows, which keeps the tasks table and its indexes to the days that are in use.
+`get_tasks` reads the tasks of any day from the live rows or, failing that,
+from the archive and `restore_schedules` turns archived schedules back into
+live rows.
+"""
+import datetime
+import json
+import zlib
+
+from django import conf, db
+from django.db import transaction
+
+from . import models as scheduler_models
+
+
+# The version of the format of the archived JSON.
+FORMAT_VERSION = 1
+
+
+def compress_schedule(schedule, tasks):
+    """Returns the archived data of the given schedule and tasks as bytes."""
+    data = {
+        'version': FORMAT_VERSION,
+        'id': schedule.id,
+        'tasks': [
+            {
+                'id': task.id,
+                'start_time': task.start_time.isoformat(),
+                'end_time': task.end_time.isoformat(),
+                'task_desc': task.task_desc,
+                'completed': task.completed,
+            }
+            for task in tasks
+        ],
+    }
+    return zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def decompress_schedule(archived_schedule):
+    """Returns a tuple of an unsaved `UserDaySchedule` and a list of unsaved
+    `Task` instances built from the given archived schedule.
+
+    The instances keep the ids they had before they were archived.
+    """
+    data = json.loads(zlib.decompress(bytes(archived_schedule.data)))
+    if data['version'] != FORMAT_VERSION:
+        raise ValueError(f"Archived schedules of version {data['version']} are not supported.")
+    schedule = scheduler_models.UserDaySchedule(
+        id=data['id'],
+        user_id=archived_schedule.user_id,
+        date=archived_schedule.date,
+    )
+    tasks = [
+        scheduler_models.Task(
+            id=task['id'],
+            schedule=schedule,
+            date=schedule.date,
+            start_time=datetime.time.fromisoformat(task['start_time']),
+            end_time=datetime.time.fromisoformat(task['end_time']),
+            task_desc=task['task_desc'],
+            completed=task['completed'],
+        )
+        for task in data['tasks']
+    ]
+    return schedule, tasks
+
+
+def archive_schedules(before, using=db.DEFAULT_DB_ALIAS, batch_size=500):
+    """Archives the day-schedules dated before the given date on the given
+    database and deletes them with their tasks.
+
+    The schedules are archived in batches of `batch_size`, each in its own
+    transaction, so that the database is never locked for long.
+
+    Returns:
+        A tuple of the numbers of schedules and tasks archived.
+    """
+    schedule_count = task_count = 0
+    schedules = (
+        scheduler_models.UserDaySchedule.objects.using(using)
+        .filter(date__lt=before)
+        .order_by('pk')
+        .prefetch_related('tasks')
+    )
+    while True:
+        with transaction.atomic(using=using):
+            batch = list(schedules[:batch_size])
+            if not batch:
+                break
+            scheduler_models.ArchivedSchedule.objects.using(using).bulk_create([
+                scheduler_models.ArchivedSchedule(
+                    user_id=schedule.user_id,
+                    date=schedule.date,
+                    data=compress_schedule(schedule, schedule.tasks.all()),
+                )
+                for schedule in batch
+            ])
+            schedule_ids = [schedule.id for schedule in batch]
+            task_count += scheduler_models.Task.objects.using(using).filter(schedule_id__in=schedule_ids).delete()[0]
+            scheduler_models.UserDaySchedule.objects.using(using).filter(id__in=schedule_ids).delete()
+            schedule_count += len(batch)
+    return schedule_count, task_count
+
+
+def restore_schedules(archived_schedules):
+    """Restores the given archived schedules as live rows and deletes them
+    from the archive.
+
+    Archived schedules whose date already has a live schedule are skipped.
+
+    Returns:
+        A list of the restored `UserDaySchedule` instances.
+    """
+    restored = []
+    for archived_schedule in archived_schedules:
+        using = archived_schedule._state.db
+        with transaction.atomic(using=using):
+            live_schedules = scheduler_models.UserDaySchedule.objects.using(using)
+            if live_schedules.filter(user_id=archived_schedule.user_id, date=archived_schedule.date).exists():
+                continue
+            schedule, tasks = decompress_schedule(archived_schedule)
+            schedule.save(using=using, force_insert=True)
+            scheduler_models.Task.objects.using(using).bulk_create(tasks)
+            archived_schedule.delete()
+        restored.append(schedule)
+    return restored
+
+
+def get_tasks(user, date):
+    """Returns a list of the tasks of the given user on the given date, read
+    from the archive if the schedule of the date has been archived.
+
+    The tasks read from the archive are unsaved `Task` instances. The live
+    tasks are read in a single query, without fetching their schedule first,
+    so the archive is only queried for days without live tasks.
+    """
+    # Routed like the schedules of the user. See `current_tasks`.
+    using = db.router.db_for_read(scheduler_models.UserDaySchedule, instance=user)
+    tasks = list(scheduler_models.Task.objects.db_manager(using).filter(schedule__user=user, date=date))
+    if tasks:
+        return tasks
+    archived_schedule = user.archivedschedules.filter(date=date).first()
+    if archived_schedule is None:
+        return []
+    return decompress_schedule(archived_schedule)[1]
+
+
+def get_archive_cutoff(days=None, today=None):
+    """Returns the date before which schedules are archived, which leaves
+    `days`, `SCHEDULE_ARCHIVE_AFTER_DAYS` by default, days of schedules
+    live."""
+    if days is None:
+        days = conf.settings.SCHEDULE_ARCHIVE_AFTER_DAYS
+    today = today or datetime.date.today()
+    return today - datetime.timedelta(days=days)
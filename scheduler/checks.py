@@ -0,0 +1,49 @@
+import re
+
+from django import conf
+from django.contrib.staticfiles import finders
+from django.core import checks
+
+from lifescheme import warmup
+from .templatetags import frontend
+
+
+STATIC_TAG_PATTERN = re.compile(r"""{%\s*static\s+(['"])(?P<name>[^'"]+)\1""")
+
+
+@checks.register(checks.Tags.staticfiles, checks.Tags.templates)
+def check_static_references(app_configs, **kwargs):
+    """Checks that templates reference static files only through the `static`
+    tag, so that their hashed names are used, and that the referenced files
+    and the frontend entry points exist.
+
+    A file that does not exist has no hashed name, which makes rendering the
+    template fail once the files are collected.
+    """
+    errors = []
+    static_url_pattern = re.compile(r"""(?:href|src)\s*=\s*['"]%s""" % re.escape(conf.settings.STATIC_URL))
+    for _, name, path in warmup.iter_templates():
+        with open(path, encoding='utf-8') as template_file:
+            source = template_file.read()
+        if static_url_pattern.search(source):
+            errors.append(checks.Error(
+                f"Template '{name}' references a static file by its URL.",
+                hint="Use the 'static' tag so that the hashed name is used.",
+                obj=path,
+                id='scheduler.E001',
+            ))
+        for match in STATIC_TAG_PATTERN.finditer(source):
+            if not finders.find(match.group('name')):
+                errors.append(checks.Error(
+                    f"Template '{name}' references the static file '{match.group('name')}' which does not exist.",
+                    obj=path,
+                    id='scheduler.E002',
+                ))
+    for static_name in frontend.get_entrypoints():
+        if not finders.find(static_name):
+            errors.append(checks.Error(
+                f"The frontend entry point '{static_name}' does not exist.",
+                hint='Build the frontend or update the committed asset manifest.',
+                id='scheduler.E003',
+            ))
+    return errors
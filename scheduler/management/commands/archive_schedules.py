@@ -0,0 +1,29 @@
+from django.core.management import base
+
+from scheduler import archive, sharding
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Compacts the day-schedules older than SCHEDULE_ARCHIVE_AFTER_DAYS '
+        'days into the archive and deletes them with their tasks, on every '
+        'shard. See scheduler.archive.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Archives the schedules older than this many days instead.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = archive.get_archive_cutoff()
+        if options['days'] is not None:
+            if options['days'] < 1:
+                raise base.CommandError('--days must be at least 1.')
+            cutoff = archive.get_archive_cutoff(days=options['days'])
+        for alias in sharding.get_shards():
+            schedule_count, task_count = archive.archive_schedules(cutoff, alias, options['batch_size'])
+            self.stdout.write(f'{alias}: {schedule_count} schedules and {task_count} tasks before {cutoff} archived')
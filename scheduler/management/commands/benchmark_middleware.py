@@ -0,0 +1,42 @@
+from django import conf, test
+from django.contrib.auth import models as auth_models
+from django.core.management import base
+
+from accounts import models as acc_models
+from lifescheme import benchmarking, handlers
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Times each middleware of the full and the API middleware stacks while '
+        'serving the tasks API. Runs against a throwaway test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with benchmarking.test_database():
+            self.run_benchmark(options['requests'])
+
+    def run_benchmark(self, count):
+        user = auth_models.User.objects.create(username='benchmark')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        client = test.Client()
+        client.force_login(user)
+        factory = test.RequestFactory()
+        factory.cookies = client.cookies
+
+        stacks = (('full', conf.settings.MIDDLEWARE), ('api', conf.settings.API_MIDDLEWARE))
+        for label, middleware in stacks:
+            timings = handlers.MiddlewareTimings()
+            handler = handlers.MiddlewareStackHandler(middleware, timings=timings)
+            for _ in range(count):
+                list(handler(factory.get('/api/tasks').environ, lambda status, headers: None))
+            self.stdout.write(f'{label} stack:')
+            middleware_total = 0.0
+            for name, _, milliseconds in timings.report():
+                self.stdout.write(f'  {name:<65} {milliseconds:.3f}ms')
+                if name != 'view':
+                    middleware_total += milliseconds
+            self.stdout.write(f'  {"middleware total":<65} {middleware_total:.3f}ms')
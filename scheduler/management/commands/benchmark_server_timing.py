@@ -0,0 +1,60 @@
+import datetime
+import statistics
+
+from django import conf, test
+from django.contrib.auth import models as auth_models
+from django.core.management import base
+
+from accounts import models as acc_models
+from lifescheme import benchmarking, handlers
+
+
+TIMING_MIDDLEWARE = 'lifescheme.servertiming.ServerTimingMiddleware'
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Times the tasks API and the homepage with and without the Server-Timing '
+        'middleware to measure its overhead. Runs against a throwaway test '
+        'database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with benchmarking.test_database():
+            self.run_benchmark(options['requests'])
+
+    def run_benchmark(self, count):
+        user = auth_models.User.objects.create(username='benchmark')
+        acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        schedule = user.dayschedules.current_schedule
+        for hour in range(7, 15):
+            schedule.tasks.create(start_time=datetime.time(hour), end_time=datetime.time(hour, 45), task_desc='Task')
+        client = test.Client()
+        client.force_login(user)
+        factory = test.RequestFactory()
+        factory.cookies = client.cookies
+
+        pages = (('/api/tasks', conf.settings.API_MIDDLEWARE), ('/', conf.settings.MIDDLEWARE))
+        for path, middleware in pages:
+            without_timing = [name for name in middleware if name != TIMING_MIDDLEWARE]
+            stacks = {
+                'with': handlers.MiddlewareStackHandler([TIMING_MIDDLEWARE] + without_timing),
+                'without': handlers.MiddlewareStackHandler(without_timing),
+            }
+            latencies = {label: [] for label in stacks}
+            environ = factory.get(path, secure=True).environ
+
+            def serve(handler):
+                list(handler(dict(environ), lambda status, headers: None))
+            # The stacks take turns so that both see the same conditions.
+            for _ in range(count):
+                for label, handler in stacks.items():
+                    latencies[label] += benchmarking.time_calls(lambda: serve(handler), 1)
+            self.stdout.write(f'{path}:')
+            for label in stacks:
+                self.stdout.write(f'  {label + " timing":<16} {benchmarking.summarize(latencies[label], "us")}')
+            overhead = statistics.median(latencies['with']) - statistics.median(latencies['without'])
+            self.stdout.write(f'  {"overhead":<16} {overhead * 1000:.1f}us per request (p50)')
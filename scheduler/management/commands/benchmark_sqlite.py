@@ -0,0 +1,104 @@
+import datetime
+import multiprocessing
+import os
+import tempfile
+import time
+
+import django
+from django import conf, db, shortcuts, test
+from django.core import management
+from django.core.management import base
+
+from lifescheme import benchmarking
+
+
+def use_database(path, options):
+    """Points the 'default' database of the current process at the given
+    SQLite file with the given options."""
+    db.connections.close_all()
+    db.connections['default'].settings_dict.update(NAME=path, OPTIONS=options)
+
+
+def drive_api(path, options, username, count):
+    """Sends `count` requests to the scheduler API as the given user,
+    alternating between toggling the status of a task and listing the tasks.
+
+    This function runs in a pool process.
+
+    Returns:
+        A tuple of the list of latencies in milliseconds and the number of
+        requests that failed.
+    """
+    django.setup()
+    use_database(path, options)
+    from django.contrib.auth import models as auth_models
+
+    client = test.Client()
+    user = auth_models.User.objects.get(username=username)
+    client.force_login(user)
+    task_id = user.dayschedules.current_schedule.tasks.get().id
+    requests = [
+        (shortcuts.reverse('scheduler:api-task-status-update'), {'task_id': task_id}),
+        (shortcuts.reverse('scheduler:api-tasks'), {}),
+    ]
+    latencies, failures = [], 0
+    for index in range(count):
+        url, data = requests[index % len(requests)]
+        start = time.perf_counter()
+        try:
+            response = client.post(url, data, secure=True)
+            failures += response.status_code != 200
+        except db.OperationalError:
+            failures += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, failures
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Drives the scheduler API from several processes sharing a SQLite '
+        'file, with the default and the tuned SQLite settings. Runs against '
+        'throwaway database files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=300, help='Requests per process.')
+
+    def handle(self, *args, **options):
+        modes = (('default', {}), ('tuned', conf.settings.SQLITE_TUNED_OPTIONS))
+        with tempfile.TemporaryDirectory() as directory:
+            for label, sqlite_options in modes:
+                path = os.path.join(directory, f'{label}.sqlite3')
+                self.setup_database(path, sqlite_options, options['processes'])
+                context = multiprocessing.get_context('spawn')
+                with context.Pool(options['processes']) as pool:
+                    start = time.perf_counter()
+                    results = pool.starmap(drive_api, [
+                        (path, sqlite_options, f'benchmark{index}', options['requests'])
+                        for index in range(options['processes'])
+                    ])
+                    seconds = time.perf_counter() - start
+                latencies = [latency for result in results for latency in result[0]]
+                failures = sum(result[1] for result in results)
+                self.stdout.write(
+                    f'{label:>7}: {len(latencies) / seconds:>7.0f} requests/s, '
+                    f'{failures} failed, {benchmarking.summarize(latencies)}'
+                )
+
+    @staticmethod
+    def setup_database(path, options, users):
+        from django.contrib.auth import models as auth_models
+        from accounts import models as acc_models
+
+        use_database(path, options)
+        management.call_command('migrate', verbosity=0)
+        for index in range(users):
+            user = auth_models.User.objects.create(username=f'benchmark{index}')
+            acc_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+            user.dayschedules.current_schedule.tasks.create(
+                start_time=datetime.time(7, 0),
+                end_time=datetime.time(8, 0),
+                task_desc='Benchmark task',
+            )
+        db.connections.close_all()
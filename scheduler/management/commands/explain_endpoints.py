@@ -0,0 +1,169 @@
+import collections
+import datetime
+import importlib
+
+from django import conf, db, shortcuts, test
+from django.contrib.auth import hashers, models as django_auth_models
+from django.core.management import base
+
+from accounts import models as account_models, signer
+from lifescheme import benchmarking, queryplans
+from scheduler import models as scheduler_models, sharding
+
+
+PASSWORD = 'Audit-Pa55word'
+# The URL configurations whose every URL is audited.
+URLCONFS = ('scheduler.urls', 'accounts.urls')
+
+Endpoint = collections.namedtuple('Endpoint', 'name method signed_in get_data')
+
+# The requests made to the URLs, in order. `get_data` is called with the
+# seeded objects and returns the data of the request.
+ENDPOINTS = [
+    Endpoint('scheduler:homepage', 'get', True, lambda seeded: {}),
+    Endpoint('scheduler:api-tasks', 'get', True, lambda seeded: {}),
+    Endpoint('scheduler:api-task-create', 'post', True, lambda seeded: {
+        'start_time': '22:00', 'end_time': '22:30', 'task_desc': 'Audit task',
+    }),
+    Endpoint('scheduler:api-task-update', 'post', True, lambda seeded: {
+        'task_id': seeded['task'].id, 'start_time': '07:00', 'end_time': '07:45', 'task_desc': 'Updated task',
+    }),
+    Endpoint('scheduler:api-task-status-update', 'post', True, lambda seeded: {'task_id': seeded['task'].id}),
+    Endpoint('scheduler:api-task-delete', 'post', True, lambda seeded: {'task_id': seeded['task'].id}),
+    Endpoint('accounts:user-signin', 'get', False, lambda seeded: {}),
+    Endpoint('accounts:user-signin', 'post', False, lambda seeded: {
+        'username': seeded['user'].username, 'password': PASSWORD,
+    }),
+    Endpoint('accounts:user-signup', 'get', False, lambda seeded: {}),
+    Endpoint('accounts:user-signup', 'post', False, lambda seeded: {
+        'username': 'auditnew', 'email': 'auditnew@example.com', 'password': PASSWORD,
+        'timezone': conf.settings.TIME_ZONE,
+    }),
+    Endpoint('accounts:user-account-creation-success', 'get', False, lambda seeded: {
+        't': signer.SIGNER.sign('auditnew@example.com'),
+    }),
+    Endpoint('accounts:user-account-activator', 'get', False, lambda seeded: {
+        't': signer.SIGNER.sign(seeded['inactive_user'].username),
+    }),
+    Endpoint('accounts:api-token', 'post', True, lambda seeded: {}),
+    Endpoint('accounts:user-signout', 'post', True, lambda seeded: {}),
+]
+
+
+def get_url_names():
+    """Returns a list of the namespaced names of the audited URLs."""
+    names = []
+    for urlconf in URLCONFS:
+        module = importlib.import_module(urlconf)
+        names += [f'{module.app_name}:{pattern.name}' for pattern in module.urlpatterns]
+    return names
+
+
+def seed(user_count, day_count):
+    """Creates `user_count` users, each with `day_count` day-schedules of 8
+    tasks up to the current day.
+
+    Returns:
+        A `dict` of the first user, whose password is `PASSWORD`, a task of
+        its current schedule and an inactive user.
+    """
+    unusable_password = hashers.make_password(None)
+    django_auth_models.User.objects.bulk_create([
+        django_auth_models.User(username=f'audit{index}', email=f'audit{index}@example.com', password=unusable_password)
+        for index in range(user_count)
+    ])
+    users = list(django_auth_models.User.objects.filter(username__startswith='audit').order_by('pk'))
+    account_models.UserProfile.objects.bulk_create([
+        account_models.UserProfile(user=user, timezone=conf.settings.TIME_ZONE) for user in users
+    ])
+    today = users[0].profile.local_date()
+    for user in users:
+        shard = sharding.shard_for_user(user.pk)
+        scheduler_models.UserDaySchedule.objects.db_manager(shard).bulk_create([
+            scheduler_models.UserDaySchedule(user=user, date=today - datetime.timedelta(days=day))
+            for day in range(day_count)
+        ])
+        scheduler_models.Task.objects.db_manager(shard).bulk_create([
+            scheduler_models.Task(
+                schedule=schedule,
+                date=schedule.date,
+                start_time=datetime.time(hour),
+                end_time=datetime.time(hour, 45),
+                task_desc=f'Task {hour}',
+            )
+            for schedule in user.dayschedules.all()
+            for hour in range(7, 15)
+        ])
+    user = users[0]
+    user.set_password(PASSWORD)
+    user.save(update_fields=['password'])
+    inactive_user = django_auth_models.User.objects.create(username='auditinactive', is_active=False)
+    return {
+        'user': user,
+        'task': user.dayschedules.current_schedule.tasks.first(),
+        'inactive_user': inactive_user,
+    }
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Requests every URL of the scheduler and accounts apps against a '
+        'seeded throwaway database, explains every SQL statement they execute '
+        'and reports full table scans, temporary B-trees and missing indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--days', type=int, default=7, help='Day-schedules per user.')
+        parser.add_argument('--strict', action='store_true', help='Fails if any issue is found.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['days'] < 1:
+            raise base.CommandError('--users and --days must be at least 1.')
+        with benchmarking.test_database():
+            issue_count = self.audit(options['users'], options['days'], options['verbosity'])
+        if options['strict'] and issue_count:
+            raise base.CommandError(f'{issue_count} query plan issues found.')
+
+    def audit(self, user_count, day_count, verbosity=1):
+        """Requests the endpoints, prints the report and returns the number
+        of issues found."""
+        seeded = seed(user_count, day_count)
+        statement_count = issue_count = 0
+        for endpoint in ENDPOINTS:
+            client = test.Client()
+            if endpoint.signed_in:
+                client.force_login(seeded['user'])
+            path = shortcuts.reverse(endpoint.name)
+            with queryplans.capture_statements() as statements:
+                response = getattr(client, endpoint.method)(path, endpoint.get_data(seeded), secure=True)
+            unique_statements = {
+                (statement.alias, statement.sql): statement
+                for statement in statements
+                if queryplans.is_explainable(statement.sql)
+            }
+            report = []
+            for statement in unique_statements.values():
+                plan = queryplans.explain(statement)
+                issues = queryplans.find_issues(db.connections[statement.alias].vendor, plan)
+                issue_count += len(issues)
+                if issues or verbosity > 1:
+                    report.append(f'    {statement.sql}')
+                    for line in plan:
+                        issue = next((issue for issue, issue_line in issues if issue_line == line), None)
+                        report.append(f'        {line}' + (f'  <-- {issue}' if issue else ''))
+            statement_count += len(statements)
+            self.stdout.write(
+                f'{endpoint.method.upper()} {endpoint.name} ({response.status_code}): '
+                f'{len(statements)} statements, {len(unique_statements)} explained'
+            )
+            for line in report:
+                self.stdout.write(line)
+
+        missing_names = sorted(set(get_url_names()) - {endpoint.name for endpoint in ENDPOINTS})
+        for name in missing_names:
+            self.stdout.write(f'{name}: not audited, add a request to ENDPOINTS')
+        issue_count += len(missing_names)
+        self.stdout.write(f'{len(ENDPOINTS)} requests, {statement_count} statements, {issue_count} issues')
+        return issue_count
+
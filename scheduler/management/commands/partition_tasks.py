@@ -0,0 +1,106 @@
+import datetime
+
+from django import db
+from django.core.management import base
+from django.db import transaction
+
+from scheduler import models as scheduler_models, partitioning
+
+
+def parse_month(value):
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise base.CommandError(f"'{value}' is not a month in the YYYY-MM format.")
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Manages the monthly PostgreSQL partitions of the tasks table: '
+        'converts the table, creates the partitions of the coming months and '
+        'detaches or drops those of old months. See scheduler.partitioning.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=db.DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Converts the tasks table to a partitioned table first.',
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=3,
+            help='The number of months after the current one to create partitions for.',
+        )
+        parser.add_argument(
+            '--detach-before',
+            type=parse_month,
+            metavar='YYYY-MM',
+            help='Detaches the partitions of the months before this one.',
+        )
+        parser.add_argument('--drop', action='store_true', help='Drops the detached partitions.')
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Reports the partitions that the query of the task list scans.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only prints the statements.')
+
+    def handle(self, *args, **options):
+        connection = db.connections[options['database']]
+        is_postgresql = connection.vendor == 'postgresql'
+        if not is_postgresql and not options['dry_run']:
+            raise base.CommandError('Tasks can only be partitioned on PostgreSQL.')
+        if not is_postgresql and (options['detach_before'] or options['explain']):
+            raise base.CommandError('--detach-before and --explain need PostgreSQL.')
+        if options['drop'] and not options['detach_before']:
+            raise base.CommandError('--drop needs --detach-before.')
+
+        today = datetime.date.today()
+        last_month = partitioning.add_months(today, options['ahead'])
+        statements = []
+        if options['convert']:
+            first_date = today
+            constraints = None
+            if is_postgresql:
+                if partitioning.is_partitioned(connection):
+                    raise base.CommandError('The tasks table is already partitioned.')
+                tasks = scheduler_models.Task.objects.using(connection.alias)
+                first_date = tasks.order_by('date').values_list('date', flat=True).first() or today
+                constraints = partitioning.get_constraints(connection)
+            statements += partitioning.convert_sql(partitioning.iter_months(first_date, last_month), constraints)
+        else:
+            if is_postgresql and not partitioning.is_partitioned(connection):
+                raise base.CommandError('The tasks table is not partitioned. Convert it with --convert.')
+            statements += [
+                partitioning.create_partition_sql(month)
+                for month in partitioning.iter_months(today, last_month)
+            ]
+        if options['detach_before']:
+            for month, name in partitioning.get_partitions(connection):
+                if month < options['detach_before']:
+                    statements += partitioning.detach_partition_sql(name, options['drop'])
+
+        if options['dry_run']:
+            for statement in statements:
+                self.stdout.write(f'{statement};')
+        else:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+            self.stdout.write(f'Ran {len(statements)} statements.')
+        if options['explain']:
+            self.explain(connection)
+
+    def explain(self, connection):
+        schedule = scheduler_models.UserDaySchedule.objects.using(connection.alias).order_by('-date').first()
+        if schedule is None:
+            raise base.CommandError('There is no schedule to explain the query of.')
+        plan = schedule.day_tasks.using(connection.alias).explain()
+        partitions = partitioning.get_scanned_partitions(plan)
+        self.stdout.write(plan)
+        self.stdout.write(f'The task list of {schedule.date} scans {len(partitions)} partitions: {", ".join(partitions)}')
+        if len(partitions) > 1:
+            raise base.CommandError('The task list query is not pruned to a single partition.')
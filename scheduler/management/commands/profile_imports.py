@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+
+from django.core.management import base
+
+
+PACKAGES = ('lifescheme', 'accounts', 'scheduler')
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Reports the time spent importing each module of the project while a '
+        'fresh worker starts, and optionally fails if the startup time exceeds '
+        'a budget.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget', type=float, default=None,
+            help='The maximum startup time in milliseconds.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Report every imported module, not only those of the project.',
+        )
+
+    def handle(self, *args, **options):
+        # The modules are already imported in this process, so they are
+        # timed in a fresh interpreter.
+        result = subprocess.run(
+            [sys.executable, '-W', 'ignore::DeprecationWarning', '-m', 'lifescheme.importtiming'],
+            stdout=subprocess.PIPE, check=True,
+        )
+        timings = json.loads(result.stdout)
+        total = timings['total'] * 1000
+        modules = sorted(timings['modules'].items(), key=lambda item: item[1][1], reverse=True)
+        self.stdout.write(f'{"module":<60} {"self":>9} {"cumulative":>11}')
+        for name, (self_seconds, cumulative_seconds) in modules:
+            if options['all'] or name.split('.')[0] in PACKAGES:
+                self.stdout.write(f'{name:<60} {self_seconds * 1000:>7.2f}ms {cumulative_seconds * 1000:>9.2f}ms')
+        self.stdout.write(f'startup: {total:.2f}ms')
+        budget = options['budget']
+        if budget is not None and total > budget:
+            raise base.CommandError(f'Startup took {total:.2f}ms, which exceeds the budget of {budget:.2f}ms.')
@@ -0,0 +1,63 @@
+import collections
+
+from django import db
+from django.core.management import base
+
+from scheduler import models as scheduler_models, sharding
+
+
+class Command(base.BaseCommand):
+    help = (
+        'Moves the schedules and tasks of users to the shard in '
+        'SCHEDULER_SHARDS they belong to, e.g. after shards were added. The '
+        'users being moved may not see their data until they are moved.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drain',
+            action='append',
+            default=[],
+            metavar='ALIAS',
+            help='A database being removed from SCHEDULER_SHARDS to move every user off.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report the users to move.')
+
+    def handle(self, *args, **options):
+        sources = sharding.get_shards() + [alias for alias in options['drain'] if alias not in sharding.get_shards()]
+        for alias in sources:
+            if alias not in db.connections.databases:
+                raise base.CommandError(f"'{alias}' is not a database.")
+        # (users, schedules, tasks) moved per (source, target).
+        moves = collections.defaultdict(lambda: [0, 0, 0])
+        for source in sources:
+            # Users whose every schedule is archived have no day-schedule.
+            user_ids = {
+                *scheduler_models.UserDaySchedule.objects.using(source).values_list('user_id', flat=True),
+                *scheduler_models.ArchivedSchedule.objects.using(source).values_list('user_id', flat=True),
+            }
+            for user_id in sorted(user_ids):
+                target = sharding.shard_for_user(user_id)
+                if target == source:
+                    continue
+                counts = moves[source, target]
+                counts[0] += 1
+                if not options['dry_run']:
+                    schedule_count, task_count, conflicting_dates = sharding.move_user_schedules(
+                        user_id, source, target
+                    )
+                    counts[1] += schedule_count
+                    counts[2] += task_count
+                    if conflicting_dates:
+                        dates = ', '.join(str(date) for date in conflicting_dates)
+                        self.stderr.write(
+                            f'User {user_id}: the schedules of {dates} could not be merged into {target} '
+                            f'and were left on {source}.'
+                        )
+        if not moves:
+            self.stdout.write('The shards are balanced.')
+        for (source, target), (users, schedules, tasks) in moves.items():
+            if options['dry_run']:
+                self.stdout.write(f'{source} -> {target}: {users} users to move')
+            else:
+                self.stdout.write(f'{source} -> {target}: {users} users, {schedules} schedules, {tasks} tasks moved')
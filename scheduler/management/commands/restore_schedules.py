@@ -0,0 +1,39 @@
+import datetime
+
+from django.contrib.auth import models as django_auth_models
+from django.core.management import base
+
+from scheduler import archive
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise base.CommandError(f"'{value}' is not a date in the YYYY-MM-DD format.")
+
+
+class Command(base.BaseCommand):
+    help = 'Restores the archived day-schedules of a user as live schedules and tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--date',
+            action='append',
+            type=parse_date,
+            dest='dates',
+            metavar='YYYY-MM-DD',
+            help='Restores the schedule of this date only. May be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = django_auth_models.User.objects.get(username=options['username'])
+        except django_auth_models.User.DoesNotExist:
+            raise base.CommandError(f"There is no user '{options['username']}'.")
+        archived_schedules = user.archivedschedules.order_by('date')
+        if options['dates']:
+            archived_schedules = archived_schedules.filter(date__in=options['dates'])
+        restored = archive.restore_schedules(archived_schedules)
+        self.stdout.write(f'{len(restored)} schedules of {user.username} restored')
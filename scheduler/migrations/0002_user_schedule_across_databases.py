@@ -0,0 +1,21 @@
+# Generated by Django 3.1.4 on 2026-10-19 00:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('scheduler', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userdayschedule',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='dayschedules', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.db.models import expressions
+
+
+def copy_schedule_dates(apps, schema_editor):
+    Task = apps.get_model('scheduler', 'Task')
+    UserDaySchedule = apps.get_model('scheduler', 'UserDaySchedule')
+    schedule_dates = UserDaySchedule.objects.filter(pk=expressions.OuterRef('schedule_id')).values('date')
+    Task.objects.using(schema_editor.connection.alias).update(date=expressions.Subquery(schedule_dates[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0002_user_schedule_across_databases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_schedule_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='task',
+            name='date',
+            field=models.DateField(editable=False),
+        ),
+    ]
@@ -2,8 +2,11 @@ import datetime
 
 from django.contrib.auth import models as django_auth_models
 from django.core import exceptions
+from django import db as django_db
 from django.db import models as django_db_models
 
+from . import sharding
+
 
 class UserDayScheduleManager(django_db_models.Manager):
     """Manager for `UserDaySchedule` class.
@@ -30,9 +33,45 @@ class UserDayScheduleManager(django_db_models.Manager):
         """
         if not hasattr(self, 'instance') or not isinstance(self.instance, django_auth_models.User):
             raise PermissionError("Only 'user' classes are allowed to access this method.")
-        schedule, _ = self.get_or_create(date=self.instance.profile.datetime.date())
+        schedule, _ = self.get_or_create(date=self.instance.profile.local_date())
         return schedule
 
+    @property
+    def current_tasks(self):
+        """Returns a queryset of the tasks of the current day-schedule of a
+        user, with their schedule.
+
+        Unlike `current_schedule.day_tasks`, the schedule is neither fetched
+        nor created beforehand, so the tasks are read in a single query.
+
+        Raises:
+            PermissionError: if not accessed through a related manager by a
+             `django.contrib.auth.models.User` instance.
+        """
+        if not hasattr(self, 'instance') or not isinstance(self.instance, django_auth_models.User):
+            raise PermissionError("Only 'user' classes are allowed to access this method.")
+        # Routed like the schedules of the user, i.e. to its shard or, in a
+        # read-only view, to the replica.
+        using = django_db.router.db_for_read(self.model, instance=self.instance)
+        return (
+            Task.objects.db_manager(using)
+            .select_related('schedule')
+            .filter(schedule__user=self.instance, date=self.instance.profile.local_date())
+        )
+
+    def for_user(self, user):
+        """Returns a queryset of the day-schedules of the given user, from
+        the shard of the user."""
+        return self.db_manager(sharding.shard_for_user(user.pk)).filter(user=user)
+
+
+class TaskManager(django_db_models.Manager):
+    """Manager for `Task` class."""
+    def for_user(self, user):
+        """Returns a queryset of the tasks of the given user, from the shard
+        of the user."""
+        return self.db_manager(sharding.shard_for_user(user.pk)).filter(schedule__user=user)
+
 
 class UserDaySchedule(django_db_models.Model):
     """Represents a user-specific schedule bound to a particular date.
@@ -45,6 +84,9 @@ class UserDaySchedule(django_db_models.Model):
         django_auth_models.User,
         related_name='dayschedules',
         on_delete=django_db_models.CASCADE,
+        # Users live on 'default' only, whichever shard holds their
+        # schedules. See `scheduler.sharding`.
+        db_constraint=False,
     )
     # The date for a schedule. It cannot be unique since each day-schedule
     # is user-specific.
@@ -62,10 +104,62 @@ class UserDaySchedule(django_db_models.Model):
     def __repr__(self):
         return f'DaySchedule(user={self.user.username}, date={self.date})'
 
+    @property
+    def day_tasks(self):
+        """A queryset of the tasks of this schedule.
+
+        The tasks are filtered by date as well as by schedule so that only the
+        partition of the date is scanned if tasks are partitioned by date. See
+        `scheduler.partitioning`.
+        """
+        if 'tasks' in getattr(self, '_prefetched_objects_cache', {}):
+            return self.tasks.all()
+        return self.tasks.filter(date=self.date)
+
+    def fetch_day_tasks(self):
+        """Fetches the tasks of this schedule once for `day_tasks` to return
+        them without querying again, until a task of the schedule is saved or
+        deleted.
+
+        The overlap checks of both `forms.TaskCreateForm` and `Task.save` go
+        through `day_tasks`, so this saves a query per check.
+        """
+        django_db_models.prefetch_related_objects(
+            [self],
+            django_db_models.Prefetch('tasks', queryset=Task.objects.filter(date=self.date)),
+        )
+
+    def forget_day_tasks(self):
+        """Drops the tasks fetched by `fetch_day_tasks`."""
+        getattr(self, '_prefetched_objects_cache', {}).pop('tasks', None)
+
     def __str__(self):
         return f'{self.date} - {self.user.username}'
 
 
+class ArchivedSchedule(django_db_models.Model):
+    """Represents a past day-schedule and its tasks, compacted into a single
+    row of compressed JSON. See `scheduler.archive`."""
+    user = django_db_models.ForeignKey(
+        django_auth_models.User,
+        related_name='archivedschedules',
+        on_delete=django_db_models.CASCADE,
+        # See `UserDaySchedule.user`.
+        db_constraint=False,
+    )
+    date = django_db_models.DateField()
+    # The zlib-compressed JSON of the schedule and its tasks.
+    data = django_db_models.BinaryField()
+
+    class Meta:
+        constraints = [
+            django_db_models.UniqueConstraint(fields=['user', 'date'], name='unique_user_archived_schedules'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} - {self.user.username} (archived)'
+
+
 class Task(django_db_models.Model):
     """Represents a piece of work with a status, bound to a unique time
      block and a user day-schedule.
@@ -76,6 +170,8 @@ class Task(django_db_models.Model):
     # The smallest duration that a task is allowed to span.
     MINIMUM_TASK_DURATION_MINS = 5
 
+    objects = TaskManager()
+
     schedule = django_db_models.ForeignKey(
         UserDaySchedule,
         related_name='tasks',
@@ -90,6 +186,9 @@ class Task(django_db_models.Model):
     # A boolean that informs the status of the task. True means the task
     # is marked as complete and false means the task is/was not completed.
     completed = django_db_models.BooleanField(default=False)
+    # The date of the schedule, copied on save. Tasks may be partitioned by
+    # date, which needs the date on the task itself.
+    date = django_db_models.DateField(editable=False)
 
     class Meta:
         ordering = ['start_time']
@@ -117,25 +216,35 @@ class Task(django_db_models.Model):
             TypeError: if any field of this instance is of unexpected type.
             ValidationError: if this instance is not valid.
         """
-        task_obj = self.get_start_time_overlap_task(self.schedule, self.start_time, self.id)
-        if task_obj:
-            raise exceptions.ValidationError(
-                {'start_time': f"This field overlaps with '{task_obj.task_desc}' time."}
+        # The times cannot have changed if they are not saved.
+        if update_fields is None or {'start_time', 'end_time'} & set(update_fields):
+            task_obj = self.get_start_time_overlap_task(self.schedule, self.start_time, self.id)
+            if task_obj:
+                raise exceptions.ValidationError(
+                    {'start_time': f"This field overlaps with '{task_obj.task_desc}' time."}
+                )
+            task_obj = self.get_end_time_overlap_task(
+                    self.schedule, self.start_time, self.end_time, self.id
             )
-        task_obj = self.get_end_time_overlap_task(
-                self.schedule, self.start_time, self.end_time, self.id
-        )
-        if task_obj:
-            raise exceptions.ValidationError(
-                {'end_time': f"This field overlaps with '{task_obj.task_desc}' time."}
-            )
-        self.validate_minimum_timespan(self.start_time, self.end_time)
+            if task_obj:
+                raise exceptions.ValidationError(
+                    {'end_time': f"This field overlaps with '{task_obj.task_desc}' time."}
+                )
+            self.validate_minimum_timespan(self.start_time, self.end_time)
+        self.date = self.schedule.date
         super().save(
             force_insert=force_insert,
             force_update=force_update,
             using=using,
             update_fields=update_fields
         )
+        self.schedule.forget_day_tasks()
+
+    def delete(self, using=None, keep_parents=False):
+        result = super().delete(using=using, keep_parents=keep_parents)
+        if self._meta.get_field('schedule').is_cached(self):
+            self.schedule.forget_day_tasks()
+        return result
 
     @staticmethod
     def get_start_time_overlap_task(schedule, start_time, task_id):
@@ -159,7 +268,7 @@ class Task(django_db_models.Model):
         # We create datetime objects from time objects to support
         # comparisons.
         target_start_dt = datetime.datetime.combine(schedule.date, start_time)
-        for task_obj in schedule.tasks.all():
+        for task_obj in schedule.day_tasks:
             task_start_dt = datetime.datetime.combine(schedule.date, task_obj.start_time)
             task_end_dt = datetime.datetime.combine(schedule.date, task_obj.end_time)
             # We check the ids to make sure that if we call save on an
@@ -196,7 +305,7 @@ class Task(django_db_models.Model):
         # comparisons.
         target_start_dt = datetime.datetime.combine(schedule.date, start_time)
         target_end_dt = datetime.datetime.combine(schedule.date, end_time)
-        for task_obj in schedule.tasks.all():
+        for task_obj in schedule.day_tasks:
             task_start_dt = datetime.datetime.combine(schedule.date, task_obj.start_time)
             task_end_dt = datetime.datetime.combine(schedule.date, task_obj.end_time)
             # We check the ids to make sure that if we call save on an
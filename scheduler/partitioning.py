@@ -0,0 +1,144 @@
+"""PostgreSQL declarative partitioning of tasks by month.
+
+Requests almost only read and write the tasks of the current day. Partitioning
+the tasks table by the month of `Task.date` keeps the rows and indexes they
+touch small and lets old months be detached or dropped without deleting rows.
+PostgreSQL only skips the other partitions of queries that filter on the
+date, as `UserDaySchedule.day_tasks` does.
+
+Partitioning is optional and Django is unaware of it. The 'partition_tasks'
+command converts the table of an existing PostgreSQL database and manages the
+partitions afterwards. The primary key of the partitioned table is (id, date)
+since it must include the partition key. Ids stay unique since they still come
+from a single sequence.
+"""
+import datetime
+import re
+
+
+TABLE = 'scheduler_task'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME_PATTERN = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+# Any partition of the table in a query plan.
+PLAN_PARTITION_PATTERN = re.compile(rf'\b{TABLE}_(?:y\d{{4}}m\d{{2}}|default)\b')
+
+
+def add_months(month, count):
+    """Returns the first day of the month `count` months after the month of
+    the given date."""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def iter_months(start, end):
+    """Yields the first day of each month from the month of `start` to the
+    month of `end`, both included."""
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month = add_months(month, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def parse_partition_name(name):
+    """Returns the first day of the month of the partition with the given
+    name, or None if the name is not that of a month partition."""
+    match = PARTITION_NAME_PATTERN.match(name)
+    if match is None:
+        return None
+    return datetime.date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition_sql(month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def convert_sql(months, constraints=None):
+    """Returns the statements converting the tasks table to a partitioned
+    table with a partition for each of the given months.
+
+    The constraints and indexes of the table are renamed first so that those
+    of the partitioned table can take their names. `constraints` maps their
+    names to their introspection, as returned by `get_constraints`, and
+    defaults to the primary key Django creates.
+
+    The rows are copied to the partitions, so the statements should run in a
+    transaction while the site is not writing tasks.
+    """
+    old_table = f'{TABLE}_unpartitioned'
+    if constraints is None:
+        constraints = {f'{TABLE}_pkey': {'primary_key': True, 'index': False}}
+    renames = [
+        (
+            f'ALTER INDEX {name} RENAME TO {old_table}_{number}' if info['index']
+            else f'ALTER TABLE {old_table} RENAME CONSTRAINT {name} TO {old_table}_{number}'
+        )
+        for number, (name, info) in enumerate(sorted(constraints.items()), 1)
+    ]
+    return [
+        f'ALTER TABLE {TABLE} RENAME TO {old_table}',
+        *renames,
+        f'CREATE TABLE {TABLE} (LIKE {old_table} INCLUDING DEFAULTS) PARTITION BY RANGE (date)',
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, date)',
+        (
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_schedule_id_fk FOREIGN KEY (schedule_id) '
+            f'REFERENCES scheduler_userdayschedule (id) DEFERRABLE INITIALLY DEFERRED'
+        ),
+        f'CREATE INDEX {TABLE}_schedule_id_idx ON {TABLE} (schedule_id)',
+        # Rows of months without a partition, e.g. far in the future, go to
+        # the default partition rather than failing.
+        f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT',
+        *[create_partition_sql(month) for month in months],
+        f'INSERT INTO {TABLE} SELECT * FROM {old_table}',
+        f'ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id',
+        f'DROP TABLE {old_table}',
+    ]
+
+
+def get_constraints(connection):
+    """Returns the constraints and indexes of the tasks table by name."""
+    with connection.cursor() as cursor:
+        return connection.introspection.get_constraints(cursor, TABLE)
+
+
+def detach_partition_sql(name, drop=False):
+    statements = [f'ALTER TABLE {TABLE} DETACH PARTITION {name}']
+    if drop:
+        statements.append(f'DROP TABLE {name}')
+    return statements
+
+
+def is_partitioned(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table JOIN pg_class ON pg_class.oid = partrelid WHERE relname = %s',
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions(connection):
+    """Returns a sorted list of (first day of the month, partition name) of
+    the month partitions of the tasks table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = inhparent '
+            'JOIN pg_class child ON child.oid = inhrelid '
+            'WHERE parent.relname = %s',
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return sorted((parse_partition_name(name), name) for name in names if parse_partition_name(name))
+
+
+def get_scanned_partitions(plan):
+    """Returns a sorted list of the partitions of the tasks table that the
+    given query plan scans."""
+    return sorted(set(PLAN_PARTITION_PATTERN.findall(plan)))
@@ -0,0 +1,258 @@
+"""Placement of the schedules and tasks of users on database shards.
+
+The schedules and tasks of a user live on the database at index
+`user id % number of shards` in `SCHEDULER_SHARDS`. Users and every other
+model live on 'default', which is also the first shard so that a single shard
+is the same as not sharding at all.
+
+`ShardRouter` routes the queries made through the related managers, e.g.
+`user.dayschedules` and `schedule.tasks`, to the shard of the user, which is
+how the views reach the scheduler data. Queries that do not start from a user
+or one of their schedules cannot be routed and go to 'default', unless they
+use `for_user` of the model managers or pick a shard with `using`.
+
+The ids of each shard start at `shard index * SHARD_ID_SPACE` so that ids are
+unique across shards and the shard of a row can be told from its id. Only
+SQLite shards reserve their ids this way, so every shard after the first must
+be a SQLite database.
+"""
+from django import conf, db
+from django.contrib.auth import models as django_auth_models
+from django.core import exceptions
+from django.db import transaction
+from django.db.models import signals
+
+
+# The number of ids of each model that each shard may allocate.
+SHARD_ID_SPACE = 2 ** 40
+SHARDED_APP_LABEL = 'scheduler'
+
+
+def get_shards():
+    """Returns a list of the aliases of the shards."""
+    return list(getattr(conf.settings, 'SCHEDULER_SHARDS', None) or [db.DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(get_shards()) > 1
+
+
+def shard_for_user(user_id):
+    """Returns the alias of the shard of the user with the given id."""
+    shards = get_shards()
+    return shards[user_id % len(shards)]
+
+
+def check_shard_backends():
+    """Raises `ImproperlyConfigured` if a shard after the first is not a
+    SQLite database, whose ids could not be reserved by `reserve_shard_ids`
+    and would not tell their shard."""
+    for alias in get_shards()[1:]:
+        vendor = db.connections[alias].vendor
+        if vendor != 'sqlite':
+            raise exceptions.ImproperlyConfigured(
+                f"The shard '{alias}' is a {vendor} database. The shards after the first must be SQLite databases."
+            )
+
+
+def shard_for_id(object_id):
+    """Returns the alias of the shard that allocated the given id of a
+    sharded model, or None if the shard is not in `SCHEDULER_SHARDS`."""
+    check_shard_backends()
+    shards = get_shards()
+    index = int(object_id) // SHARD_ID_SPACE
+    return shards[index] if 0 <= index < len(shards) else None
+
+
+def is_sharded_model(model):
+    return model._meta.app_label == SHARDED_APP_LABEL
+
+
+class ShardRouter:
+    """A database router sending the queries of the scheduler models to the
+    shard of the user they belong to.
+
+    The router does nothing unless there are several shards.
+    """
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, hints.get('instance'))
+
+    def _db_for_model(self, model, instance):
+        if not is_sharded():
+            return None
+        if not is_sharded_model(model):
+            # e.g. the user of a schedule, which lives on 'default' whatever
+            # the shard of the schedule is.
+            if instance is not None and is_sharded_model(type(instance)):
+                return db.DEFAULT_DB_ALIAS
+            return None
+        if instance is None:
+            return db.DEFAULT_DB_ALIAS
+        if isinstance(instance, django_auth_models.User):
+            return shard_for_user(instance.pk)
+        if instance._state.db:
+            return instance._state.db
+        user_id = getattr(instance, 'user_id', None)
+        return shard_for_user(user_id) if user_id is not None else db.DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Schedules reference users across databases.
+        if is_sharded_model(type(obj1)) or is_sharded_model(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db_alias, app_label, model_name=None, **hints):
+        if db_alias == db.DEFAULT_DB_ALIAS or db_alias not in get_shards():
+            return None
+        # The other shards only hold the scheduler tables.
+        return app_label == SHARDED_APP_LABEL
+
+
+def move_user_schedules(user_id, source, target):
+    """Moves the schedules, archived or not, and tasks of a user from one shard
+    to another.
+
+    The tasks of a schedule whose date `target` already has, e.g. written since
+    the user was routed to it, are merged into the schedule of `target`. Tasks
+    that `target` already has, with the same times and description, are not
+    copied again, so that an interrupted move is completed by running it again.
+    The rows are copied to `target` before they are deleted from `source` and
+    the copies get ids from the range of `target`.
+
+    Schedules that cannot be merged are left on `source`: those of dates
+    that are archived on one shard and not on the other or archived
+    differently on both, and those with a task that overlaps a task of the
+    schedule of `target`, as `Task.save` checks.
+
+    Returns:
+        A tuple of the numbers of schedules, archived or not, and tasks
+        copied, and a sorted list of the dates of the schedules left on
+        `source`.
+    """
+    from . import models as scheduler_models
+
+    schedules = scheduler_models.UserDaySchedule.objects.using(source).filter(user_id=user_id)
+    archived_schedules = scheduler_models.ArchivedSchedule.objects.using(source).filter(user_id=user_id)
+    target_schedules = {
+        schedule.date: schedule
+        for schedule in scheduler_models.UserDaySchedule.objects.using(target).filter(user_id=user_id)
+        .prefetch_related('tasks')
+    }
+    target_archives = {
+        date: bytes(data)
+        for date, data in scheduler_models.ArchivedSchedule.objects.using(target).filter(user_id=user_id)
+        .values_list('date', 'data')
+    }
+    conflicting_dates = set()
+    schedule_count = task_count = 0
+    with transaction.atomic(using=target):
+        for schedule in schedules.prefetch_related('tasks'):
+            if schedule.date in target_archives:
+                conflicting_dates.add(schedule.date)
+                continue
+            tasks = list(schedule.tasks.all())
+            target_schedule = target_schedules.get(schedule.date)
+            if target_schedule is None:
+                target_schedule = schedule
+                target_schedule.pk = None
+                target_schedule._state.adding = True
+                target_schedule.save(using=target)
+                schedule_count += 1
+            else:
+                existing_tasks = {
+                    (task.start_time, task.end_time, task.task_desc) for task in target_schedule.tasks.all()
+                }
+                tasks = [
+                    task for task in tasks
+                    if (task.start_time, task.end_time, task.task_desc) not in existing_tasks
+                ]
+                # The tasks are created with `bulk_create`, which skips the
+                # overlap checks of `Task.save`, so they are made here against
+                # the tasks of `target`, prefetched for `day_tasks`. The tasks
+                # of a schedule do not overlap each other already.
+                if any(
+                    scheduler_models.Task.get_start_time_overlap_task(target_schedule, task.start_time, None)
+                    or scheduler_models.Task.get_end_time_overlap_task(
+                        target_schedule, task.start_time, task.end_time, None,
+                    )
+                    for task in tasks
+                ):
+                    conflicting_dates.add(schedule.date)
+                    continue
+            for task in tasks:
+                task.pk = None
+                task.schedule = target_schedule
+                task.date = target_schedule.date
+            scheduler_models.Task.objects.using(target).bulk_create(tasks)
+            task_count += len(tasks)
+        for archived_schedule in archived_schedules:
+            if archived_schedule.date in target_schedules:
+                conflicting_dates.add(archived_schedule.date)
+            elif archived_schedule.date not in target_archives:
+                archived_schedule.pk = None
+                archived_schedule._state.adding = True
+                archived_schedule.save(using=target)
+                schedule_count += 1
+            elif target_archives[archived_schedule.date] != bytes(archived_schedule.data):
+                conflicting_dates.add(archived_schedule.date)
+    with transaction.atomic(using=source):
+        schedules.exclude(date__in=conflicting_dates).delete()
+        archived_schedules.exclude(date__in=conflicting_dates).delete()
+    return schedule_count, task_count, sorted(conflicting_dates)
+
+
+def reserve_shard_ids(using, models):
+    """Makes the ids of the given models allocated by the given shard start
+    at its range of ids.
+
+    Only SQLite shards are supported. Their tables are created with
+    AUTOINCREMENT so the next id is kept in `sqlite_sequence`.
+
+    Raises:
+        ImproperlyConfigured: if a shard after the first is not SQLite.
+    """
+    shards = get_shards()
+    if using not in shards or shards.index(using) == 0:
+        return
+    check_shard_backends()
+    connection = db.connections[using]
+    start = shards.index(using) * SHARD_ID_SPACE
+    with connection.cursor() as cursor:
+        for model in models:
+            table = model._meta.db_table
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start])
+            elif row[0] < start:
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [start, table])
+
+
+def reserve_shard_ids_after_migrate(app_config, using, **kwargs):
+    reserve_shard_ids(using, app_config.get_models())
+
+
+def delete_user_schedules(instance, **kwargs):
+    """Deletes the schedules of a user being deleted from their shard, which
+    the deletion cascade does not reach since it only follows relations within
+    the database of the user."""
+    shard = shard_for_user(instance.pk)
+    if shard != db.DEFAULT_DB_ALIAS:
+        instance.dayschedules.db_manager(shard).all().delete()
+        instance.archivedschedules.db_manager(shard).all().delete()
+
+
+def connect_signals(app_config):
+    signals.post_migrate.connect(
+        reserve_shard_ids_after_migrate,
+        sender=app_config,
+        dispatch_uid='scheduler.sharding.reserve_shard_ids',
+    )
+    signals.pre_delete.connect(
+        delete_user_schedules,
+        sender=django_auth_models.User,
+        dispatch_uid='scheduler.sharding.delete_user_schedules',
+    )
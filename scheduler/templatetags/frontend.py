@@ -0,0 +1,48 @@
+import functools
+import json
+import os
+
+from django import conf, template
+from django.contrib.staticfiles import finders
+
+
+register = template.Library()
+
+# The asset manifest of the frontend build that is committed with the app. It
+# is used when the frontend has not been built in `FRONTEND_BUILD_DIR`.
+COMMITTED_MANIFEST = 'scheduler/asset-manifest.json'
+
+
+@register.simple_tag
+def frontend_entrypoints(extension):
+    """Returns the static file names of the entry points of the frontend build
+    with the given extension, e.g. '.js'.
+
+    The names are meant to be passed to the `static` tag, which maps them to
+    their hashed names.
+    """
+    if conf.settings.DEBUG:
+        # The frontend may have been rebuilt since the manifest was read.
+        get_entrypoints.cache_clear()
+    return [name for name in get_entrypoints() if name.endswith(extension)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_entrypoints():
+    """Returns a tuple of the static file names of the entry points listed in
+    the asset manifest of the frontend build.
+
+    Paths in the manifest are relative to the build directory, e.g.
+    'static/js/main.js', and the files under 'static/' are collected under
+    'scheduler/'.
+    """
+    manifest_path = os.path.join(conf.settings.FRONTEND_BUILD_DIR, 'asset-manifest.json')
+    if not os.path.isfile(manifest_path):
+        manifest_path = finders.find(COMMITTED_MANIFEST)
+    with open(manifest_path, encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+    return tuple(
+        'scheduler/' + path[len('static/'):]
+        for path in manifest['entrypoints']
+        if path.startswith('static/')
+    )
@@ -1,18 +1,33 @@
 import datetime
-
-from django import conf, http, test, shortcuts
-from django.core import exceptions
+import io
+import json
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+from django import conf, db, http, test, shortcuts
+from django.core import exceptions, management
 from django.contrib.auth import models as django_auth_models
 from django.core.serializers import json as dj_json
 from django.template import defaultfilters
 
 from accounts import models as account_models
+from lifescheme import querybudgets, queryplans
 
 from . import (
+    archive,
+    checks,
     forms as scheduler_forms,
     models as scheduler_models,
+    partitioning,
+    sharding,
+    urls as scheduler_urls,
     views as scheduler_views,
 )
+from .management.commands import explain_endpoints
+from .templatetags import frontend
 
 
 class UserDayScheduleManagerTest(test.TestCase):
@@ -66,6 +81,9 @@ class TaskModelTest(test.TestCase):
         - Returns the expected task object if there is a time overlap.
       Cases for `save` method:
         - Saves an object with correct inputs.
+        - Copies the date of the schedule to the task.
+        - Checks overlaps against the fetched day tasks and drops them once
+          a task is saved or deleted.
     """
     def test_validate_minimum_timespan_with_correct_inputs(self):
         start_time = datetime.time(7, 0)
@@ -278,6 +296,31 @@ class TaskModelTest(test.TestCase):
         # existing object, which is valid, does not raise an exception.
         task.save()
 
+    def test_save_copies_schedule_date(self):
+        user = django_auth_models.User.objects.create(username='Testuser')
+        schedule = scheduler_models.UserDaySchedule.objects.create(user=user, date=datetime.date(2000, 1, 2))
+        task = schedule.tasks.create(start_time=datetime.time(7, 0), end_time=datetime.time(8, 0), task_desc='Task')
+        self.assertEqual(task.date, schedule.date)
+        self.assertEqual(list(schedule.day_tasks), [task])
+
+    def test_save_with_fetched_day_tasks(self):
+        user = django_auth_models.User.objects.create(username='Testuser')
+        schedule = scheduler_models.UserDaySchedule.objects.create(user=user, date=datetime.date(2000, 1, 2))
+        task = schedule.tasks.create(start_time=datetime.time(7, 0), end_time=datetime.time(8, 0), task_desc='Task')
+        schedule.fetch_day_tasks()
+        new_task = scheduler_models.Task(
+            schedule=schedule, start_time=datetime.time(7, 30), end_time=datetime.time(9, 0), task_desc='New task'
+        )
+        with self.assertNumQueries(0), self.assertRaises(exceptions.ValidationError):
+            new_task.save()
+        new_task.start_time = datetime.time(8, 30)
+        with self.assertNumQueries(1):
+            new_task.save()
+        self.assertEqual(list(schedule.day_tasks), [task, new_task])
+        schedule.fetch_day_tasks()
+        new_task.delete()
+        self.assertEqual(list(schedule.day_tasks), [task])
+
 
 class TaskFormTest(test.TestCase):
     """Test class for `forms.TaskCreateForm` form.
@@ -985,3 +1028,582 @@ class TasksViewTest(test.TestCase):
         serialized_tasks.sort(key=lambda task: task['startTime'])
         data = response.json()
         self.assertEqual(data['TASKS'], serialized_tasks)
+
+
+class HomepageViewTest(test.TestCase):
+    """Tests `views.HomepageView` class.
+
+    Test cases:
+      - The landing page is rendered for anonymous users.
+      - The homepage embeds the tasks of the current schedule as `TasksView`
+        returns them.
+    """
+    def test_anonymous_user(self):
+        response = self.client.get(shortcuts.reverse('scheduler:homepage'))
+        self.assertTemplateUsed(response, 'scheduler/landing_page.html')
+
+    def test_initial_tasks(self):
+        user = django_auth_models.User.objects.create(username='Testuser')
+        account_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+        for hour in (9, 7):
+            user.dayschedules.current_schedule.tasks.create(
+                start_time=datetime.time(hour, 0),
+                end_time=datetime.time(hour + 1, 0),
+                task_desc=f'Task at {hour} </script>',
+            )
+        self.client.force_login(user)
+        response = self.client.get(shortcuts.reverse('scheduler:homepage'))
+        self.assertTemplateUsed(response, 'scheduler/homepage.html')
+        match = re.search(
+            r'<script id="initial-tasks" type="application/json">(.*?)</script>',
+            response.content.decode(),
+        )
+        tasks_response = self.client.post(shortcuts.reverse('scheduler:api-tasks'))
+        self.assertEqual(json.loads(match.group(1)), tasks_response.json())
+        self.assertEqual([task['startTime'] for task in tasks_response.json()['TASKS']], ['07:00', '09:00'])
+
+
+class QueryBudgetTest(querybudgets.QueryBudgetTestMixin, test.TestCase):
+    """Tests that every scheduler endpoint stays within the query budget of
+    its view against a seeded schedule.
+
+    The user and its profile are loaded in a single query by
+    `accounts.backends.ProfileModelBackend` and the profile is not read again.
+    Sessions are read from the database, a query of every request.
+    """
+    def setUp(self):
+        super().setUp()
+        self.user = django_auth_models.User.objects.create(username='Testuser')
+        account_models.UserProfile.objects.create(user=self.user, timezone=conf.settings.TIME_ZONE)
+        schedule = self.user.dayschedules.current_schedule
+        for past_day in (1, 2):
+            past_schedule = self.user.dayschedules.create(date=schedule.date - datetime.timedelta(days=past_day))
+            past_schedule.tasks.create(start_time=datetime.time(7, 0), end_time=datetime.time(8, 0), task_desc='Past')
+        tasks = [
+            schedule.tasks.create(start_time=datetime.time(hour, 0), end_time=datetime.time(hour, 45), task_desc='Task')
+            for hour in range(7, 15)
+        ]
+        self.task = tasks[0]
+        self.client.force_login(self.user)
+
+    def assertUserQuery(self, statements):
+        user_queries = [statement.sql for statement in statements if 'FROM "auth_user"' in statement.sql]
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn('"accounts_userprofile"', user_queries[0])
+        self.assertFalse([statement for statement in statements if 'FROM "accounts_userprofile"' in statement.sql])
+
+    def assertEndpointWithinBudget(self, method, name, data=None):
+        with queryplans.capture_statements() as statements:
+            response = self.assertWithinBudget(method, shortcuts.reverse(name), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertUserQuery(statements)
+        self.statements = statements
+        return response
+
+    def test_every_view_has_a_budget(self):
+        for pattern in scheduler_urls.urlpatterns:
+            self.assertIsNotNone(querybudgets.get_budget(pattern.callback), pattern.name)
+
+    def test_homepage(self):
+        # The homepage embeds the tasks of the current schedule.
+        response = self.assertEndpointWithinBudget('get', 'scheduler:homepage')
+        self.assertEqual(len(response.context['INITIAL_TASKS']['TASKS']), 8)
+
+    def test_tasks(self):
+        response = self.assertEndpointWithinBudget('get', 'scheduler:api-tasks')
+        self.assertEqual(len(response.json()['TASKS']), 8)
+
+    def test_tasks_of_date(self):
+        # The live tasks of the day are read without their schedule.
+        date = self.user.dayschedules.current_schedule.date - datetime.timedelta(days=1)
+        response = self.assertEndpointWithinBudget('get', 'scheduler:api-tasks', {'date': date.isoformat()})
+        self.assertEqual(len(response.json()['TASKS']), 1)
+        self.assertEqual(len(self.statements), 3)
+
+    def test_tasks_of_archived_date(self):
+        date = self.user.dayschedules.current_schedule.date - datetime.timedelta(days=1)
+        archive.archive_schedules(date + datetime.timedelta(days=1))
+        response = self.assertEndpointWithinBudget('get', 'scheduler:api-tasks', {'date': date.isoformat()})
+        self.assertEqual(len(response.json()['TASKS']), 1)
+
+    def test_task_create(self):
+        data = {'start_time': '20:00', 'end_time': '21:00', 'task_desc': 'New task'}
+        self.assertEndpointWithinBudget('post', 'scheduler:api-task-create', data)
+
+    def test_task_create_overlap(self):
+        # The overlapping task is found in the tasks fetched by the view.
+        data = {'start_time': '07:30', 'end_time': '09:00', 'task_desc': 'New task'}
+        with queryplans.capture_statements() as statements:
+            response = self.client.post(shortcuts.reverse('scheduler:api-task-create'), data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(statements), 4)
+
+    def test_task_update(self):
+        data = {'task_id': self.task.id, 'start_time': '06:00', 'end_time': '06:50', 'task_desc': 'Task'}
+        self.assertEndpointWithinBudget('post', 'scheduler:api-task-update', data)
+
+    def test_task_status_update(self):
+        self.assertEndpointWithinBudget('post', 'scheduler:api-task-status-update', {'task_id': self.task.id})
+
+    def test_task_delete(self):
+        self.assertEndpointWithinBudget('post', 'scheduler:api-task-delete', {'task_id': self.task.id})
+
+
+SHARD = 'testshard'
+
+
+@test.override_settings(SCHEDULER_SHARDS=['default', SHARD])
+class ShardingTest(test.TestCase):
+    """Tests `sharding.ShardRouter` and the 'rebalance_shards' command over
+    'default' and a second SQLite file.
+
+    Test cases:
+        - schedules and tasks are placed on the shard of their user.
+        - ids are unique across shards.
+        - the views and the admin reach the data of any shard.
+        - the data of a user is deleted from their shard with the user.
+        - users are moved to their shard by 'rebalance_shards', including
+          users whose every schedule is archived.
+        - schedules of dates the shard of the user already has are merged into
+          them, or left where they are if they cannot be merged, e.g. because
+          their tasks overlap.
+        - shards after the first must be SQLite databases.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        db.connections.databases[SHARD] = {
+            'ENGINE': 'lifescheme.sqlite3',
+            'NAME': os.path.join(cls.directory.name, 'shard.sqlite3'),
+        }
+        db.connections.ensure_defaults(SHARD)
+        db.connections.prepare_test_settings(SHARD)
+        # The test database of the shard is the file itself, migrated before
+        # the test transactions begin.
+        with test.override_settings(SCHEDULER_SHARDS=['default', SHARD]):
+            management.call_command('migrate', database=SHARD, verbosity=0)
+        # The shard is only declared now since the test runner would set up a
+        # test database for it otherwise.
+        cls.databases = {'default', SHARD}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        db.connections[SHARD].close()
+        del db.connections[SHARD]
+        del db.connections.databases[SHARD]
+        cls.directory.cleanup()
+
+    def create_user(self, shard):
+        """Creates a user with a profile whose data is placed on the given
+        shard."""
+        while True:
+            user = django_auth_models.User.objects.create(
+                username=f'Testuser{django_auth_models.User.objects.count()}',
+                is_staff=True,
+                is_superuser=True,
+            )
+            if sharding.shard_for_user(user.pk) == shard:
+                account_models.UserProfile.objects.create(user=user, timezone=conf.settings.TIME_ZONE)
+                return user
+
+    def create_task(self, user):
+        return user.dayschedules.current_schedule.tasks.create(
+            start_time=datetime.time(7, 0),
+            end_time=datetime.time(8, 0),
+            task_desc='Test task',
+        )
+
+    def test_placement(self):
+        for shard in ('default', SHARD):
+            user = self.create_user(shard)
+            task = self.create_task(user)
+            self.assertEqual(task._state.db, shard)
+            self.assertEqual(list(scheduler_models.Task.objects.for_user(user)), [task])
+            self.assertEqual(scheduler_models.UserDaySchedule.objects.for_user(user).get(), task.schedule)
+            self.assertEqual(sharding.shard_for_id(task.id), shard)
+            self.assertEqual(sharding.shard_for_id(task.schedule.id), shard)
+            self.assertEqual(task.schedule.user, user)
+        self.assertFalse(scheduler_models.Task.objects.using('default').filter(id__gte=sharding.SHARD_ID_SPACE))
+
+    def test_views(self):
+        user = self.create_user(SHARD)
+        self.client.force_login(user)
+        response = self.client.post(
+            shortcuts.reverse('scheduler:api-task-create'),
+            {'start_time': '07:00', 'end_time': '08:00', 'task_desc': 'Test task'},
+        )
+        self.assertEqual(response.status_code, 200)
+        task_id = response.json()['taskId']
+        self.assertTrue(scheduler_models.Task.objects.using(SHARD).filter(id=task_id).exists())
+        response = self.client.post(shortcuts.reverse('scheduler:api-task-status-update'), {'task_id': task_id})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(shortcuts.reverse('scheduler:api-tasks'))
+        self.assertEqual([(task['id'], task['completed']) for task in response.json()['TASKS']], [(task_id, True)])
+
+    def test_admin(self):
+        user = self.create_user(SHARD)
+        task = self.create_task(user)
+        self.client.force_login(user)
+        response = self.client.get(shortcuts.reverse('admin:scheduler_task_change', args=[task.id]))
+        self.assertContains(response, 'Test task')
+        response = self.client.get(shortcuts.reverse('admin:scheduler_task_changelist'), {'shard': SHARD})
+        self.assertContains(response, 'Test task')
+        response = self.client.get(shortcuts.reverse('admin:scheduler_task_changelist'))
+        self.assertNotContains(response, 'Test task')
+
+    def test_delete_user(self):
+        user = self.create_user(SHARD)
+        self.create_task(user)
+        user.delete()
+        self.assertFalse(scheduler_models.UserDaySchedule.objects.using(SHARD).exists())
+        self.assertFalse(scheduler_models.Task.objects.using(SHARD).exists())
+
+    def test_rebalance(self):
+        user = self.create_user(SHARD)
+        # The data of the user was written before the shard was added.
+        with test.override_settings(SCHEDULER_SHARDS=['default']):
+            self.create_task(user)
+            user.dayschedules.create(date=datetime.date(2020, 1, 1))
+            user.archivedschedules.create(date=datetime.date(2019, 1, 1), data=b'')
+        self.assertTrue(scheduler_models.UserDaySchedule.objects.using('default').exists())
+        output = io.StringIO()
+        management.call_command('rebalance_shards', dry_run=True, stdout=output)
+        self.assertEqual(output.getvalue(), f'default -> {SHARD}: 1 users to move\n')
+        output = io.StringIO()
+        management.call_command('rebalance_shards', stdout=output)
+        self.assertEqual(output.getvalue(), f'default -> {SHARD}: 1 users, 3 schedules, 1 tasks moved\n')
+        self.assertFalse(scheduler_models.UserDaySchedule.objects.using('default').exists())
+        self.assertEqual(user.dayschedules.count(), 2)
+        self.assertEqual(user.archivedschedules.get().date, datetime.date(2019, 1, 1))
+        self.assertEqual(user.dayschedules.current_schedule.tasks.get().task_desc, 'Test task')
+        output = io.StringIO()
+        management.call_command('rebalance_shards', stdout=output)
+        self.assertEqual(output.getvalue(), 'The shards are balanced.\n')
+
+    def test_rebalance_archived_only(self):
+        user = self.create_user(SHARD)
+        user.archivedschedules.create(date=datetime.date(2019, 1, 1), data=b'')
+        output = io.StringIO()
+        # The shard is being removed.
+        with test.override_settings(SCHEDULER_SHARDS=['default']):
+            management.call_command('rebalance_shards', drain=[SHARD], stdout=output)
+            self.assertEqual(output.getvalue(), f'{SHARD} -> default: 1 users, 1 schedules, 0 tasks moved\n')
+            self.assertEqual(user.archivedschedules.get().date, datetime.date(2019, 1, 1))
+        self.assertFalse(scheduler_models.ArchivedSchedule.objects.using(SHARD).exists())
+
+    def test_rebalance_conflicts(self):
+        user = self.create_user(SHARD)
+        with test.override_settings(SCHEDULER_SHARDS=['default']):
+            self.create_task(user)
+            user.dayschedules.current_schedule.tasks.create(
+                start_time=datetime.time(9, 0),
+                end_time=datetime.time(10, 0),
+                task_desc='Old task',
+            )
+            user.archivedschedules.create(date=datetime.date(2019, 1, 1), data=b'old')
+        # The user opened the homepage after being routed to the shard.
+        self.create_task(user)
+        user.archivedschedules.create(date=datetime.date(2019, 1, 1), data=b'new')
+        output, errors = io.StringIO(), io.StringIO()
+        management.call_command('rebalance_shards', stdout=output, stderr=errors)
+        self.assertEqual(output.getvalue(), f'default -> {SHARD}: 1 users, 0 schedules, 1 tasks moved\n')
+        self.assertEqual(
+            errors.getvalue(),
+            f'User {user.pk}: the schedules of 2019-01-01 could not be merged into {SHARD} and were left on default.\n',
+        )
+        self.assertEqual(
+            [task.task_desc for task in user.dayschedules.current_schedule.tasks.all()],
+            ['Test task', 'Old task'],
+        )
+        self.assertFalse(scheduler_models.UserDaySchedule.objects.using('default').exists())
+        self.assertEqual(scheduler_models.ArchivedSchedule.objects.using('default').get().data, b'old')
+        self.assertEqual(bytes(user.archivedschedules.get().data), b'new')
+
+    def test_rebalance_overlapping_tasks(self):
+        user = self.create_user(SHARD)
+        with test.override_settings(SCHEDULER_SHARDS=['default']):
+            user.dayschedules.current_schedule.tasks.create(
+                start_time=datetime.time(9, 0),
+                end_time=datetime.time(10, 0),
+                task_desc='Old task',
+            )
+        user.dayschedules.current_schedule.tasks.create(
+            start_time=datetime.time(9, 30),
+            end_time=datetime.time(10, 30),
+            task_desc='New task',
+        )
+        errors = io.StringIO()
+        management.call_command('rebalance_shards', stdout=io.StringIO(), stderr=errors)
+        date = user.dayschedules.current_schedule.date
+        self.assertEqual(
+            errors.getvalue(),
+            f'User {user.pk}: the schedules of {date} could not be merged into {SHARD} and were left on default.\n',
+        )
+        self.assertEqual(
+            [task.task_desc for task in user.dayschedules.current_schedule.tasks.all()],
+            ['New task'],
+        )
+        self.assertEqual(
+            scheduler_models.Task.objects.using('default').get(schedule__user=user).task_desc,
+            'Old task',
+        )
+
+    def test_non_sqlite_shard(self):
+        with mock.patch.object(db.connections[SHARD], 'vendor', 'postgresql'):
+            with self.assertRaisesMessage(exceptions.ImproperlyConfigured, f"The shard '{SHARD}' is a postgresql"):
+                sharding.shard_for_id(1)
+            with self.assertRaises(exceptions.ImproperlyConfigured):
+                sharding.reserve_shard_ids(SHARD, [scheduler_models.Task])
+
+
+class ArchiveTest(test.TestCase):
+    """Tests `archive` and the 'archive_schedules' and 'restore_schedules'
+    commands.
+
+    Test cases:
+        - past schedules are archived with their tasks, in batches.
+        - the current schedule is not archived.
+        - the tasks of an archived day are read from the archive.
+        - `TasksView` returns the tasks of a past day.
+        - archived schedules are restored with their ids.
+    """
+    def setUp(self):
+        self.user = django_auth_models.User.objects.create(username='Testuser')
+        account_models.UserProfile.objects.create(user=self.user, timezone=conf.settings.TIME_ZONE)
+        self.past_tasks = []
+        for day in (1, 2):
+            schedule = self.user.dayschedules.create(date=datetime.date(2000, 1, day))
+            self.past_tasks.append(schedule.tasks.create(
+                start_time=datetime.time(7, 0),
+                end_time=datetime.time(8, 0),
+                task_desc=f'Task {day}',
+                completed=day == 1,
+            ))
+        self.current_task = self.user.dayschedules.current_schedule.tasks.create(
+            start_time=datetime.time(7, 0),
+            end_time=datetime.time(8, 0),
+            task_desc='Current task',
+        )
+
+    def test_archive(self):
+        counts = archive.archive_schedules(archive.get_archive_cutoff(), batch_size=1)
+        self.assertEqual(counts, (2, 2))
+        self.assertEqual(list(scheduler_models.Task.objects.all()), [self.current_task])
+        self.assertEqual(self.user.archivedschedules.count(), 2)
+        tasks = archive.get_tasks(self.user, datetime.date(2000, 1, 1))
+        self.assertEqual(
+            [(task.id, task.task_desc, task.start_time, task.completed) for task in tasks],
+            [(self.past_tasks[0].id, 'Task 1', datetime.time(7, 0), True)],
+        )
+        self.assertEqual(archive.get_tasks(self.user, datetime.date(1999, 1, 1)), [])
+        self.assertEqual(archive.get_tasks(self.user, self.current_task.date), [self.current_task])
+
+    def test_tasks_view(self):
+        archive.archive_schedules(archive.get_archive_cutoff())
+        self.client.force_login(self.user)
+        path = shortcuts.reverse('scheduler:api-tasks')
+        response = self.client.get(path, {'date': '2000-01-02'})
+        self.assertEqual([task['desc'] for task in response.json()['TASKS']], ['Task 2'])
+        response = self.client.get(path)
+        self.assertEqual([task['desc'] for task in response.json()['TASKS']], ['Current task'])
+        response = self.client.get(path, {'date': '2000-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_commands(self):
+        output = io.StringIO()
+        management.call_command('archive_schedules', stdout=output)
+        self.assertIn('default: 2 schedules and 2 tasks', output.getvalue())
+        output = io.StringIO()
+        management.call_command('restore_schedules', 'Testuser', date=[datetime.date(2000, 1, 1)], stdout=output)
+        self.assertEqual(output.getvalue(), '1 schedules of Testuser restored\n')
+        self.assertEqual(self.user.archivedschedules.get().date, datetime.date(2000, 1, 2))
+        restored_task = scheduler_models.Task.objects.get(task_desc='Task 1')
+        self.assertEqual(restored_task.id, self.past_tasks[0].id)
+        self.assertEqual(restored_task.schedule, self.past_tasks[0].schedule)
+        self.assertTrue(restored_task.completed)
+
+
+class PartitioningTest(test.TestCase):
+    """Tests `partitioning` and the 'partition_tasks' command.
+
+    On SQLite the statements are checked rather than run. See
+    `PostgreSQLPartitioningTest` for the statements run on PostgreSQL.
+
+    Test cases:
+        - months are enumerated across years.
+        - partition names are generated and parsed.
+        - the partitions scanned by a query plan are found.
+        - the command prints the statements on a dry run.
+        - the command refuses to run on SQLite.
+    """
+    def test_months(self):
+        months = list(partitioning.iter_months(datetime.date(2020, 11, 15), datetime.date(2021, 2, 1)))
+        self.assertEqual(months, [
+            datetime.date(2020, 11, 1),
+            datetime.date(2020, 12, 1),
+            datetime.date(2021, 1, 1),
+            datetime.date(2021, 2, 1),
+        ])
+        self.assertEqual(partitioning.add_months(datetime.date(2020, 12, 31), 14), datetime.date(2022, 2, 1))
+
+    def test_partition_names(self):
+        name = partitioning.partition_name(datetime.date(2021, 3, 1))
+        self.assertEqual(name, 'scheduler_task_y2021m03')
+        self.assertEqual(partitioning.parse_partition_name(name), datetime.date(2021, 3, 1))
+        self.assertIsNone(partitioning.parse_partition_name(partitioning.DEFAULT_PARTITION))
+        self.assertEqual(
+            partitioning.create_partition_sql(datetime.date(2021, 12, 1)),
+            "CREATE TABLE IF NOT EXISTS scheduler_task_y2021m12 PARTITION OF scheduler_task "
+            "FOR VALUES FROM ('2021-12-01') TO ('2022-01-01')",
+        )
+
+    def test_scanned_partitions(self):
+        plan = (
+            'Append\n'
+            '  ->  Index Scan using scheduler_task_y2021m03_schedule_id_idx on scheduler_task_y2021m03\n'
+            '  ->  Seq Scan on scheduler_task_default'
+        )
+        self.assertEqual(
+            partitioning.get_scanned_partitions(plan),
+            ['scheduler_task_default', 'scheduler_task_y2021m03'],
+        )
+
+    def test_dry_run(self):
+        output = io.StringIO()
+        management.call_command('partition_tasks', convert=True, ahead=1, dry_run=True, stdout=output)
+        statements = output.getvalue().splitlines()
+        self.assertEqual(statements[0], 'ALTER TABLE scheduler_task RENAME TO scheduler_task_unpartitioned;')
+        # The primary key of the table is renamed out of the way of that of
+        # the partitioned table.
+        self.assertEqual(
+            statements[1],
+            'ALTER TABLE scheduler_task_unpartitioned RENAME CONSTRAINT scheduler_task_pkey '
+            'TO scheduler_task_unpartitioned_1;',
+        )
+        self.assertIn('ALTER TABLE scheduler_task ADD CONSTRAINT scheduler_task_pkey PRIMARY KEY (id, date);', statements)
+        today = datetime.date.today()
+        self.assertIn(partitioning.create_partition_sql(today.replace(day=1)) + ';', statements)
+        self.assertIn(partitioning.create_partition_sql(partitioning.add_months(today, 1)) + ';', statements)
+        self.assertEqual(statements[-1], 'DROP TABLE scheduler_task_unpartitioned;')
+
+    @unittest.skipUnless(db.connection.vendor == 'sqlite', 'The tests run on SQLite.')
+    def test_sqlite(self):
+        with self.assertRaisesMessage(management.CommandError, 'PostgreSQL'):
+            management.call_command('partition_tasks')
+
+
+@unittest.skipUnless(db.connection.vendor == 'postgresql', 'Tasks are only partitioned on PostgreSQL.')
+class PostgreSQLPartitioningTest(test.TestCase):
+    """Tests the 'partition_tasks' command on PostgreSQL.
+
+    The conversion runs in the transaction of the test, so it is rolled back
+    with it.
+
+    Test cases:
+        - the table is converted with its constraints under their names.
+        - the task list of a day only scans the partition of its month.
+    """
+    def setUp(self):
+        super().setUp()
+        self.user = django_auth_models.User.objects.create(username='Testuser')
+        account_models.UserProfile.objects.create(user=self.user, timezone=conf.settings.TIME_ZONE)
+        today = datetime.date.today()
+        for days in (0, 40, 70):
+            schedule = scheduler_models.UserDaySchedule.objects.create(
+                user=self.user, date=today - datetime.timedelta(days=days),
+            )
+            schedule.tasks.create(start_time=datetime.time(8), end_time=datetime.time(9), task_desc='Task')
+
+    def test_convert(self):
+        # Checks the foreign keys of the tasks created by `setUp`, which
+        # PostgreSQL does not let the renamed table be dropped with.
+        db.connection.check_constraints()
+        output = io.StringIO()
+        management.call_command('partition_tasks', convert=True, explain=True, stdout=output)
+        self.assertTrue(partitioning.is_partitioned(db.connection))
+        constraints = partitioning.get_constraints(db.connection)
+        self.assertEqual(constraints['scheduler_task_pkey']['columns'], ['id', 'date'])
+        self.assertIn('scheduler_task_schedule_id_fk', constraints)
+        self.assertEqual(scheduler_models.Task.objects.count(), 3)
+        today = datetime.date.today()
+        self.assertIn(
+            f'scans 1 partitions: {partitioning.partition_name(today.replace(day=1))}',
+            output.getvalue(),
+        )
+        # Tasks are still created with ids of the sequence.
+        task = self.user.dayschedules.current_schedule.tasks.create(
+            start_time=datetime.time(10), end_time=datetime.time(11), task_desc='Task',
+        )
+        self.assertEqual(list(self.user.dayschedules.current_schedule.day_tasks)[-1], task)
+
+
+class ExplainEndpointsTest(test.TestCase):
+    """Tests the 'explain_endpoints' command.
+
+    Test cases:
+        - every URL of the audited apps is requested successfully.
+        - the flagged statements are reported with their plans.
+    """
+    def test_audit(self):
+        output = io.StringIO()
+        issue_count = explain_endpoints.Command(stdout=output).audit(user_count=2, day_count=2)
+        report = output.getvalue()
+        for name in explain_endpoints.get_url_names():
+            self.assertRegex(report, rf'(?m)^(GET|POST) {name} \([23]\d\d\)', msg=name)
+        self.assertNotIn('not audited', report)
+        self.assertEqual(report.count('<-- '), issue_count)
+        self.assertTrue(report.endswith(f' statements, {issue_count} issues\n'))
+
+
+class FrontendEntrypointsTest(test.SimpleTestCase):
+    """Tests `templatetags.frontend` module.
+
+    Test cases:
+      - The committed asset manifest is used if the frontend is not built.
+      - The manifest of the frontend build is used if it exists.
+    """
+    def tearDown(self):
+        frontend.get_entrypoints.cache_clear()
+
+    @test.override_settings(FRONTEND_BUILD_DIR='/nonexistent')
+    def test_committed_manifest(self):
+        frontend.get_entrypoints.cache_clear()
+        self.assertEqual(frontend.frontend_entrypoints('.css'), ['scheduler/css/main.8f2cbe9a.chunk.css'])
+        self.assertIn('scheduler/js/main.916afeb9.chunk.js', frontend.frontend_entrypoints('.js'))
+
+    def test_build_manifest(self):
+        with tempfile.TemporaryDirectory() as build_dir:
+            with open(os.path.join(build_dir, 'asset-manifest.json'), 'w') as manifest_file:
+                json.dump({'entrypoints': ['static/js/runtime.js', 'static/css/main.css', 'index.html']}, manifest_file)
+            with self.settings(FRONTEND_BUILD_DIR=build_dir):
+                frontend.get_entrypoints.cache_clear()
+                self.assertEqual(frontend.get_entrypoints(), ('scheduler/js/runtime.js', 'scheduler/css/main.css'))
+
+
+class StaticReferencesCheckTest(test.SimpleTestCase):
+    """Tests `checks.check_static_references` function.
+
+    Test cases:
+      - The templates of the project pass the check.
+      - Static URLs and missing static files in templates are reported.
+    """
+    def test_project_templates(self):
+        self.assertEqual(checks.check_static_references(None), [])
+
+    def test_invalid_references(self):
+        with tempfile.TemporaryDirectory() as template_dir:
+            with open(os.path.join(template_dir, 'invalid.html'), 'w') as template_file:
+                template_file.write(
+                    '{% load static %}\n'
+                    '<link href="/static/lifescheme/css/main.css">\n'
+                    '<script src="{% static \'scheduler/js/missing.js\' %}"></script>\n'
+                )
+            templates = [{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [template_dir],
+            }]
+            with self.settings(TEMPLATES=templates):
+                errors = checks.check_static_references(None)
+        self.assertEqual([error.id for error in errors], ['scheduler.E001', 'scheduler.E002'])
@@ -1,8 +1,13 @@
+import datetime
+
 from django import http, shortcuts, views as django_views
 from django.core import exceptions
 from django.template import defaultfilters
+from django.utils import decorators
+
+from lifescheme import pagecache, querybudgets, replicas
 
-from . import forms as kernel_forms
+from . import archive, forms as kernel_forms
 
 
 class BaseView(django_views.View):
@@ -43,13 +48,22 @@ class BaseView(django_views.View):
         raise http.Http404
 
 
+@querybudgets.budget(queries=3, time=25)
 class HomepageView(BaseView):
+    # Anonymous visitors get the landing page, which is the same for all of
+    # them.
+    @decorators.method_decorator(pagecache.cache_anonymous_page)
+    @decorators.method_decorator(replicas.read_from_replica)
     def get(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
             return shortcuts.render(request, 'scheduler/landing_page.html')
-        return shortcuts.render(request, 'scheduler/homepage.html')
+        # The tasks are embedded in the page, as `TasksView` would return
+        # them, so that the task table is rendered without requesting them.
+        tasks = serialize_tasks(request.user.dayschedules.current_tasks)
+        return shortcuts.render(request, 'scheduler/homepage.html', {'INITIAL_TASKS': {'TASKS': tasks}})
 
 
+@querybudgets.budget(queries=5, time=50)
 class TaskCreationView(BaseView):
     """A view for creating a task.
 
@@ -57,7 +71,9 @@ class TaskCreationView(BaseView):
     """
     def post(self, request, *args, **kwargs):
         filled_task_form = kernel_forms.TaskCreateForm(request.POST)
-        filled_task_form.instance.schedule = request.user.dayschedules.current_schedule
+        schedule = request.user.dayschedules.current_schedule
+        schedule.fetch_day_tasks()
+        filled_task_form.instance.schedule = schedule
         if filled_task_form.is_valid():
             saved_task = filled_task_form.save()
             return http.JsonResponse({
@@ -70,6 +86,7 @@ class TaskCreationView(BaseView):
             return http.JsonResponse({'FORM_ERRORS': filled_task_form.errors}, status=400)
 
 
+@querybudgets.budget(queries=5, time=50)
 class TaskUpdateView(BaseView):
     """A view for updating an existing task.
 
@@ -78,9 +95,10 @@ class TaskUpdateView(BaseView):
     def post(self, request, *args, **kwargs):
         task_id = int(request.POST.get('task_id'))
         try:
-            task_obj = request.user.dayschedules.current_schedule.tasks.get(id=task_id)
+            task_obj = request.user.dayschedules.current_tasks.get(id=task_id)
         except exceptions.ObjectDoesNotExist:
             return http.JsonResponse({'ERROR': f'Could not retrieve task({task_id})'}, status=400)
+        task_obj.schedule.fetch_day_tasks()
         filled_task_form = kernel_forms.TaskUpdateForm(self.request.POST, instance=task_obj)
         if filled_task_form.is_valid():
             filled_task_form.save()
@@ -94,6 +112,7 @@ class TaskUpdateView(BaseView):
             return http.JsonResponse({'FORM_ERRORS': filled_task_form.errors}, status=400)
 
 
+@querybudgets.budget(queries=4, time=50)
 class TaskDeleteView(BaseView):
     """A view for deleting a task.
 
@@ -102,7 +121,7 @@ class TaskDeleteView(BaseView):
     def post(self, request, *args, **kwargs):
         task_id = int(request.POST.get('task_id'))
         try:
-            task_obj = request.user.dayschedules.current_schedule.tasks.get(id=task_id)
+            task_obj = request.user.dayschedules.current_tasks.get(id=task_id)
         except exceptions.ObjectDoesNotExist:
             return http.JsonResponse({'ERROR': f'Could not retrieve task({task_id})'}, status=400)
         task_obj.delete()
@@ -111,6 +130,7 @@ class TaskDeleteView(BaseView):
         })
 
 
+@querybudgets.budget(queries=4, time=50)
 class TaskStatusUpdateView(BaseView):
     """A view for marking a task as completed or vice-versa.
 
@@ -119,7 +139,7 @@ class TaskStatusUpdateView(BaseView):
     def post(self, request, *args, **kwargs):
         task_id = int(request.POST.get('task_id'))
         try:
-            task_obj = request.user.dayschedules.current_schedule.tasks.get(id=task_id)
+            task_obj = request.user.dayschedules.current_tasks.get(id=task_id)
         except exceptions.ObjectDoesNotExist:
             return http.JsonResponse({'ERROR': f'Could not retrieve task({task_id})'}, status=400)
         if task_obj.completed:
@@ -132,23 +152,48 @@ class TaskStatusUpdateView(BaseView):
         })
 
 
+# A request with a date also reads the archive if the day has no live tasks.
+@querybudgets.budget(queries=4, time=25)
+@decorators.method_decorator(replicas.read_from_replica, name='dispatch')
 class TasksView(BaseView):
     """A view for retrieving all the tasks for the current schedule for
-     request.user."""
+     request.user.
+
+    The tasks of another day are retrieved by passing its date, in the
+    YYYY-MM-DD format, as the 'date' parameter. They are read from the archive
+    if the schedule of that day has been archived.
+    """
     def get(self, request, *args, **kwargs):
         return self.post(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        tasks_qs = request.user.dayschedules.current_schedule.tasks.all()
-        serialized_tasks = []
-        for task_obj in tasks_qs:
-            task_dict = {
-                'id': task_obj.id,
-                'startTime': defaultfilters.time(task_obj.start_time, 'H:i'),
-                'endTime': defaultfilters.time(task_obj.end_time, 'H:i'),
-                'desc': task_obj.task_desc,
-                'completed': task_obj.completed,
-            }
-            serialized_tasks.append(task_dict)
-        serialized_tasks.sort(key=lambda task: task['startTime'])
-        return http.JsonResponse({'TASKS': serialized_tasks})
+        date = request.POST.get('date') or request.GET.get('date')
+        if date:
+            try:
+                date = datetime.date.fromisoformat(date)
+            except ValueError:
+                return http.JsonResponse({'ERROR': f"'{date}' is not a date in the YYYY-MM-DD format."}, status=400)
+            return http.JsonResponse({'TASKS': serialize_tasks(archive.get_tasks(request.user, date))})
+        tasks_qs = request.user.dayschedules.current_tasks
+        return http.JsonResponse({'TASKS': serialize_tasks(tasks_qs)})
+
+
+def serialize_tasks(tasks):
+    """Returns a list of `dict`s representing the given tasks, sorted by start
+    time, in the format the frontend expects.
+
+    The list is meant to be encoded with `DjangoJSONEncoder`, which both
+    `JsonResponse` and the `json_script` template filter use.
+    """
+    serialized_tasks = []
+    for task_obj in tasks:
+        task_dict = {
+            'id': task_obj.id,
+            'startTime': defaultfilters.time(task_obj.start_time, 'H:i'),
+            'endTime': defaultfilters.time(task_obj.end_time, 'H:i'),
+            'desc': task_obj.task_desc,
+            'completed': task_obj.completed,
+        }
+        serialized_tasks.append(task_dict)
+    serialized_tasks.sort(key=lambda task: task['startTime'])
+    return serialized_tasks